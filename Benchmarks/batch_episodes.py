@@ -0,0 +1,58 @@
+import argparse
+import time
+import sys
+import os
+import pathlib
+
+parent = pathlib.Path(os.path.abspath(os.path.curdir))
+herbie_path = os.path.join(str(parent))
+sys.path.append(herbie_path)
+
+from Herbie.Sim.Api import BatchRunner
+from Herbie.CarNav.Pathfinder import Pathfinder
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs simulated navigation episodes on every core.")
+    parser.add_argument("--episodes", type=int, default=200)
+    parser.add_argument("--map-size", type=int, default=41)
+    parser.add_argument("--cell-size", type=int, default=10)
+    parser.add_argument("--obstacle-ratio", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-steps", type=int, default=300)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--incremental-planning", action="store_true")
+    parser.add_argument("--scan-num-steps", type=int, default=None)
+    parser.add_argument("--pathfinding-method", choices=Pathfinder.METHODS, default=None)
+    parser.add_argument("--planning-time-budget", type=float, default=None)
+    # the car radius turns on the inflation cost, which grows per cell closer to an obstacle
+    parser.add_argument("--car-radius", type=float, default=0.0)
+    parser.add_argument("--inflation-cost", type=int, default=4)
+    parser.add_argument("--out", default="episodes.npz")
+    args = parser.parse_args()
+
+    specs = BatchRunner.random_specs(
+        args.episodes,
+        args.map_size,
+        args.cell_size,
+        args.obstacle_ratio,
+        seed=args.seed,
+        max_steps=args.max_steps,
+        incremental_planning=args.incremental_planning,
+        scan_num_steps=args.scan_num_steps,
+        pathfinding_method=args.pathfinding_method,
+        planning_time_budget=args.planning_time_budget,
+        car_radius_in_cm=args.car_radius,
+        inflation_cost_per_cell=args.inflation_cost
+        )
+    start = time.perf_counter()
+    columns = BatchRunner.run(specs, processes=args.processes)
+    elapsed = time.perf_counter() - start
+    BatchRunner.save(args.out, columns)
+    print(f"{args.episodes} episodes in {elapsed:.1f} s, results in {args.out}")
+    for name, value in BatchRunner.summary(columns).items():
+        print(f"{name}: {value:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+from typing import Any, Dict, List
+import argparse
+import asyncio
+import json
+import multiprocessing
+import time
+import sys
+import os
+import pathlib
+
+import numpy as np
+
+parent = pathlib.Path(os.path.abspath(os.path.curdir))
+herbie_path = os.path.join(str(parent))
+sys.path.append(herbie_path)
+
+from websockets.asyncio.client import connect
+
+from Herbie.Network.Api import WebSocketServer, Telemetry, FrameHeader
+from Benchmarks.telemetry import make_frame
+
+
+async def connect_when_ready(uri: str, timeout: float = 10.0) -> Any:
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            return await connect(uri, max_size=None)
+        except OSError:
+            # the server is still starting
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.05)
+
+
+async def viewer(uri: str, last_sequence: int, drop_after: int) -> Dict[str, Any]:
+    """
+        Receives and acknowledges frames like the dashboard does. With drop_after > 0
+        the connection is cut without closing it after that many frames.
+    """
+    ws = await connect_when_ready(uri)
+    latencies: List[float] = []
+    async for message in ws:
+        if not isinstance(message, bytes):
+            continue
+        header = FrameHeader(*Telemetry.HEADER.unpack_from(message))
+        latencies.append(time.time() - header.timestamp)
+        if drop_after and len(latencies) >= drop_after:
+            ws.transport.abort()
+            break
+        await ws.send(json.dumps({"ack": header.sequence}))
+        if header.sequence >= last_sequence:
+            break
+    await ws.close()
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "dropped": bool(drop_after),
+        "frames": len(latencies),
+        "p50_ms": float(np.percentile(latencies_ms, 50)) if len(latencies) else float("nan"),
+        "p95_ms": float(np.percentile(latencies_ms, 95)) if len(latencies) else float("nan")
+    }
+
+
+def run_viewers(uri: str, last_sequence: int, drop_afters: List[int], results: Any) -> None:
+    async def run() -> List[Dict[str, Any]]:
+        return await asyncio.gather(*[viewer(uri, last_sequence, drop_after) for drop_after in drop_afters])
+    results.put(asyncio.run(run()))
+
+
+async def load_test(args: argparse.Namespace) -> None:
+    uri = f"ws://localhost:{args.port}"
+    server = WebSocketServer("localhost", args.port, send_timeout=args.send_timeout)
+    serving = asyncio.create_task(server.run())
+    # the dropped viewers go first so they are spread over the processes
+    drop_afters = [args.frames // 4] * args.dropped + [0] * (args.clients - args.dropped)
+    results: Any = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(
+            target=run_viewers, args=(uri, args.frames - 1, drop_afters[i::args.processes], results), daemon=True
+            )
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    while len(server.connections_) < args.clients:
+        await asyncio.sleep(0.01)
+
+    image = make_frame(args.width, args.height)
+    steps = []
+    period = 1.0 / args.fps
+    start_cpu = time.process_time()
+    for sequence in range(args.frames):
+        start = time.perf_counter()
+        await server.send({"speed": 0.0, "obstacle": (-1, -1), "frame": sequence})
+        server.send_frame(image, sequence, args.encoding, args.quality)
+        steps.append(time.perf_counter() - start)
+        await asyncio.sleep(max(period - steps[-1], 0.0))
+    # before the viewers that got every frame hang up
+    remaining = len(server.connections_)
+    viewers = []
+    for _ in processes:
+        viewers.extend(await asyncio.get_running_loop().run_in_executor(None, results.get))
+    cpu_time = time.process_time() - start_cpu
+    for process in processes:
+        process.join()
+    serving.cancel()
+
+    steps_ms = np.array(steps) * 1000
+    print(
+        f"{args.clients} viewers, {args.dropped} cut off: step p50 {np.percentile(steps_ms, 50):.2f} ms "
+        f"max {steps_ms.max():.2f} ms, server cpu {cpu_time * 1000 / args.frames:.2f} ms/frame, "
+        f"{remaining} connections at the end"
+        )
+    for i, result in enumerate(sorted(viewers, key=lambda r: (r["dropped"], r["p50_ms"]))):
+        print(
+            f"  viewer {i:>3}{' (cut off)' if result['dropped'] else ''}: {result['frames']}/{args.frames} frames "
+            f"latency p50 {result['p50_ms']:.1f} ms p95 {result['p95_ms']:.1f} ms"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Broadcasts camera frames to many local websocket viewers.")
+    parser.add_argument("--clients", type=int, default=30)
+    parser.add_argument("--dropped", type=int, default=2, help="viewers that cut their connection part way")
+    parser.add_argument("--processes", type=int, default=2, help="processes the viewers are spread over")
+    parser.add_argument("--frames", type=int, default=150)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--encoding", default="jpeg", choices=list(Telemetry.ENCODINGS))
+    parser.add_argument("--quality", type=int, default=80)
+    parser.add_argument("--width", type=int, default=320)
+    parser.add_argument("--height", type=int, default=320)
+    parser.add_argument("--send-timeout", type=float, default=1.0)
+    parser.add_argument("--port", type=int, default=8865)
+    args = parser.parse_args()
+    asyncio.run(load_test(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+from typing import Union
+import math
+import sys
+import os
+import pathlib
+
+parent = pathlib.Path(os.path.abspath(os.path.curdir))
+herbie_path = os.path.join(str(parent))
+sys.path.append(herbie_path)
+
+from Herbie.CarNav.Controllers import AutonomousController
+from Herbie.Hardware.Base import BaseDriveTrain, BaseSensor
+from Herbie.CMath.Api import Position
+
+MAX_SPEED = 30.0 # centimeters per second, what DriveTrain.forward_for assumes
+ACCELERATION = 60.0 # centimeters per second^2
+TRACK_RADIUS = 11.5 # centimeters from a motor to the center of the car
+ROTATE_SPEED = 35.0 # centimeters per second, what DriveTrain.rotate assumes
+
+
+class SimulatedDriveTrain(BaseDriveTrain):
+    """
+        Adds up how long the motions would take for a car that has to accelerate
+        from a stop and brake to one, instead of driving anything.
+    """
+
+    def __init__(self):
+        self.speed = 0.0
+        self.elapsed = 0.0
+        self.num_stops = 0
+
+    def drive_(self, centimeters: float, stop: bool) -> None:
+        # accelerate towards MAX_SPEED then cruise
+        accelerate_distance = (MAX_SPEED**2 - self.speed**2) / (2 * ACCELERATION)
+        if accelerate_distance >= centimeters:
+            new_speed = math.sqrt(self.speed**2 + 2 * ACCELERATION * centimeters)
+            self.elapsed += (new_speed - self.speed) / ACCELERATION
+            self.speed = new_speed
+        else:
+            self.elapsed += (MAX_SPEED - self.speed) / ACCELERATION
+            self.elapsed += (centimeters - accelerate_distance) / MAX_SPEED
+            self.speed = MAX_SPEED
+        if stop:
+            self.stop()
+
+    def stop(self) -> None:
+        if self.speed > 0:
+            self.elapsed += self.speed / ACCELERATION
+            self.num_stops += 1
+        self.speed = 0.0
+
+    def forward_for(self, power: int, centimeters: float, stop: bool = True) -> None:
+        self.drive_(centimeters, stop)
+
+    def backward_for(self, power: int, centimeters: float, stop: bool = True) -> None:
+        self.drive_(centimeters, stop)
+
+    def forward(self, power: int) -> None:
+        pass
+
+    def backward(self, power: int) -> None:
+        pass
+
+    def turn_left(self, power: int) -> None:
+        pass
+
+    def turn_right(self, power: int) -> None:
+        pass
+
+    def rotate(self, degrees_to: float):
+        self.stop()
+        self.elapsed += math.radians(abs(degrees_to)) * TRACK_RADIUS / ROTATE_SPEED
+
+    def shutdown(self) -> None:
+        pass
+
+    @property
+    def get_left_rear_speed(self) -> Union[int, float]:
+        return self.speed
+
+    @property
+    def get_right_rear_speed(self) -> Union[int, float]:
+        return self.speed
+
+    @property
+    def get_avg_speed(self) -> float:
+        return self.speed
+
+
+class NothingSensor(BaseSensor):
+    # the route's obstacles are already on the map so the sensor never sees anything new
+    def get_distance(self) -> float:
+        return -1
+
+    def move_sensor_to(self, angle: float) -> bool:
+        return True
+
+    def shutdown(self) -> None:
+        pass
+
+
+def drive_route(continuous_motion: bool, map_size=41, cell_size=15) -> SimulatedDriveTrain:
+    drive_train = SimulatedDriveTrain()
+    center = map_size // 2
+    controller = AutonomousController(
+        map_size, cell_size, Position(center + 15, center - 12), drive_train, NothingSensor(),
+        continuous_motion=continuous_motion
+        )
+    # two walls the route has to go around
+    controller.mapp_.add_obstacles_xy([(center + 4, y) for y in range(center - 8, center + 3)])
+    controller.mapp_.add_obstacles_xy([(x, center - 8) for x in range(center + 4, center + 14)])
+    for _ in controller.drive():
+        pass
+    return drive_train
+
+
+def bench_route():
+    for continuous_motion in [False, True]:
+        drive_train = drive_route(continuous_motion)
+        name = "continuous" if continuous_motion else "stop and go"
+        print(f"{name}: {drive_train.elapsed:.1f} s {drive_train.num_stops} stops")
+
+
+if __name__ == "__main__":
+    bench_route()
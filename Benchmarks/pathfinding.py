@@ -0,0 +1,73 @@
+from typing import Callable, List, Tuple
+import time
+import sys
+import os
+import pathlib
+
+import numpy as np
+
+parent = pathlib.Path(os.path.abspath(os.path.curdir))
+herbie_path = os.path.join(str(parent))
+sys.path.append(herbie_path)
+
+from Herbie.CarNav.Mapp import Mapp, TiledMapp
+from Herbie.CarNav.Pathfinder import Pathfinder
+from Herbie.CMath.Api import Position
+
+
+def make_cluttered_map(map_size: int, obstacle_ratio: float, seed: int = 0) -> Mapp:
+    rng = np.random.default_rng(seed)
+    mapp = Mapp(map_size, map_size, 10)
+    num_obstacles = int(map_size * map_size * obstacle_ratio)
+    xs = rng.integers(0, map_size, num_obstacles)
+    ys = rng.integers(0, map_size, num_obstacles)
+    mapp.add_obstacles_xy(list(zip(xs.tolist(), ys.tolist())))
+    return mapp
+
+
+def time_engine(
+        engine: Callable[..., List[Position]], mapp: Mapp, starting: Position, target: Position, repeats: int
+        ) -> Tuple[float, List[Position]]:
+    best = float("inf")
+    path = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        path = engine(mapp, starting, target, max_steps=10_000_000)
+        best = min(best, time.perf_counter() - start)
+    return best, path
+
+
+def bench_a_star(map_sizes=(51, 201, 1001), obstacle_ratio=0.1, repeats=3):
+    for map_size in map_sizes:
+        mapp = make_cluttered_map(map_size, obstacle_ratio)
+        # keep the corners free so a path always starts and ends on an open cell
+        starting = Position(1, 1, 0)
+        target = Position(map_size - 2, map_size - 2)
+        mapp._map[starting.y, starting.x] = 0
+        mapp._map[target.y, target.x] = 0
+        object_time, object_path = time_engine(Pathfinder.a_star, mapp, starting, target, repeats)
+        array_time, array_path = time_engine(Pathfinder.a_star_array, mapp, starting, target, repeats)
+        print(
+            f"{map_size}x{map_size}: a_star {object_time * 1_000:.1f} ms ({len(object_path)} cells) "
+            f"a_star_array {array_time * 1_000:.1f} ms ({len(array_path)} cells) "
+            f"speedup {object_time / array_time:.1f}x"
+            )
+
+
+def bench_hierarchical_a_star(map_sizes=(1001, 4001), repeats=1):
+    for map_size in map_sizes:
+        mapp = TiledMapp(map_size, map_size, 10)
+        # a wall across most of the map forces a long detour
+        mapp.add_obstacles_xy([(x, map_size // 2) for x in range(0, map_size - 10)])
+        starting = Position(5, 5, 0)
+        target = Position(5, map_size - 5)
+        tiled_time, tiled_path = time_engine(Pathfinder.hierarchical_a_star, mapp, starting, target, repeats)
+        print(
+            f"{map_size}x{map_size}: hierarchical_a_star {tiled_time * 1_000:.1f} ms ({len(tiled_path)} cells) "
+            f"{mapp.get_allocated_bytes() / 1_000:.1f} kB allocated"
+            )
+
+
+if __name__ == "__main__":
+    bench_a_star()
+    bench_hierarchical_a_star()
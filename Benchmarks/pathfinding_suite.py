@@ -0,0 +1,143 @@
+from typing import Any, Callable, Dict, List, NamedTuple
+import argparse
+import json
+import platform
+import time
+import tracemalloc
+import sys
+import os
+import pathlib
+
+import numpy as np
+
+parent = pathlib.Path(os.path.abspath(os.path.curdir))
+herbie_path = os.path.join(str(parent))
+sys.path.append(herbie_path)
+
+from Herbie.CarNav.Pathfinder import Pathfinder
+from Herbie.CarNav.DStarLite import DStarLite
+from Herbie.Sim.Corpus import CorpusMap, MapCorpus
+from Herbie.CMath.Api import Position
+
+MAX_STEPS = 100_000_000
+
+
+class Engine(NamedTuple):
+    name: str
+    # builds what the engine searches, not timed
+    prepare: Callable[[CorpusMap], Any]
+    # returns (path, nodes expanded)
+    search: Callable[[Any, CorpusMap], Any]
+    # larger maps take minutes with this engine and are skipped
+    max_size: int
+
+
+def search_pathfinder(search: Callable[..., List[Position]]) -> Callable[[Any, CorpusMap], Any]:
+    def run(mapp: Any, corpus_map: CorpusMap) -> Any:
+        Pathfinder.nodes_expanded = 0
+        path = search(mapp, corpus_map.start, corpus_map.target, max_steps=MAX_STEPS)
+        return path, Pathfinder.nodes_expanded
+    return run
+
+
+def search_d_star_lite(mapp: Any, corpus_map: CorpusMap) -> Any:
+    planner = DStarLite(mapp, corpus_map.target)
+    path = planner.plan(corpus_map.start)
+    return path, planner.nodes_expanded
+
+
+ENGINES = {
+    engine.name: engine for engine in [
+        Engine("a_star", lambda m: m.to_mapp(), search_pathfinder(Pathfinder.a_star), 1001),
+        Engine("a_star_array", lambda m: m.to_mapp(), search_pathfinder(Pathfinder.a_star_array), 2001),
+        Engine("jump_point_search", lambda m: m.to_mapp(), search_pathfinder(Pathfinder.jump_point_search), 2001),
+        Engine("bidirectional_a_star", lambda m: m.to_mapp(), search_pathfinder(Pathfinder.bidirectional_a_star), 201),
+        Engine("hierarchical_a_star", lambda m: m.to_tiled_mapp(), search_pathfinder(Pathfinder.hierarchical_a_star), 2001),
+        Engine("d_star_lite", lambda m: m.to_mapp(), search_d_star_lite, 201)
+    ]
+}
+
+
+def bench_engine(engine: Engine, corpus_map: CorpusMap, repeats: int) -> Dict[str, Any]:
+    mapp = engine.prepare(corpus_map)
+    times = []
+    path, nodes_expanded = [], 0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        path, nodes_expanded = engine.search(mapp, corpus_map)
+        times.append(time.perf_counter() - start)
+    # tracing slows everything down so memory is measured on its own run
+    tracemalloc.start()
+    engine.search(mapp, corpus_map)
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    times_ms = np.array(times) * 1000
+    return {
+        "map": corpus_map.name,
+        "kind": corpus_map.kind,
+        "size": corpus_map.size,
+        "engine": engine.name,
+        "repeats": repeats,
+        "p50_ms": float(np.percentile(times_ms, 50)),
+        "p95_ms": float(np.percentile(times_ms, 95)),
+        "nodes_expanded": int(nodes_expanded),
+        "peak_memory_kb": peak_memory / 1000,
+        "path_length": len(path),
+        "found_path": len(path) > 0
+    }
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str) -> None:
+    with open(baseline_path) as f:
+        baseline = {(r["map"], r["engine"]): r for r in json.load(f)["results"]}
+    for result in results:
+        old = baseline.get((result["map"], result["engine"]))
+        if old is None:
+            continue
+        print(
+            f"{result['map']:>22} {result['engine']:>20}: p50 {result['p50_ms'] / max(old['p50_ms'], 1e-9):.2f}x "
+            f"nodes {result['nodes_expanded'] - old['nodes_expanded']:+d} "
+            f"memory {result['peak_memory_kb'] / max(old['peak_memory_kb'], 1e-9):.2f}x"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs every pathfinding engine over a seeded map corpus.")
+    parser.add_argument("--kinds", nargs="+", default=list(MapCorpus.KINDS), choices=MapCorpus.KINDS)
+    parser.add_argument("--sizes", nargs="+", type=int, default=[11, 51, 201, 1001, 2001])
+    parser.add_argument("--seeds", nargs="+", type=int, default=[0])
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=list(ENGINES))
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--all-sizes", action="store_true", help="do not skip maps that are too large for an engine")
+    parser.add_argument("--out", default="pathfinding.json")
+    parser.add_argument("--baseline", default=None, help="earlier results to compare against")
+    args = parser.parse_args()
+
+    results: List[Dict[str, Any]] = []
+    for corpus_map in MapCorpus.generate(args.kinds, args.sizes, args.seeds):
+        for name in args.engines:
+            engine = ENGINES[name]
+            if corpus_map.size > engine.max_size and not args.all_sizes:
+                continue
+            result = bench_engine(engine, corpus_map, args.repeats)
+            results.append(result)
+            print(
+                f"{result['map']:>22} {name:>20}: p50 {result['p50_ms']:.1f} ms p95 {result['p95_ms']:.1f} ms "
+                f"{result['nodes_expanded']} nodes {result['peak_memory_kb']:.0f} kB "
+                f"{'path' if result['found_path'] else 'no path'}"
+                )
+    with open(args.out, "w") as f:
+        json.dump({
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "args": vars(args),
+            "results": results
+        }, f, indent=2)
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
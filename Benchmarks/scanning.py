@@ -0,0 +1,78 @@
+from typing import List, Tuple
+import sys
+import os
+import pathlib
+
+parent = pathlib.Path(os.path.abspath(os.path.curdir))
+herbie_path = os.path.join(str(parent))
+sys.path.append(herbie_path)
+
+from Herbie.Hardware.Base import BaseSensor
+
+SPEED_OF_SOUND = 34_300 # centimeters per second
+PING_DELAY = 0.01 # UltraSonic.get_distance waits this long before every ping
+
+
+class SimulatedSensor(BaseSensor):
+    """
+        Adds up the time an UltraSonic sensor would spend moving and pinging instead
+        of sleeping so a scan can be timed instantly.
+    """
+
+    def __init__(self, fixed_settle_time: bool = False):
+        self.fixed_settle_time = fixed_settle_time
+        self.angle = 0.0
+        self.sensor_angle_ = 0.0
+        self.elapsed = 0.0
+
+    def get_distance(self) -> float:
+        distance = 50 + abs(self.angle)
+        self.elapsed += PING_DELAY + 2 * distance / SPEED_OF_SOUND
+        return distance
+
+    def move_sensor_to(self, angle: float) -> bool:
+        settle_time = self.track_sensor_move_(angle)
+        # the servo waited a fixed 0.1 seconds after every move before settle times were tracked
+        self.elapsed += 0.1 if self.fixed_settle_time else settle_time
+        self.angle = angle
+        return True
+
+    def shutdown(self) -> None:
+        pass
+
+
+def serial_scan(
+        sensor: BaseSensor, from_degrees: float, to_degrees: float, num_steps: int, samples_per_step: int
+        ) -> List[Tuple[float, float]]:
+    # BaseSensor.scan before it swept once and streamed results
+    measurements = []
+    for angle in BaseSensor.scan_angles_(from_degrees, to_degrees, num_steps):
+        samples = [sensor.get_distance_at(angle)[1]]
+        sample_size = 20 // samples_per_step
+        for i in range(1, (samples_per_step // 2) + 1):
+            samples.append(sensor.get_distance_at(angle - sample_size * i)[1])
+        for i in range(1, (samples_per_step // 2) + 1):
+            samples.append(sensor.get_distance_at(angle + sample_size * i)[1])
+        measurements.append((angle, sum(samples) / len(samples)))
+    return measurements
+
+
+def bench_scan(num_steps_list=(5, 11, 19), samples_per_step_list=(1, 2, 4)):
+    for num_steps in num_steps_list:
+        for samples_per_step in samples_per_step_list:
+            serial_sensor = SimulatedSensor(fixed_settle_time=True)
+            serial_scan(serial_sensor, -90, 90, num_steps, samples_per_step)
+            sensor = SimulatedSensor()
+            first_result_at = 0.0
+            for i, _ in enumerate(sensor.scan_iter(-90, 90, num_steps, samples_per_step)):
+                if i == 0:
+                    first_result_at = sensor.elapsed
+            print(
+                f"{num_steps} angles {samples_per_step} samples: serial {serial_sensor.elapsed:.2f} s "
+                f"sweep {sensor.elapsed:.2f} s (first result after {first_result_at:.2f} s) "
+                f"speedup {serial_sensor.elapsed / sensor.elapsed:.1f}x"
+                )
+
+
+if __name__ == "__main__":
+    bench_scan()
@@ -0,0 +1,41 @@
+import time
+import sys
+import os
+import pathlib
+
+parent = pathlib.Path(os.path.abspath(os.path.curdir))
+herbie_path = os.path.join(str(parent))
+sys.path.append(herbie_path)
+
+from Herbie.Sim.Api import World, Episode
+from Herbie.CMath.Api import Position
+
+
+def bench_episodes(num_episodes=50, map_size=41, cell_size=10, obstacle_ratio=0.1):
+    center = map_size // 2
+    target = Position(center + 15, center - 15, 0)
+    for name, kwargs in [
+            ("stop and go", {}),
+            ("scanning", {"scan_num_steps": 5}),
+            ("incremental", {"incremental_planning": True}),
+            ("noisy sensor", {"sensor_noise": 5.0})
+            ]:
+        reached, collisions, sim_time = 0, 0, 0.0
+        start = time.perf_counter()
+        for seed in range(num_episodes):
+            world = World.random(
+                map_size, map_size, cell_size, obstacle_ratio, seed=seed, keep_clear=[Position(center, center, 0), target]
+                )
+            result = Episode.run(world, target, max_steps=100, **kwargs)
+            reached += result.reached_target
+            collisions += result.collisions
+            sim_time += result.sim_time
+        elapsed = time.perf_counter() - start
+        print(
+            f"{name}: {num_episodes / elapsed:.1f} episodes/s {reached}/{num_episodes} reached "
+            f"{collisions} collisions {sim_time / elapsed:.0f}x real time"
+            )
+
+
+if __name__ == "__main__":
+    bench_episodes()
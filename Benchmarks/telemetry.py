@@ -0,0 +1,174 @@
+from typing import Any, Dict, List
+import argparse
+import asyncio
+import json
+import multiprocessing
+import time
+import sys
+import os
+import pathlib
+
+import cv2
+import numpy as np
+
+parent = pathlib.Path(os.path.abspath(os.path.curdir))
+herbie_path = os.path.join(str(parent))
+sys.path.append(herbie_path)
+
+from websockets.sync.client import connect
+
+from Herbie.Network.Api import WebSocketServer, Telemetry, FrameHeader
+
+# "json" is the old protocol, every RGBA pixel as a number in the JSON message
+ENCODINGS = ["json", "raw", "jpeg", "webp"]
+
+
+def make_frame(width: int, height: int, seed: int = 0) -> np.ndarray:
+    # a gradient with some shapes and sensor noise, compresses roughly like a camera frame
+    rng = np.random.default_rng(seed)
+    xs, ys = np.meshgrid(np.arange(width), np.arange(height))
+    image = np.dstack([xs * 255 // width, ys * 255 // height, np.full_like(xs, 100)]).astype(np.uint8)
+    for _ in range(10):
+        x, y = rng.integers(0, width), rng.integers(0, height)
+        color = tuple(int(c) for c in rng.integers(0, 256, size=3))
+        cv2.rectangle(image, (int(x), int(y)), (int(x) + 40, int(y) + 30), color, -1) # type: ignore
+    noise = rng.integers(-8, 9, size=image.shape)
+    return np.clip(image.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+
+def json_frame(image: np.ndarray, sequence: int) -> Dict[str, Any]:
+    height, width = image.shape[:2]
+    alphas = np.ones((height, width, 1), dtype=np.uint8) * 255
+    return {
+        "speed": 0.0,
+        "image": np.concatenate([image, alphas], axis=2).flatten().astype(np.uint8).tolist(),
+        "obstacle": (-1, -1),
+        "frame": sequence
+    }
+
+
+def connect_when_ready(uri: str, timeout: float = 10.0) -> Any:
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            return connect(uri, max_size=None)
+        except ConnectionRefusedError:
+            # the server is still starting
+            if time.perf_counter() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+def receive_frames(uri: str, last_sequence: int, delay: float, results: Any) -> None:
+    # runs in its own process so its CPU time is not counted against the car
+    with connect_when_ready(uri) as ws:
+        ws.send(json.dumps({}))
+        arrivals, sizes, latencies = [], [], []
+        while True:
+            message = ws.recv()
+            now = time.time()
+            if isinstance(message, bytes):
+                header = FrameHeader(*Telemetry.HEADER.unpack_from(message))
+                sequence = header.sequence
+                latencies.append(now - header.timestamp)
+            elif '"image"' in message:
+                sequence = int(message[message.rindex(":") + 1:-1])
+            else:
+                continue
+            arrivals.append(now)
+            sizes.append(len(message))
+            if sequence >= last_sequence:
+                break
+            # a slow browser, acknowledging the frame once it is drawn like the dashboard does
+            time.sleep(delay)
+            if isinstance(message, bytes):
+                ws.send(json.dumps({"ack": sequence}))
+    results.put({
+        "frames": len(arrivals),
+        "fps": (len(arrivals) - 1) / max(arrivals[-1] - arrivals[0], 1e-9),
+        "bytes_per_frame": float(np.mean(sizes)),
+        "latency_ms": float(np.mean(latencies) * 1000) if latencies else float("nan")
+    })
+
+
+async def bench_encoding(
+        encoding: str, image: np.ndarray, num_frames: int, fps: float, port: int, quality: int, delays: List[float]
+        ) -> Dict[str, Any]:
+    server = WebSocketServer("localhost", port)
+    serving = asyncio.create_task(server.run())
+    results: Any = multiprocessing.Queue()
+    clients = [
+        multiprocessing.Process(
+            target=receive_frames, args=(f"ws://localhost:{port}", num_frames - 1, delay, results), daemon=True
+            )
+        for delay in delays
+    ]
+    for client in clients:
+        client.start()
+    while len(server.connections_) < len(clients):
+        await asyncio.sleep(0.01)
+    # paced like WebController.drive_, the period is how long one step of it takes
+    periods = []
+    period = 1.0 / fps
+    start_cpu = time.process_time()
+    for sequence in range(num_frames):
+        start = time.perf_counter()
+        if encoding == "json":
+            await server.send(json_frame(image, sequence))
+        else:
+            await server.send({"speed": 0.0, "obstacle": (-1, -1), "frame": sequence})
+            server.send_frame(image, sequence, encoding, quality)
+        periods.append(time.perf_counter() - start)
+        await asyncio.sleep(max(period - periods[-1], 0.0))
+    # the clients report once they have the last frame
+    client_results = [
+        await asyncio.get_running_loop().run_in_executor(None, results.get) for _ in clients
+    ]
+    cpu_time = time.process_time() - start_cpu
+    for client in clients:
+        client.join()
+    serving.cancel()
+    periods_ms = np.array(periods) * 1000
+    return {
+        "encoding": encoding,
+        "server_cpu_ms_per_frame": cpu_time * 1000 / num_frames,
+        "step_p50_ms": float(np.percentile(periods_ms, 50)),
+        "step_max_ms": float(periods_ms.max()),
+        "clients": client_results
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streams camera frames to local websocket clients.")
+    parser.add_argument("--encodings", nargs="+", default=ENCODINGS, choices=ENCODINGS)
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--width", type=int, default=320)
+    parser.add_argument("--height", type=int, default=320)
+    parser.add_argument("--quality", type=int, default=80)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--client-delays", nargs="+", type=float, default=[0.0],
+        help="one client per value, each waits this many seconds after every frame"
+        )
+    args = parser.parse_args()
+
+    image = make_frame(args.width, args.height)
+    for i, encoding in enumerate(args.encodings):
+        result = asyncio.run(bench_encoding(
+            encoding, image, args.frames, args.fps, args.port + i, args.quality, args.client_delays
+            ))
+        print(
+            f"{encoding:>5}: server cpu {result['server_cpu_ms_per_frame']:.2f} ms/frame "
+            f"step p50 {result['step_p50_ms']:.2f} ms max {result['step_max_ms']:.2f} ms"
+            )
+        for delay, client in zip(args.client_delays, result["clients"]):
+            print(
+                f"       client delay {delay * 1000:.0f} ms: {client['frames']}/{args.frames} frames "
+                f"{client['fps']:.1f} fps {client['bytes_per_frame'] / 1000:.1f} kB/frame "
+                f"latency {client['latency_ms']:.1f} ms"
+                )
+
+
+if __name__ == "__main__":
+    main()
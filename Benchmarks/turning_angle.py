@@ -0,0 +1,88 @@
+from typing import Callable
+import math as py_math
+import timeit
+import sys
+import os
+import pathlib
+
+import numpy as np
+
+parent = pathlib.Path(os.path.abspath(os.path.curdir))
+herbie_path = os.path.join(str(parent))
+sys.path.append(herbie_path)
+
+from Herbie.CMath.Math import Math, Position
+
+
+# The np.array based implementations Math used before the scalar fast path.
+def legacy_xy_normalize(pos: Position) -> Position:
+    v = np.array([pos.x, pos.y])
+    normed = v / py_math.sqrt(np.dot(v, v))
+    return Position(normed[0], normed[1], pos.angle)
+
+
+def legacy_unsigned_angle(a: Position, b: Position) -> float:
+    va = np.array([a.x, a.y])
+    vb = np.array([b.x, b.y])
+    ab = np.dot(va, vb) / (py_math.sqrt(np.dot(va, va)) * py_math.sqrt(np.dot(vb, vb)))
+    return py_math.degrees(py_math.acos(ab))
+
+
+def legacy_cross(a: Position, b: Position) -> float:
+    va = legacy_xy_normalize(a)
+    vb = legacy_xy_normalize(b)
+    return float(va.x * vb.y - va.y * vb.x)
+
+
+def legacy_calc_turning_angle(origin: Position, target: Position) -> float:
+    origin_dir = Math.project_position(origin.clone(0, 0), scaled_distance=1, flip_y=True, should_round=True)
+    translated_target = target.clone(target.x - origin.x, target.y - origin.y)
+    cross_v = -round(legacy_cross(origin_dir, translated_target))
+    unsigned_angle = legacy_unsigned_angle(origin_dir, translated_target)
+    if cross_v != 0:
+        unsigned_angle *= cross_v
+    return unsigned_angle
+
+
+def time_call(fn: Callable[[], object], number: int) -> float:
+    # best of 5 runs, in microseconds per call
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1_000_000
+
+
+def bench_scalar(number=20_000):
+    a = Position(1, -1, 45)
+    b = Position(3, 7)
+    pairs = [
+        ("xy_normalize", lambda: legacy_xy_normalize(b), lambda: b.xy_normalize()),
+        ("unsigned_angle", lambda: legacy_unsigned_angle(a, b), lambda: Math.unsigned_angle(a, b)),
+        ("cross", lambda: legacy_cross(a, b), lambda: Math.cross(a, b)),
+        ("calc_turning_angle", lambda: legacy_calc_turning_angle(a, b), lambda: Math.calc_turning_angle(a, b)),
+    ]
+    for name, legacy, fast in pairs:
+        legacy_time = time_call(legacy, number)
+        fast_time = time_call(fast, number)
+        print(f"{name}: legacy {legacy_time:.2f} us scalar {fast_time:.2f} us speedup {legacy_time / fast_time:.1f}x")
+
+
+def bench_batch(sizes=(8, 1_000, 100_000)):
+    rng = np.random.default_rng(0)
+    for size in sizes:
+        origins = np.column_stack([rng.integers(0, 100, (size, 2)), 45 * rng.integers(0, 8, size)])
+        targets = origins[:, :2] + rng.choice([-1, 0, 1], (size, 2))
+        targets[(targets == origins[:, :2]).all(axis=1), 0] += 1
+        origin_positions = [Position(*origin) for origin in origins.tolist()]
+        target_positions = [Position(*target) for target in targets.tolist()]
+        number = max(1, 10_000 // size)
+        scalar_time = time_call(
+            lambda: [Math.calc_turning_angle(o, t) for o, t in zip(origin_positions, target_positions)], number
+            )
+        batch_time = time_call(lambda: Math.calc_turning_angles(origins, targets), number)
+        print(
+            f"{size} angles: scalar loop {scalar_time:.1f} us calc_turning_angles {batch_time:.1f} us "
+            f"speedup {scalar_time / batch_time:.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    bench_scalar()
+    bench_batch()
@@ -3,9 +3,9 @@ import time
 import asyncio
 
 # importing this way will include the picar package
-from Herbie.Hardware.Api import DriveTrain, UltraSonic, Camera
+from Herbie.Hardware.Api import DriveTrain, UltraSonic, ThreadedCamera
 from Herbie.Network.Client import Client
-from Herbie.CarNav.Api import Car, AutonomousController, TFDetector
+from Herbie.CarNav.Api import Car, AutonomousController, TFDetector, DetectorService
 from Herbie.CMath.Api import Position
 
 def soft_reset() -> None:
@@ -24,6 +24,8 @@ def car_main(dist_x, dist_y, map_size=51, cell_size=15, servo_offset=35, has_ser
     if has_server:
         client = Client()
     try:
+        # inference runs on its own thread while the camera keeps capturing
+        camera = ThreadedCamera()
         car = Car(
                 AutonomousController(
                     map_size,
@@ -31,7 +33,7 @@ def car_main(dist_x, dist_y, map_size=51, cell_size=15, servo_offset=35, has_ser
                     Position(map_size // 2 + dist_x, map_size // 2 + dist_y),
                     DriveTrain(),
                     UltraSonic(servo_offset=servo_offset),
-                    TFDetector(Camera())
+                    DetectorService(TFDetector(camera), camera=camera)
                 ),
                 client
             )
@@ -9,7 +9,7 @@ parent = pathlib.Path(os.path.abspath(os.path.curdir))
 herbie_path = os.path.join(str(parent))
 sys.path.append(herbie_path)
 
-from Herbie.Hardware.Api import DriveTrain, UltraSonic, Camera
+from Herbie.Hardware.Api import DriveTrain, UltraSonic, ThreadedCamera
 from Herbie.Network.Client import Client
 from Herbie.CarNav.Api import Car, WebController
 from Herbie.Network.Api import WebSocketServer
@@ -34,7 +34,7 @@ def car_main(has_server=False):
                 WebController(
                     DriveTrain(),
                     WebSocketServer(host="192.168.1.36"),
-                    camera = Camera()
+                    camera = ThreadedCamera()
                 ),
                 client
             )
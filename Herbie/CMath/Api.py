@@ -1 +1,2 @@
-from Herbie.CMath.Math import *
\ No newline at end of file
+from Herbie.CMath.Math import *
+from Herbie.CMath.GridMotion import *
\ No newline at end of file
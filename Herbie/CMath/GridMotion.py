@@ -0,0 +1,88 @@
+from typing import Dict, Tuple, Union
+import math as py_math
+
+from Herbie.CMath.Math import Math, Position
+
+# The 8 grid headings 0, 45, ..., 315 degrees as (dx, dy) offsets in map
+# coordinates (y grows downward so 90 degrees = up).
+HEADING_OFFSETS: Tuple[Tuple[int, int], ...] = (
+    (1, 0), (1, -1), (0, -1), (-1, -1), (-1, 0), (-1, 1), (0, 1), (1, 1)
+)
+NUM_HEADINGS = len(HEADING_OFFSETS)
+# Squared length of a move in each heading, the same distance a_star charges.
+STEP_COSTS: Tuple[int, ...] = tuple(dx * dx + dy * dy for dx, dy in HEADING_OFFSETS)
+# TURN_COSTS[current_heading][new_heading] = abs(turning angle) / 45
+TURN_COSTS: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(min((d - h) % NUM_HEADINGS, (h - d) % NUM_HEADINGS) for d in range(NUM_HEADINGS))
+    for h in range(NUM_HEADINGS)
+)
+# Expand neighbors in the same order as Mapp.get_open_neighbors.
+NEIGHBOR_ORDER: Tuple[int, ...] = (0, 4, 6, 2, 7, 3, 5, 1)
+
+def heading_to_bin(angle: Union[int, float]) -> int:
+    # Quantize the same way Math.calc_turning_angle does, by rounding the
+    # projected unit vector onto the grid.
+    rads = py_math.radians(angle)
+    offset = (round(py_math.cos(rads)), round(-py_math.sin(rads)))
+    return HEADING_OFFSETS.index(offset)
+
+# (dx, dy) -> heading bin of a move to that neighbor
+OFFSET_BINS: Dict[Tuple[int, int], int] = {offset: d for d, offset in enumerate(HEADING_OFFSETS)}
+# grid heading in degrees -> heading bin, so the common case skips heading_to_bin
+HEADING_BINS: Dict[int, int] = {d * 45: d for d in range(NUM_HEADINGS)}
+HEADING_BINS[360] = 0
+# TURN_ANGLES[current_heading][new_heading] = Math.calc_turning_angle(..., should_round=True)
+TURN_ANGLES: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(
+        Math.calc_turning_angle(Position(0, 0, h * 45), Position(dx, dy), should_round=True)
+        for dx, dy in HEADING_OFFSETS
+    )
+    for h in range(NUM_HEADINGS)
+)
+
+class GridMotion:
+    """
+        Table lookups that replace Math.calc_turning_angle and
+        Math.calc_new_heading_from_position for a move to one of the 8 neighboring
+        cells. Anything that is not a single grid step falls back to Math.
+    """
+
+    @staticmethod
+    def lookup_(heading: Union[int, float], dx: Union[int, float], dy: Union[int, float]) -> Union[Tuple[int, int], None]:
+        move_bin = OFFSET_BINS.get((dx, dy), None)
+        if move_bin is None:
+            return None
+        heading_bin = HEADING_BINS.get(heading, None)
+        if heading_bin is None:
+            heading_bin = heading_to_bin(heading)
+        return heading_bin, move_bin
+
+    @staticmethod
+    def turning_angle(heading: Union[int, float], dx: Union[int, float], dy: Union[int, float]) -> int:
+        """
+            Signed turn (rounded to a degree) a car facing heading makes to move by (dx, dy).
+        """
+        bins = GridMotion.lookup_(heading, dx, dy)
+        if bins is None:
+            return Math.calc_turning_angle(Position(0, 0, heading), Position(dx, dy), should_round=True)
+        return TURN_ANGLES[bins[0]][bins[1]]
+
+    @staticmethod
+    def new_heading(heading: Union[int, float], dx: Union[int, float], dy: Union[int, float]) -> int:
+        bins = GridMotion.lookup_(heading, dx, dy)
+        if bins is None:
+            return Math.calc_new_heading_from_position(Position(0, 0, heading), Position(dx, dy))
+        if heading in HEADING_BINS:
+            return bins[1] * 45
+        # off grid headings keep their offset from the grid
+        return Math.calc_new_heading(heading, TURN_ANGLES[bins[0]][bins[1]])
+
+    @staticmethod
+    def turn_cost(heading: Union[int, float], dx: Union[int, float], dy: Union[int, float]) -> Union[int, float]:
+        """
+            abs(turning angle) / 45, the turn cost a_star charges for the move.
+        """
+        bins = GridMotion.lookup_(heading, dx, dy)
+        if bins is None:
+            return abs(GridMotion.turning_angle(heading, dx, dy)) / 45
+        return TURN_COSTS[bins[0]][bins[1]]
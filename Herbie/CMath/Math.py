@@ -1,19 +1,47 @@
-from typing import Any, Generator, Union, Tuple, List
+from typing import Any, Generator, Iterable, Iterator, Union, Tuple, List
 import math as py_math
 import numpy as np
 
-from dataclasses import dataclass
-
-@dataclass(frozen=True)
 class Position:
+    """
+        An (x, y, angle) that can not be changed once created. It is a plain class 
+        with __slots__ rather than a tuple, so it only equals another Position, does 
+        not add or sort like a tuple and does not build a list to unpack.
+    """
+    __slots__ = ("x", "y", "angle")
     x: Union[int, float]
     y: Union[int, float]
-    angle: Union[int, float] = 0
+    angle: Union[int, float]
+
+    def __init__(self, x: Union[int, float], y: Union[int, float], angle: Union[int, float] = 0) -> None:
+        # writing through the slots directly skips the __setattr__ that keeps it frozen
+        set_x_(self, x)
+        set_y_(self, y)
+        set_angle_(self, angle)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"Position is immutable, use clone to change {name}")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"Position is immutable, can not delete {name}")
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # pickle through __init__ since __setattr__ refuses
+        return (Position, (self.x, self.y, self.angle))
 
-    def __iter__(self):
-        attrs = [self.x, self.y, self.angle]
-        for attr in attrs:
-            yield attr
+    def __iter__(self) -> Iterator[Union[int, float]]:
+        return iter((self.x, self.y, self.angle))
+
+    def __eq__(self, other: Any) -> bool:
+        if other.__class__ is not Position:
+            return NotImplemented
+        return self.x == other.x and self.y == other.y and self.angle == other.angle
+
+    def __hash__(self) -> int:
+        return hash((self.x, self.y, self.angle))
+
+    def __repr__(self) -> str:
+        return f"Position(x={self.x!r}, y={self.y!r}, angle={self.angle!r})"
 
     def xy_compare(self, other: "Position") -> bool:
         if self.x == other.x and self.y == other.y:
@@ -21,10 +49,8 @@ class Position:
         return False
 
     def xy_normalize(self) -> "Position":
-        v = self.xy_array()
-        length = py_math.sqrt(np.dot(v, v))
-        normed = v / length
-        return Position(normed[0], normed[1], self.angle)
+        length = py_math.hypot(self.x, self.y)
+        return Position(self.x / length, self.y / length, self.angle)
     
     def xy_tuple(self) -> Tuple[Union[int, float], Union[int, float]]:
         return (self.x, self.y)
@@ -49,8 +75,71 @@ class Position:
         if x_true and y_true:
             return Position(x, y, self.angle)
         if angle_true:
-            return Position(self.x, self.y, angle)  
-        return Position(self.x, self.y, self.angle) 
+            return Position(self.x, self.y, angle)
+        return self
+
+
+set_x_, set_y_, set_angle_ = Position.x.__set__, Position.y.__set__, Position.angle.__set__ # type: ignore
+
+
+class PositionArray:
+    """
+        N positions stored as one (N, 3) array of (x, y, angle) rows. Paths and
+        obstacle lists can be shifted, rounded and sliced without creating a
+        Position per point. Indexing with an int returns a Position, any other
+        index returns a PositionArray.
+    """
+
+    def __init__(self, data: Union[np.ndarray, None] = None) -> None:
+        if data is None:
+            data = np.zeros((0, 3))
+        data = np.asarray(data)
+        if data.ndim != 2 or data.shape[1] not in (2, 3):
+            raise ValueError(f"PositionArray needs an (N, 2) or (N, 3) array not {data.shape}")
+        if data.shape[1] == 2:
+            # positions without an angle face 0 degrees like Position does
+            data = np.column_stack([data, np.zeros(len(data), dtype=data.dtype)])
+        self.data_ = data
+
+    @staticmethod
+    def from_positions(positions: Iterable[Position], dtype: Any = None) -> "PositionArray":
+        # dtype=None keeps integer cells as integers
+        return PositionArray(np.array([tuple(position) for position in positions], dtype=dtype).reshape(-1, 3))
+
+    def to_positions(self) -> List[Position]:
+        return [Position(x, y, angle) for x, y, angle in self.data_.tolist()]
+
+    def xy_array(self) -> np.ndarray:
+        return self.data_[:, :2]
+
+    def xy_tuples(self) -> List[Tuple[Union[int, float], Union[int, float]]]:
+        return [(x, y) for x, y in self.data_[:, :2].tolist()]
+
+    def xy_round(self) -> "PositionArray":
+        xy = np.rint(self.data_[:, :2]).astype(np.int64)
+        return PositionArray(np.column_stack([xy, self.data_[:, 2]]))
+
+    def xy_shift(self, dx: Union[int, float], dy: Union[int, float]) -> "PositionArray":
+        data = self.data_.copy()
+        data[:, 0] += dx
+        data[:, 1] += dy
+        return PositionArray(data)
+
+    def __len__(self) -> int:
+        return len(self.data_)
+
+    def __iter__(self) -> Iterator[Position]:
+        return iter(self.to_positions())
+
+    def __getitem__(self, idx: Any) -> Union[Position, "PositionArray"]:
+        if isinstance(idx, (int, np.integer)):
+            x, y, angle = self.data_[idx].tolist()
+            return Position(x, y, angle)
+        return PositionArray(self.data_[idx])
+
+    def __repr__(self) -> str:
+        return f"PositionArray({self.data_.tolist()})"
+
     
 class Math:
 
@@ -73,20 +162,35 @@ class Math:
             return proj_pos.xy_round()
         return proj_pos
     
+    @staticmethod
+    def project_xy_batch(
+        x: Union[int, float],
+        y: Union[int, float],
+        angles: np.ndarray,
+        scaled_distances: np.ndarray,
+        flip_y=True
+        ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+            Vectorized project_position for many (angle, distance) pairs cast from the
+            same (x, y). Returns the projected x and y arrays without rounding.
+        """
+        flip = -1 if flip_y == True else 1
+        rads = np.radians(angles)
+        return (
+            scaled_distances * np.cos(rads) + x,
+            scaled_distances * (flip * np.sin(rads)) + y
+            )
+
     @staticmethod
     def unsigned_angle(a: Position, b: Position) -> float:
-        va = a.xy_array()
-        vb = b.xy_array()
-        amag = py_math.sqrt(np.dot(va, va))
-        bmag = py_math.sqrt(np.dot(vb, vb))
-        ab = np.dot(va, vb) / (amag * bmag)
-        return py_math.degrees(py_math.acos(ab))
+        ab = (a.x * b.x + a.y * b.y) / (py_math.hypot(a.x, a.y) * py_math.hypot(b.x, b.y))
+        # rounding can push ab just past +-1 for (anti)parallel vectors
+        return py_math.degrees(py_math.acos(max(-1.0, min(1.0, ab))))
 
     @staticmethod
     def cross(a: Position, b: Position) -> float:
-        va: np.ndarray = a.xy_normalize().xy_array()
-        vb: np.ndarray = b.xy_normalize().xy_array()
-        return float(np.cross(va, vb))
+        # z of the cross product of the normalized vectors
+        return (a.x * b.y - a.y * b.x) / (py_math.hypot(a.x, a.y) * py_math.hypot(b.x, b.y))
     
     @staticmethod
     def calc_turning_angle(
@@ -94,23 +198,43 @@ class Math:
         target: Position, 
         should_round = False
         ) -> float:
-        origin_dir = Math.project_position(
-            origin.clone(0, 0), 
-            scaled_distance=1, 
-            flip_y=True,
-            should_round=True
-            )
-        translated_target = target.clone(target.x - origin.x, target.y - origin.y)
+        rads = py_math.radians(origin.angle)
+        # unit direction the origin is facing, snapped to the grid (y is flipped)
+        origin_dir = Position(round(py_math.cos(rads)), round(-py_math.sin(rads)))
+        translated_target = Position(target.x - origin.x, target.y - origin.y)
         cross_v = -round(Math.cross(origin_dir, translated_target))
         unsigned_angle = Math.unsigned_angle(origin_dir, translated_target)
-        info = f"Cross: {cross_v} Origin: {origin} Origin Dir: {origin_dir} Target: {target} Trans Target: {translated_target} Unsigned Angle: {unsigned_angle}"
-        #print(info)
-        assert any([cross_v == p for p in [1, 0, -1]]), info
+        assert cross_v in (1, 0, -1), f"Cross: {cross_v} Origin: {origin} Target: {target}"
         if cross_v != 0:
             unsigned_angle *= cross_v
         if should_round:
             unsigned_angle = round(unsigned_angle)
         return unsigned_angle
+
+    @staticmethod
+    def calc_turning_angles(
+        origins: np.ndarray,
+        targets: np.ndarray,
+        should_round = False
+        ) -> np.ndarray:
+        """
+            Vectorized calc_turning_angle. origins is an (N, 3) array of (x, y, angle)
+            and targets is an (N, 2) array of (x, y). Returns the N turning angles.
+        """
+        origins = np.asarray(origins, dtype=np.float64)
+        targets = np.asarray(targets, dtype=np.float64)
+        rads = np.radians(origins[:, 2])
+        dir_x = np.rint(np.cos(rads))
+        dir_y = np.rint(-np.sin(rads))
+        target_x = targets[:, 0] - origins[:, 0]
+        target_y = targets[:, 1] - origins[:, 1]
+        mags = np.hypot(dir_x, dir_y) * np.hypot(target_x, target_y)
+        cross_v = -np.rint((dir_x * target_y - dir_y * target_x) / mags)
+        unsigned_angles = np.degrees(np.arccos(np.clip((dir_x * target_x + dir_y * target_y) / mags, -1.0, 1.0)))
+        turning_angles = np.where(cross_v != 0, unsigned_angles * cross_v, unsigned_angles)
+        if should_round:
+            turning_angles = np.rint(turning_angles)
+        return turning_angles
     
     @staticmethod
     def calc_new_heading_from_position(
@@ -0,0 +1,238 @@
+from typing import Dict, List, NamedTuple, Set, Tuple, Union
+from heapq import heappush, heappop
+import threading
+import time
+
+import numpy as np
+
+from Herbie.CarNav.Pathfinder import (
+    HEADING_OFFSETS, NUM_HEADINGS, STEP_COSTS, TURN_COSTS, NEIGHBOR_ORDER, heading_to_bin
+)
+from Herbie.CMath.Api import Position, PositionArray
+
+INFINITY = float("inf")
+
+class AnytimePlan(NamedTuple):
+    # empty when no path was found yet
+    path: PositionArray
+    cost: float
+    # the cost is at most bound times the cheapest possible, inf without a path
+    bound: float
+    nodes_expanded: int
+
+    @property
+    def is_optimal(self) -> bool:
+        return self.bound <= 1.0
+
+
+class AnytimePlanner:
+    """
+        ARA* over the same (x, y, heading) states and costs as Pathfinder.a_star_grid.
+        The first search inflates the heuristic by initial_epsilon so it finds a path
+        quickly. Every later search lowers epsilon, reuses the scores of the one before
+        and tightens the bound on how far the path can be from the cheapest, until
+        epsilon reaches 1 and the path is the cheapest or the time budget runs out.
+
+        plan can be called again, or improve_in_background started, to keep improving
+        from where the last call stopped.
+    """
+    # how many expansions between looks at the clock
+    DEADLINE_CHECK_INTERVAL = 64
+
+    def __init__(
+            self,
+            blocked_grid: np.ndarray,
+            starting: Position,
+            target: Position,
+            cell_costs: Union[np.ndarray, None] = None,
+            initial_epsilon: float = 3.0,
+            epsilon_step: float = 0.5
+            ) -> None:
+        num_rows, num_columns = blocked_grid.shape
+        # Pad the grid with a blocked border so neighbors never need a bounds check.
+        self.padded_columns_ = num_columns + 2
+        self.blocked_: List[bool] = np.pad(blocked_grid, 1, constant_values=True).ravel().tolist()
+        self.cell_costs_: Union[List[int], None] = None
+        if cell_costs is not None:
+            self.cell_costs_ = np.pad(cell_costs, 1).ravel().tolist()
+        self.cell_deltas_ = [dy * self.padded_columns_ + dx for dx, dy in HEADING_OFFSETS]
+        self.target_x_, self.target_y_ = int(target.x) + 1, int(target.y) + 1
+        self.target_cell_ = self.target_y_ * self.padded_columns_ + self.target_x_
+        self.epsilon = initial_epsilon
+        self.epsilon_step = epsilon_step
+
+        self.gscores_: Dict[int, float] = {}
+        self.parents_: Dict[int, int] = {}
+        # state -> fvalue it was last queued with. Heap entries that no longer match are stale.
+        self.queued_fvalues_: Dict[int, float] = {}
+        self.open_list_: List[Tuple[float, int]] = []
+        # states expanded in the current search and states improved after they were
+        self.closed_: Set[int] = set()
+        self.inconsistent_: Set[int] = set()
+        self.goal_state_: Union[int, None] = None
+        self.nodes_expanded = 0
+        self.finished_ = False
+
+        self.search_lock_ = threading.Lock()
+        self.plan_lock_ = threading.Lock()
+        self.best_ = AnytimePlan(PositionArray(), INFINITY, INFINITY, 0)
+        self.stop_ = threading.Event()
+        self.thread_: Union[threading.Thread, None] = None
+
+        if not (0 <= int(starting.x) < num_columns and 0 <= int(starting.y) < num_rows):
+            print(f"Starting position: {starting} is outside of the map")
+            self.finished_ = True
+            return
+        start_cell = (int(starting.y) + 1) * self.padded_columns_ + int(starting.x) + 1
+        start_state = start_cell * NUM_HEADINGS + heading_to_bin(starting.angle)
+        self.gscores_[start_state] = 0
+        if start_cell == self.target_cell_:
+            self.goal_state_ = start_state
+        self.push_(start_state)
+
+    def heuristic_(self, state: int) -> int:
+        # Manhattan distance to the target. A diagonal step costs 2 and turns only add
+        # to the cost, so this never overestimates.
+        y, x = divmod(state // NUM_HEADINGS, self.padded_columns_)
+        return abs(x - self.target_x_) + abs(y - self.target_y_)
+
+    def push_(self, state: int) -> None:
+        fvalue = self.gscores_[state] + self.epsilon * self.heuristic_(state)
+        self.queued_fvalues_[state] = fvalue
+        heappush(self.open_list_, (fvalue, state))
+
+    def goal_gscore_(self) -> float:
+        if self.goal_state_ is None:
+            return INFINITY
+        return self.gscores_[self.goal_state_]
+
+    def improve_path_(self, deadline: float) -> bool:
+        """
+            Expands states until no queued state can lead to a cheaper path than the
+            one found. Returns False if the deadline passed first.
+        """
+        goal_gscore = self.goal_gscore_()
+        while self.open_list_:
+            fvalue, state = self.open_list_[0]
+            if self.queued_fvalues_.get(state, None) != fvalue:
+                heappop(self.open_list_)
+                continue
+            if goal_gscore <= fvalue:
+                return True
+            if self.nodes_expanded % self.DEADLINE_CHECK_INTERVAL == 0 and (
+                    time.perf_counter() > deadline or self.stop_.is_set()
+                    ):
+                return False
+            heappop(self.open_list_)
+            del self.queued_fvalues_[state]
+            self.closed_.add(state)
+            self.nodes_expanded += 1
+
+            cell, heading = divmod(state, NUM_HEADINGS)
+            gscore = self.gscores_[state]
+            turn_costs = TURN_COSTS[heading]
+            for new_heading in NEIGHBOR_ORDER:
+                neigh_cell = cell + self.cell_deltas_[new_heading]
+                if self.blocked_[neigh_cell]:
+                    continue
+                neigh_state = neigh_cell * NUM_HEADINGS + new_heading
+                neigh_gscore = gscore + STEP_COSTS[new_heading] + turn_costs[new_heading]
+                if self.cell_costs_ is not None:
+                    neigh_gscore += self.cell_costs_[neigh_cell]
+                if neigh_gscore >= self.gscores_.get(neigh_state, INFINITY):
+                    continue
+                self.gscores_[neigh_state] = neigh_gscore
+                self.parents_[neigh_state] = state
+                if neigh_cell == self.target_cell_ and neigh_gscore < goal_gscore:
+                    self.goal_state_ = neigh_state
+                    goal_gscore = neigh_gscore
+                if neigh_state in self.closed_:
+                    self.inconsistent_.add(neigh_state)
+                else:
+                    self.push_(neigh_state)
+        return True
+
+    def find_path_(self) -> PositionArray:
+        states = [self.goal_state_]
+        while states[-1] in self.parents_:
+            states.append(self.parents_[states[-1]])
+        ys, xs = np.divmod(np.array(states[::-1]) // NUM_HEADINGS, self.padded_columns_)
+        # remove the padding added around the map
+        return PositionArray(np.column_stack([xs - 1, ys - 1]))
+
+    def record_plan_(self, bound: float) -> None:
+        cost = self.goal_gscore_()
+        if cost == INFINITY:
+            return
+        with self.plan_lock_:
+            if cost < self.best_.cost or bound < self.best_.bound:
+                self.best_ = AnytimePlan(self.find_path_(), cost, min(bound, self.best_.bound), self.nodes_expanded)
+
+    def calc_bound_(self) -> float:
+        # the cheapest possible path goes through a queued or inconsistent state
+        candidates = list(self.queued_fvalues_) + list(self.inconsistent_)
+        lowest = min((self.gscores_[state] + self.heuristic_(state) for state in candidates), default=INFINITY)
+        if lowest == INFINITY:
+            return 1.0
+        return min(self.epsilon, self.goal_gscore_() / max(lowest, 1e-9))
+
+    def plan(self, time_budget: float) -> AnytimePlan:
+        """
+            Searches for up to time_budget seconds and returns the best plan so far.
+            Stops the background search first if one is running.
+        """
+        self.stop()
+        return self.plan_(time_budget)
+
+    def plan_(self, time_budget: float) -> AnytimePlan:
+        deadline = time.perf_counter() + time_budget
+        with self.search_lock_:
+            while not self.finished_:
+                if not self.improve_path_(deadline):
+                    # a cheaper path found before the deadline keeps the last bound
+                    self.record_plan_(self.best_.bound)
+                    break
+                if self.goal_state_ is None:
+                    print(f"Failed to find path to target: {(self.target_x_ - 1, self.target_y_ - 1)}")
+                    self.finished_ = True
+                    break
+                self.record_plan_(self.calc_bound_())
+                if self.epsilon <= 1.0 or self.best_.bound <= 1.0:
+                    self.finished_ = True
+                    break
+                self.epsilon = max(self.epsilon - self.epsilon_step, 1.0)
+                # queue the inconsistent states and re-key everything for the new epsilon
+                states = set(self.queued_fvalues_) | self.inconsistent_
+                self.open_list_ = []
+                self.queued_fvalues_ = {}
+                for state in states:
+                    self.push_(state)
+                self.inconsistent_ = set()
+                self.closed_ = set()
+        return self.best()
+
+    def best(self) -> AnytimePlan:
+        with self.plan_lock_:
+            return self.best_
+
+    def is_finished(self) -> bool:
+        return self.finished_
+
+    def improve_in_background(self, time_budget: float) -> None:
+        """
+            Keeps lowering epsilon on a thread until the path is the cheapest, time_budget
+            runs out or stop is called. Poll best for the improved path.
+        """
+        self.stop()
+        if self.finished_:
+            return
+        self.thread_ = threading.Thread(target=self.plan_, args=(time_budget,), daemon=True)
+        self.thread_.start()
+
+    def stop(self) -> None:
+        if self.thread_ is None:
+            return
+        self.stop_.set()
+        self.thread_.join()
+        self.thread_ = None
+        self.stop_.clear()
@@ -1,6 +1,10 @@
 from Herbie.CarNav.Car import *
 from Herbie.CarNav.Mapp import *
 from Herbie.CarNav.Pathfinder import *
+from Herbie.CarNav.PathExecutor import *
+from Herbie.CarNav.DStarLite import *
+from Herbie.CarNav.AnytimePlanner import *
+from Herbie.CarNav.Runtime import *
 from Herbie.CarNav.Controllers import *
 from Herbie.CarNav.Detectors import *
 from Herbie.CarNav.Base import *
\ No newline at end of file
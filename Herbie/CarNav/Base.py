@@ -20,7 +20,8 @@ class AbstractController(ABC):
         ...
     
     @abstractmethod
-    def get_log_data(self) -> Dict[str, Any]:
+    def get_log_data(self, snapshot: bool = False) -> Dict[str, Any]:
+        # snapshot asks for the whole state instead of what changed since the last call
         ...
 
     @abstractmethod
@@ -28,7 +29,7 @@ class AbstractController(ABC):
         ...
 
     @abstractmethod
-    def move_forward_(self, distance: Union[int, float]) -> None:
+    def move_forward_(self, distance: Union[int, float], power=50, stop=True) -> None:
         ...
 
     @abstractmethod
@@ -43,8 +44,8 @@ class BaseController(AbstractController):
     def move_backward_(self, distance: Union[int, float], power=50) -> None:
          self.drive_train_.backward_for(power, distance)
 
-    def move_forward_(self, distance: Union[int, float], power=50) -> None:
-        self.drive_train_.forward_for(power, distance)
+    def move_forward_(self, distance: Union[int, float], power=50, stop=True) -> None:
+        self.drive_train_.forward_for(power, distance, stop)
 
     def turn_(self, turning_angle: float) -> None:
         self.drive_train_.rotate(turning_angle)
@@ -69,7 +70,16 @@ class DetectionResult:
 		).score
 
 class BaseDetector(ABC):
+    # an object counts as seen above this score
+    SCORE_THRESHOLD = 0.5
 
     @abstractmethod
     def detect(self) -> DetectionResult:
-        ...
\ No newline at end of file
+        ...
+
+    def is_seen(self, name: str) -> bool:
+        # two detections in a row so a single false positive does not count
+        return all(self.detect().get_object_score(name) > self.SCORE_THRESHOLD for _ in range(2))
+
+    def shutdown(self) -> None:
+        pass
\ No newline at end of file
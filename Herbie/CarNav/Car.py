@@ -12,6 +12,8 @@ class Car:
         
         self.controller_ = controller
         self.client_ = client
+        # the client connection the last log data was sent on
+        self.logged_connection_ = 0
         if self.client_:
             self.client_.connect()
 
@@ -32,7 +34,10 @@ class Car:
 
     def send_server_data_(self):
         if self.client_:
-            self.client_.send(self.controller_.get_log_data())
+            # the first message on every connection holds the whole map
+            snapshot = self.client_.num_connections != self.logged_connection_
+            self.logged_connection_ = self.client_.num_connections
+            self.client_.send(self.controller_.get_log_data(snapshot))
     
     def shutdown(self) -> None:
         self.controller_.shutdown()
@@ -1,17 +1,28 @@
 
 from Herbie.Hardware.Base import BaseSensor, BaseCamera, BaseDriveTrain
 from Herbie.CarNav.Pathfinder import Pathfinder
-from Herbie.CarNav.Mapp import Mapp
+from Herbie.CarNav.PathExecutor import PathExecutor
+from Herbie.CarNav.DStarLite import DStarLite
+from Herbie.CarNav.AnytimePlanner import AnytimePlanner
+from Herbie.CarNav.Mapp import Mapp, OccupancyMapp, TiledMapp
 from Herbie.CarNav.Base import BaseController, BaseDetector
-from Herbie.CMath.Api import Math, Position
+from Herbie.CarNav.Runtime import LatestValue, Stage
+from Herbie.CarNav.Detectors import DetectorService
+from Herbie.CMath.Api import Math, Position, GridMotion
 
-from typing import Any, AsyncGenerator, Generator, List, Tuple, Dict, Union
+from typing import Any, AsyncGenerator, Callable, Generator, Iterable, List, Tuple, Dict, Union
 import time
+import math as py_math
+import threading
 import asyncio
 from collections import deque
 import numpy as np
 
 class AutonomousController(BaseController):
+    STOP_SIGN_WAIT = 3.0 # seconds
+    # how long the anytime planner keeps improving a path after handing it over
+    BACKGROUND_PLANNING_TIME = 1.0 # seconds
+
     def __init__(
             self,
             map_size: int,
@@ -19,70 +30,448 @@ class AutonomousController(BaseController):
             target: Position,
             drive_train: BaseDriveTrain,
             obstacle_sensor: BaseSensor, 
-            detector: Union[BaseDetector, None] = None
+            detector: Union[BaseDetector, None] = None,
+            incremental_planning: bool = False,
+            occupancy_grid: bool = False,
+            car_radius_in_cm: float = 0.0,
+            inflation_cost_per_cell: int = 4,
+            tile_size: Union[int, None] = None,
+            scan_num_steps: Union[int, None] = None,
+            continuous_motion: bool = False,
+            sleep: Callable[[float], None] = time.sleep,
+            start: Union[Position, None] = None,
+            planning_time_budget: Union[float, None] = None,
+            pathfinding_method: Union[str, None] = None
             ):
         super(AutonomousController, self).__init__(drive_train)
         self.obstacle_sensor_ = obstacle_sensor
         self.detector_ = detector
-        self.mapp_ = Mapp(map_size, map_size, cell_size)
+        self.mapp_ = Mapp(map_size, map_size, cell_size, car_radius_in_cm)
+        if occupancy_grid:
+            # cells can be cleared again when later scans see through them
+            self.mapp_ = OccupancyMapp(map_size, map_size, cell_size, inflation_radius_in_cm=car_radius_in_cm)
+        if tile_size:
+            assert not car_radius_in_cm, "Tiled maps do not inflate obstacles by the car's radius"
+            assert not occupancy_grid, "Tiled maps do not keep occupancy log-odds"
+            # D* Lite copies the whole map into a dense grid, which tiling exists to avoid
+            assert not incremental_planning, "Tiled maps are planned hierarchically, not incrementally"
+            # memory grows with the explored area so map_size can cover a whole building
+            self.mapp_ = TiledMapp(map_size, map_size, cell_size, tile_size)
+        # what entering a cell costs the planner for every cell closer than car_radius_in_cm to an obstacle
+        self.inflation_cost_per_cell_ = inflation_cost_per_cell
+        # sweep the sensor across this many angles on every scan instead of only looking ahead
+        self.scan_num_steps_ = scan_num_steps
+        # drive straight runs of the path without stopping at every cell
+        self.continuous_motion_ = continuous_motion
+        # a simulation passes its own clock so waiting does not take real time
+        self.sleep_ = sleep
         self.pathfinder_ = Pathfinder()
-        self.car_position: Position = Position(
+        # keeps its search between replans and only repairs around cells that changed
+        self.incremental_pathfinder_: Union[DStarLite, None] = None
+        if incremental_planning:
+            self.incremental_pathfinder_ = DStarLite(self.mapp_, target)
+        # plan for at most this many seconds and keep improving the path while driving it
+        self.planning_time_budget_ = planning_time_budget
+        self.anytime_planner_: Union[AnytimePlanner, None] = None
+        self.anytime_start_: Union[Position, None] = None
+        self.anytime_change_idx_ = 0
+        self.anytime_cost_ = float("inf")
+        self.mapp_change_idx_ = 0
+        # One of Pathfinder.METHODS. The other planning options bring their own search,
+        # so a method is only accepted where it is the one that plans.
+        if pathfinding_method is not None:
+            assert pathfinding_method in Pathfinder.METHODS, f"Unknown pathfinding method: {pathfinding_method}"
+            assert not incremental_planning and not tile_size and planning_time_budget is None, (
+                "pathfinding_method can not be used with incremental, tiled or anytime planning"
+                )
+            assert not car_radius_in_cm or pathfinding_method == "a_star_array", (
+                "Only a_star_array keeps the path away from obstacles by the car's radius"
+                )
+        self.pathfinding_method_ = pathfinding_method or "a_star"
+        self.log_change_idx_ = 0
+        # the car starts in the center of the map unless told otherwise
+        self.car_position: Position = start or Position(
             self.mapp_.num_columns // 2, self.mapp_.num_rows // 2, angle=0
         )
+        # time spent in find_path_ and how many times it was called
+        self.planning_time_ = 0.0
+        self.num_plans_ = 0
         self.target_ = target
         self.current_path_: deque[Position] = deque()
+        # change index of the map the last failed plan was made on
+        self.failed_plan_change_idx_: Union[int, None] = None
         self.seen_objects_: Dict[str, bool] = {"stop sign" : False}
 
     def drive(self) -> Generator[bool, None, bool]: # Generator[YieldType, SendType, ReturnType]
-        while self.car_position.xy_compare(self.target_):
+        while not self.car_position.xy_compare(self.target_):
             self.scan_update_path_()
             self.see_objects_()
-            if self.current_path_:
-                reached_next_cell = self.step(self.current_path_.popleft())
+            self.adopt_improved_path_()
+            if not self.current_path_:
+                # plans on a TiledMapp end near the car so plan the next part once it is used up
+                self.current_path_ = deque(self.find_path_()[1:])
+            if not self.current_path_ and self.is_target_unreachable_():
+                print(f"No path to the target: {self.target_}")
+                self.drive_train_.stop()
+                return False
+            if self.continuous_motion_:
+                self.drive_segment_()
+            elif self.current_path_:
+                self.step(self.current_path_.popleft())
             yield True
+        self.drive_train_.stop()
         return True
     
+    def is_target_unreachable_(self) -> bool:
+        """
+            Called after planning failed. True once it failed twice in a row on the same
+            map, the scan in between may still clear a cell an occupancy grid got wrong.
+            An anytime planner that ran out of time keeps searching on the next call.
+        """
+        if self.anytime_planner_ is not None and not self.anytime_planner_.finished_:
+            return False
+        change_idx = self.mapp_.get_change_idx()
+        is_unreachable = self.failed_plan_change_idx_ == change_idx
+        self.failed_plan_change_idx_ = change_idx
+        return is_unreachable
+
     def step(self, new_position: Position) -> bool:
-        angle_to_turn = Math.calc_turning_angle(self.car_position, new_position)
-        if abs(angle_to_turn) > 0:
-            self.turn_(angle_to_turn)
-            self.car_position = Math.calc_updated_heading(self.car_position, angle_to_turn)
+        if self.turn_towards_(new_position) and self.scan_update_path_():
+            return False
+        self.advance_to_(new_position)
+        return True
+
+    def drive_segment_(self) -> bool:
+        """
+            Drives the next straight run of current_path_ as one motion. While the
+            motors keep running the car only reads straight ahead after every cell,
+            a sweep would let it roll on for a second. The full scan waits until the
+            car stopped at the end of the run. Returns False when the run was cut 
+            short because the path changed.
+        """
+        segments = PathExecutor.plan_segments(self.car_position, self.current_path_, self.mapp_.cell_size_in_cm)
+        if not segments:
+            self.drive_train_.stop()
+            return False
+        segment = segments[0]
+        if segment.turning_angle:
+            self.turn_towards_(segment.cells[0])
             if self.scan_update_path_():
                 return False
-        self.move_forward_(self.mapp_.cell_size_in_cm)
-        self.car_position = Math.calc_new_xy_position(self.car_position, self.mapp_.cell_size_in_cm)
+        for i, (cell, centimeters) in enumerate(zip(segment.cells, segment.centimeters)):
+            last_cell = i == len(segment.cells) - 1
+            self.move_forward_(centimeters, stop=last_cell)
+            self.car_position = Position(cell.x, cell.y, segment.heading)
+            self.current_path_.popleft()
+            if self.scan_update_path_(full_sweep=last_cell) and not last_cell:
+                # the next call starts on the new path
+                self.drive_train_.stop()
+                return False
         return True
+
+    def turn_towards_(self, new_position: Position) -> bool:
+        angle_to_turn = GridMotion.turning_angle(
+            self.car_position.angle, new_position.x - self.car_position.x, new_position.y - self.car_position.y
+            )
+        if abs(angle_to_turn) > 0:
+            self.turn_(angle_to_turn)
+            self.car_position = Math.calc_updated_heading(self.car_position, angle_to_turn)
+            return True
+        return False
+
+    def advance_to_(self, new_position: Position) -> None:
+        # diagonal cells are sqrt(2) cells away
+        cells = py_math.hypot(new_position.x - self.car_position.x, new_position.y - self.car_position.y)
+        self.move_forward_(self.mapp_.cell_size_in_cm * cells)
+        self.car_position = self.car_position.clone(new_position.x, new_position.y)
     
     def shutdown(self) -> None:
+        if self.anytime_planner_:
+            self.anytime_planner_.stop()
+        if self.detector_:
+            self.detector_.shutdown()
         self.drive_train_.shutdown()
     
-    def get_log_data(self) -> Dict[str, Any]:
+    def get_log_data(self, snapshot: bool = False) -> Dict[str, Any]:
+        # Only the obstacles that changed since the last call are sent, the server 
+        # accumulates them into its own copy of the map. A server that connected after
+        # the first call asks for a snapshot of every obstacle to start its copy from.
+        # the changes since the last call may also have been dropped from the map's log
+        snapshot = snapshot or not self.mapp_.can_replay_changes_since(self.log_change_idx_)
+        if snapshot:
+            new_obstacles, cleared_obstacles = self.mapp_.get_obstacles(), []
+            self.log_change_idx_ = self.mapp_.get_change_idx()
+        else:
+            new_obstacles, cleared_obstacles, self.log_change_idx_ = self.mapp_.get_obstacle_changes_since(
+                self.log_change_idx_
+                )
         return {
             "map_size": self.mapp_.num_columns,
             "cell_size": self.mapp_.cell_size_in_cm,
-            "target": self.target_,
-            "position": self.car_position,
-            "obstacles": self.mapp_.get_obstacles(),
-            "current_path": self.current_path_
+            "target": self.target_.xy_tuple(),
+            "position": self.car_position.xy_round().xy_tuple(),
+            "heading": self.car_position.angle,
+            "obstacles": new_obstacles,
+            "cleared_obstacles": cleared_obstacles,
+            # obstacles holds every obstacle and replaces the server's copy of the map
+            "obstacles_snapshot": snapshot,
+            "current_path": [position.xy_tuple() for position in self.current_path_]
         }
  
     def see_objects_(self):
-        if self.detector_:
-            detector_results = [self.detector_.detect().get_object_score("stop sign") > 0.5 for _ in range(2)]
-            if sum(detector_results) > 1 and not self.seen_objects_["stop sign"]:
-                print("Found stop sign")
-                self.seen_objects_["stop sign"] = True
-                time.sleep(3.0)
+        if self.detect_stop_sign_() and not self.seen_objects_["stop sign"]:
+            print("Found stop sign")
+            self.seen_objects_["stop sign"] = True
+            self.drive_train_.stop()
+            self.sleep_(self.STOP_SIGN_WAIT)
+
+    def detect_stop_sign_(self) -> bool:
+        if not self.detector_:
+            return False
+        return self.detector_.is_seen("stop sign")
+
+    def read_obstacles_(self, full_sweep: bool = True) -> Iterable[Tuple[float, float]]:
+        if self.scan_num_steps_ and full_sweep:
+            return self.obstacle_sensor_.scan_iter(-90, 90, self.scan_num_steps_)
+        return [self.obstacle_sensor_.get_distance_at(0)]
     
-    def scan_update_path_(self) -> bool:
-        obstacles = [self.obstacle_sensor_.get_distance_at(0)]
-        if self.mapp_.add_obstacles(self.car_position, obstacles):
+    def scan_update_path_(self, full_sweep: bool = True) -> bool:
+        # The whole sweep is added in one batch. An OccupancyMapp only keeps a beam from
+        # clearing a cell another beam hit when both are in the same batch.
+        readings = list(self.read_obstacles_(full_sweep))
+        if self.mapp_.add_obstacles(self.car_position, readings):
             self.current_path_ = deque(
                 # Position at index 0 is the current position of the car
-                self.pathfinder_.a_star(self.mapp_, self.car_position, self.target_)[1:]
+                self.find_path_()[1:]
                 )
             return True
         return False
+
+    def find_path_(self, starting: Union[Position, None] = None) -> List[Position]:
+        start_time = time.perf_counter()
+        path = self.plan_path_(starting)
+        self.planning_time_ += time.perf_counter() - start_time
+        self.num_plans_ += 1
+        return path
+
+    def plan_path_(self, starting: Union[Position, None] = None) -> List[Position]:
+        if starting is None:
+            starting = self.car_position
+        if self.incremental_pathfinder_:
+            if not self.mapp_.can_replay_changes_since(self.mapp_change_idx_):
+                # too much changed to repair, start over from the map as it is now
+                self.incremental_pathfinder_ = DStarLite(self.mapp_, self.target_)
+                self.mapp_change_idx_ = self.mapp_.get_change_idx()
+            changed_cells, self.mapp_change_idx_ = self.mapp_.get_changes_since(self.mapp_change_idx_)
+            self.incremental_pathfinder_.update_cells(changed_cells)
+            return self.incremental_pathfinder_.plan(starting)
+        if isinstance(self.mapp_, TiledMapp):
+            return self.pathfinder_.hierarchical_a_star(
+                self.mapp_, starting, self.target_, refine_tiles=Pathfinder.TILES_PER_CHUNK
+                )
+        if self.planning_time_budget_ is not None:
+            return self.plan_anytime_(starting)
+        if self.mapp_.inflation_radius > 0:
+            # keep the path away from obstacles so the car does not graze them
+            return self.pathfinder_.a_star_array(
+                self.mapp_, starting, self.target_, inflation=Pathfinder.INFLATION_COST,
+                inflation_cost_per_cell=self.inflation_cost_per_cell_
+                )
+        return self.pathfinder_.find_path(self.mapp_, starting, self.target_, self.pathfinding_method_)
+
+    def plan_anytime_(self, starting: Position) -> List[Position]:
+        map_changed = not self.mapp_.can_replay_changes_since(self.anytime_change_idx_)
+        if map_changed:
+            self.anytime_change_idx_ = self.mapp_.get_change_idx()
+        changed_cells, self.anytime_change_idx_ = self.mapp_.get_changes_since(self.anytime_change_idx_)
+        # keep searching where the last call stopped if nothing it planned with changed
+        if map_changed or changed_cells or self.anytime_planner_ is None or starting != self.anytime_start_:
+            if self.anytime_planner_:
+                self.anytime_planner_.stop()
+            cell_costs = None
+            if self.mapp_.inflation_radius > 0:
+                cell_costs = self.mapp_.get_inflation_cost_grid(self.inflation_cost_per_cell_)
+            self.anytime_planner_ = AnytimePlanner(self.mapp_.get_blocked_grid(), starting, self.target_, cell_costs)
+            self.anytime_start_ = starting
+        plan = self.anytime_planner_.plan(self.planning_time_budget_) # type: ignore
+        self.anytime_cost_ = plan.cost
+        self.anytime_planner_.improve_in_background(self.BACKGROUND_PLANNING_TIME)
+        return plan.path.to_positions()
+
+    def adopt_improved_path_(self) -> None:
+        """
+            Switches to the path the anytime planner improved in the background if it
+            is cheaper and still goes through the cell the car is in.
+        """
+        if self.anytime_planner_ is None:
+            return
+        plan = self.anytime_planner_.best()
+        if plan.cost >= self.anytime_cost_:
+            return
+        cells = plan.path.xy_tuples()
+        car_cell = self.car_position.xy_round().xy_tuple()
+        if car_cell in cells:
+            self.current_path_ = deque(plan.path.to_positions()[cells.index(car_cell) + 1:])
+            self.anytime_cost_ = plan.cost
+    
+
+class ConcurrentController(BaseController):
+    """
+        Drives an AutonomousController with sensing, detection, planning and actuation
+        each on their own thread. The stages only share the newest value through 
+        LatestValue channels, so planning always uses the latest scan and the motors
+        never wait for the detector. A DetectorService already runs on its own thread
+        and answers right away, so with one there is no detection stage and actuation
+        asks it directly. Latency of every stage is in get_log_data.
+    """
+    STOP_SIGN_WAIT = 3.0
+
+    def __init__(self, controller: AutonomousController, report_interval: float = 0.1):
+        super(ConcurrentController, self).__init__(controller.drive_train_)
+        self.controller_ = controller
+        self.report_interval_ = report_interval
+        # the car position the scans are taken from and planning starts at
+        self.pose_: LatestValue[Position] = LatestValue(controller.car_position)
+        # (position the scan was taken from, [(angle, distance), ...])
+        self.scans_: LatestValue[Tuple[Position, List[Tuple[float, float]]]] = LatestValue()
+        self.stop_signs_: LatestValue[bool] = LatestValue(False)
+        self.plans_: LatestValue[List[Position]] = LatestValue()
+        self.plan_requested_ = threading.Event()
+        self.plan_requested_.set()
+        self.plan_version_ = 0
+        self.stopped_until_ = 0.0
+        self.reached_target_ = threading.Event()
+        # held while the map or the current path changes so get_log_data reads them whole
+        self.state_lock_ = threading.Lock()
+        self.detector_service_: Union[DetectorService, None] = None
+        if isinstance(controller.detector_, DetectorService):
+            self.detector_service_ = controller.detector_
+        self.stages_ = [
+            Stage("sensing", self.sense_),
+            Stage("planning", self.plan_, self.scans_),
+            Stage("actuation", self.actuate_)
+        ]
+        if self.detector_service_ is None:
+            self.stages_.insert(1, Stage("detection", self.detect_))
+
+    def drive(self) -> Generator[bool, None, bool]: # Generator[YieldType, SendType, ReturnType]
+        for stage in self.stages_:
+            stage.start()
+        try:
+            while not self.reached_target_.wait(self.report_interval_):
+                for stage in self.stages_:
+                    if stage.error:
+                        raise stage.error
+                if self.detector_service_ is not None and self.detector_service_.error:
+                    raise self.detector_service_.error
+                yield True
+        finally:
+            self.stop()
+        return True
+
+    def stop(self) -> None:
+        # signal every stage before waiting so none keeps running behind a slow one
+        for stage in self.stages_:
+            stage.request_stop()
+        for stage in self.stages_:
+            stage.stop(timeout=1.0)
+        self.drive_train_.stop()
+
+    def step(self) -> bool:
+        return self.actuate_()
+
+    def shutdown(self) -> None:
+        self.stop()
+        self.controller_.shutdown()
+
+    def get_metrics(self) -> Dict[str, Dict[str, float]]:
+        metrics = {stage.name: stage.metrics.summary() for stage in self.stages_}
+        if self.detector_service_ is not None:
+            metrics["detection"] = self.detector_service_.metrics.summary()
+        return metrics
+
+    def get_log_data(self, snapshot: bool = False) -> Dict[str, Any]:
+        with self.state_lock_:
+            log_data = self.controller_.get_log_data(snapshot)
+        log_data["stage_latency"] = self.get_metrics()
+        return log_data
+
+    def sense_(self) -> bool:
+        position, _ = self.pose_.get()
+        readings = list(self.controller_.read_obstacles_())
+        self.scans_.put((position, readings)) # type: ignore
+        return True
+
+    def detect_(self) -> bool:
+        if not self.controller_.detector_:
+            return False
+        self.stop_signs_.put(self.controller_.detect_stop_sign_())
+        return True
+
+    def stop_sign_seen_(self) -> bool:
+        if self.detector_service_ is not None:
+            # the service only hands back its latest verdict, it never waits on inference
+            return self.controller_.detect_stop_sign_()
+        stop_sign, _ = self.stop_signs_.get()
+        return bool(stop_sign)
+
+    def plan_(self, scan: Tuple[Position, List[Tuple[float, float]]]) -> None:
+        position, readings = scan
+        with self.state_lock_:
+            found_new_obstacle = self.controller_.mapp_.add_obstacles(position, readings)
+        if found_new_obstacle or self.plan_requested_.is_set():
+            self.plan_requested_.clear()
+            starting, _ = self.pose_.get()
+            self.plans_.put(self.controller_.find_path_(starting))
+
+    def adopt_plan_(self, plan: List[Position]) -> None:
+        """
+            Follows a new plan from where the car is now, which can be past the cell
+            the plan starts at. The old path may be the one found blocked, so it is
+            never kept: a plan the car is not next to is dropped and planned again.
+        """
+        controller = self.controller_
+        car_x, car_y = controller.car_position.xy_tuple()
+        # the furthest cell of the plan the car can step to, or is already on
+        joins = [
+            i for i, (x, y, _) in enumerate(plan) if max(abs(x - car_x), abs(y - car_y)) <= 1
+            ]
+        with self.state_lock_:
+            if not joins:
+                controller.current_path_ = deque()
+                self.plan_requested_.set()
+                return
+            join = joins[-1]
+            if plan[join].xy_tuple() == (car_x, car_y):
+                join += 1
+            controller.current_path_ = deque(plan[join:])
+
+    def actuate_(self) -> bool:
+        controller = self.controller_
+        if time.perf_counter() < self.stopped_until_:
+            return False
+        if self.stop_sign_seen_() and not controller.seen_objects_["stop sign"]:
+            print("Found stop sign")
+            controller.seen_objects_["stop sign"] = True
+            self.drive_train_.stop()
+            self.stopped_until_ = time.perf_counter() + self.STOP_SIGN_WAIT
+            return False
+        plan, version = self.plans_.get()
+        if version != self.plan_version_ and plan:
+            self.plan_version_ = version
+            self.adopt_plan_(plan)
+        if not controller.current_path_:
+            self.plan_requested_.set()
+            return False
+        if controller.turn_towards_(controller.current_path_[0]):
+            self.pose_.put(controller.car_position)
+        with self.state_lock_:
+            next_position = controller.current_path_.popleft()
+        controller.advance_to_(next_position)
+        self.pose_.put(controller.car_position)
+        if controller.car_position.xy_compare(controller.target_):
+            self.reached_target_.set()
+        return True
     
 
 class WebController(BaseController):
@@ -93,13 +482,22 @@ class WebController(BaseController):
             server,
             sleep_per_step = 0.05, 
             camera: Union[BaseCamera, None] = None,
-            sensor: Union[BaseSensor, None] = None
+            sensor: Union[BaseSensor, None] = None,
+            frame_encoding: str = "jpeg",
+            frame_quality: int = 80
             ):
         super(WebController, self).__init__(drive_train)
         self.sleep_per_step_ = sleep_per_step
         self.server_ = server
         self.camera_ = camera
         self.sensor_ = sensor
+        # one of Telemetry.ENCODINGS, raw frames skip the encoding but are 300 kB each.
+        # The server lowers the quality for viewers that can not keep up.
+        self.frame_encoding_ = frame_encoding
+        self.frame_quality_ = frame_quality
+        self.frame_sequence_ = 0
+        # the server's connection count when the last snapshot was sent
+        self.logged_connection_ = 0
         self.go_ = {
             "forward": False,
             "backward": False,
@@ -119,12 +517,21 @@ class WebController(BaseController):
 
     async def drive_(self):
         while True:
+            start = time.perf_counter()
             message: Dict[str, Any] = self.server_.get_message()
             if message:
                 self.go_ = message
                 successful = self.step()
-            await self.server_.send(self.get_log_data())
-            await asyncio.sleep(self.sleep_per_step_)
+            # sending only queues for every viewer, so it takes the same time however many connect.
+            # A viewer that just connected gets a snapshot to start from.
+            snapshot = self.server_.num_connections != self.logged_connection_
+            self.logged_connection_ = self.server_.num_connections
+            await self.server_.send(self.get_log_data(snapshot))
+            frame = self.capture_frame()
+            if frame is not None:
+                # viewers can encode it later, after a ThreadedCamera reused its buffer
+                self.server_.send_frame(frame.copy(), self.frame_sequence_, self.frame_encoding_, self.frame_quality_)
+            await asyncio.sleep(max(self.sleep_per_step_ - (time.perf_counter() - start), 0.0))
 
     def step(self) -> bool:
         #assert sum(self.go_.values()) <= 1, f"{self.go_}"
@@ -143,16 +550,34 @@ class WebController(BaseController):
     def shutdown(self) -> None:
         self.drive_train_.shutdown()
     
-    def get_log_data(self) -> Dict[str, Any]:
-        camera_image = np.zeros((320, 320, 3), dtype=np.uint8)
-        alphas = np.ones((320, 320, 1), dtype=np.uint8) * 255
-        if self.camera_ and self.camera_.is_camera_available():
-            status, camera_image = self.camera_.see()
+    def get_log_data(self, snapshot: bool = False) -> Dict[str, Any]:
+        # Every message holds the readings, a snapshot also holds the state that only
+        # changes when a command arrives, for a viewer that connected after it did.
         obstacle = (-1, -1)
         if self.sensor_:
             obstacle = self.sensor_.get_distance_at(0)
-        return {
+        log_data = {
             "speed": round(self.drive_train_.get_avg_speed, 1),
-            "image": np.concatenate([camera_image, alphas], axis=2).flatten().astype(np.uint8).tolist(),
-            "obstacle": obstacle
-        }
\ No newline at end of file
+            "obstacle": obstacle,
+            # the sequence of the last frame sent, so a dashboard can match the two up
+            "frame": self.frame_sequence_,
+            "snapshot": snapshot
+        }
+        if snapshot:
+            log_data["controls"] = dict(self.go_)
+            log_data["frame_encoding"] = self.frame_encoding_
+            log_data["frame_quality"] = self.frame_quality_
+        return log_data
+
+    def capture_frame(self) -> Union[np.ndarray, None]:
+        """
+            The next camera frame, or None without a camera. Every frame gets the next
+            sequence number.
+        """
+        if not self.camera_ or not self.camera_.is_camera_available():
+            return None
+        status, camera_image = self.camera_.see()
+        if not status:
+            return None
+        self.frame_sequence_ += 1
+        return camera_image
\ No newline at end of file
@@ -0,0 +1,170 @@
+from typing import Dict, Iterable, List, Tuple, Union
+from heapq import heappush, heappop
+
+import numpy as np
+
+from Herbie.CarNav.Mapp import Mapp
+from Herbie.CarNav.Pathfinder import (
+    HEADING_OFFSETS, NUM_HEADINGS, STEP_COSTS, TURN_COSTS, heading_to_bin
+)
+from Herbie.CMath.Api import Position
+
+INFINITY = float("inf")
+
+class DStarLite:
+    """
+        Incremental planner (D* Lite) over the same (x, y, heading) states and costs as
+        Pathfinder.a_star_array. The search runs backward from the target and keeps its
+        g/rhs values between calls, so after the map changes only the states whose cost
+        actually changed are re-expanded.
+    """
+
+    def __init__(self, mapp: Mapp, target: Position) -> None:
+        self.mapp_ = mapp
+        # Pad the grid with a blocked border so neighbors never need a bounds check.
+        self.padded_columns_ = mapp.num_columns + 2
+        self.blocked_: List[bool] = np.pad(
+            mapp.get_blocked_grid(), 1, constant_values=True
+            ).ravel().tolist()
+        self.cell_deltas_ = [dy * self.padded_columns_ + dx for dx, dy in HEADING_OFFSETS]
+        self.target_ = target
+        self.target_cell_ = self.to_cell_(target)
+        self.gscores_: Dict[int, float] = {}
+        self.rhs_: Dict[int, float] = {}
+        # state -> key it was last queued with. Heap entries that no longer match are stale.
+        self.queued_keys_: Dict[int, Tuple[float, float]] = {}
+        self.open_list_: List[Tuple[float, float, int]] = []
+        self.key_modifier_ = 0.0
+        self.start_state_: Union[int, None] = None
+        self.nodes_expanded = 0
+        for heading in range(NUM_HEADINGS):
+            goal_state = self.target_cell_ * NUM_HEADINGS + heading
+            self.rhs_[goal_state] = 0.0
+            self.push_(goal_state, (0.0, 0.0))
+
+    def to_cell_(self, position: Position) -> int:
+        # remember the padding added around the map
+        return (int(position.y) + 1) * self.padded_columns_ + int(position.x) + 1
+
+    def to_position_(self, state: int) -> Position:
+        y, x = divmod(state // NUM_HEADINGS, self.padded_columns_)
+        return Position(x - 1, y - 1)
+
+    def heuristic_(self, state: int) -> float:
+        # Manhattan distance from the start. A diagonal step costs 2, so this never
+        # overestimates and keeps the keys consistent as the start moves.
+        start_y, start_x = divmod(self.start_state_ // NUM_HEADINGS, self.padded_columns_) # type: ignore
+        y, x = divmod(state // NUM_HEADINGS, self.padded_columns_)
+        return abs(x - start_x) + abs(y - start_y)
+
+    def calc_key_(self, state: int) -> Tuple[float, float]:
+        score = min(self.gscores_.get(state, INFINITY), self.rhs_.get(state, INFINITY))
+        return (score + self.heuristic_(state) + self.key_modifier_, score)
+
+    def push_(self, state: int, key: Tuple[float, float]) -> None:
+        self.queued_keys_[state] = key
+        heappush(self.open_list_, (key[0], key[1], state))
+
+    def successors_(self, state: int) -> Iterable[Tuple[int, int]]:
+        cell, heading = divmod(state, NUM_HEADINGS)
+        if self.blocked_[cell]:
+            return
+        turn_costs = TURN_COSTS[heading]
+        for new_heading in range(NUM_HEADINGS):
+            neigh_cell = cell + self.cell_deltas_[new_heading]
+            if not self.blocked_[neigh_cell]:
+                yield (
+                    neigh_cell * NUM_HEADINGS + new_heading,
+                    STEP_COSTS[new_heading] + turn_costs[new_heading]
+                    )
+
+    def predecessors_(self, state: int) -> Iterable[int]:
+        cell, heading = divmod(state, NUM_HEADINGS)
+        prev_cell = cell - self.cell_deltas_[heading]
+        if self.blocked_[cell] or self.blocked_[prev_cell]:
+            return
+        for prev_heading in range(NUM_HEADINGS):
+            yield prev_cell * NUM_HEADINGS + prev_heading
+
+    def update_vertex_(self, state: int) -> None:
+        if state // NUM_HEADINGS != self.target_cell_:
+            self.rhs_[state] = min(
+                (cost + self.gscores_.get(succ, INFINITY) for succ, cost in self.successors_(state)),
+                default=INFINITY
+                )
+        self.queued_keys_.pop(state, None)
+        if self.gscores_.get(state, INFINITY) != self.rhs_.get(state, INFINITY):
+            self.push_(state, self.calc_key_(state))
+
+    def compute_shortest_path_(self) -> None:
+        start = self.start_state_
+        while self.open_list_:
+            k1, k2, state = self.open_list_[0]
+            if self.queued_keys_.get(state, None) != (k1, k2):
+                heappop(self.open_list_)
+                continue
+            start_gscore = self.gscores_.get(start, INFINITY) # type: ignore
+            start_rhs = self.rhs_.get(start, INFINITY) # type: ignore
+            if (k1, k2) >= self.calc_key_(start) and start_rhs == start_gscore: # type: ignore
+                break
+            heappop(self.open_list_)
+            del self.queued_keys_[state]
+            self.nodes_expanded += 1
+            new_key = self.calc_key_(state)
+            gscore = self.gscores_.get(state, INFINITY)
+            rhs = self.rhs_.get(state, INFINITY)
+            if (k1, k2) < new_key:
+                self.push_(state, new_key)
+            elif gscore > rhs:
+                self.gscores_[state] = rhs
+                for pred in self.predecessors_(state):
+                    self.update_vertex_(pred)
+            else:
+                self.gscores_[state] = INFINITY
+                self.update_vertex_(state)
+                for pred in self.predecessors_(state):
+                    self.update_vertex_(pred)
+
+    def update_cells(self, cells: Iterable[Tuple[int, int]]) -> None:
+        """
+            Re-reads the given (x, y) cells from the map and repairs the search state
+            around the ones that changed. It can be called before the first plan.
+        """
+        for x, y in cells:
+            cell = (y + 1) * self.padded_columns_ + x + 1
+            is_blocked = not self.mapp_.is_open(x, y)
+            if self.blocked_[cell] == is_blocked:
+                continue
+            self.blocked_[cell] = is_blocked
+            if self.start_state_ is None:
+                # nothing was searched yet, the first plan starts from the map as it is now
+                continue
+            # Only states in the changed cell and in its neighbors have edges touching it.
+            for neigh_cell in [cell] + [cell + delta for delta in self.cell_deltas_]:
+                for heading in range(NUM_HEADINGS):
+                    self.update_vertex_(neigh_cell * NUM_HEADINGS + heading)
+
+    def plan(self, starting: Position) -> List[Position]:
+        start_state = self.to_cell_(starting) * NUM_HEADINGS + heading_to_bin(starting.angle)
+        if self.start_state_ is not None:
+            self.key_modifier_ += self.heuristic_(start_state)
+        self.start_state_ = start_state
+        self.compute_shortest_path_()
+        return self.find_path_()
+
+    def find_path_(self) -> List[Position]:
+        state = self.start_state_
+        if self.gscores_.get(state, INFINITY) == INFINITY: # type: ignore
+            print(f"Failed to find path to target: {self.target_}")
+            return []
+        path = [self.to_position_(state)] # type: ignore
+        # every step strictly lowers g so the walk can be no longer than the map
+        for _ in range(len(self.blocked_)):
+            if state // NUM_HEADINGS == self.target_cell_: # type: ignore
+                return path
+            state = min(
+                self.successors_(state), # type: ignore
+                key=lambda succ_cost : succ_cost[1] + self.gscores_.get(succ_cost[0], INFINITY)
+                )[0]
+            path.append(self.to_position_(state))
+        return path
@@ -1,17 +1,29 @@
 from Herbie.Hardware.Base import BaseCamera
+from Herbie.Hardware.Camera import ThreadedCamera
 from Herbie.CarNav.Base import BaseDetector, DetectionResult, DetectedObject
-from typing import Iterable, NamedTuple, List, Union
+from Herbie.CarNav.Runtime import Stage, StageMetrics
+from typing import Deque, Dict, Iterable, NamedTuple, List, Union
+from collections import Counter, deque
 from dataclasses import dataclass
 import time
 
+import cv2
+import numpy as np
+
 
 class TFDetector(BaseDetector):
-    def __init__(self, camera: BaseCamera,  model_path: str = "./Models/lite0_int8_model.tflite"):
+    def __init__(
+            self,
+            camera: BaseCamera,
+            model_path: str = "./Models/lite0_int8_model.tflite",
+            num_threads: int = 2
+            ):
         from tflite_support.task import core, processor, vision
 
         self.camera_ = camera
+        self.vision_ = vision
         base_options = core.BaseOptions(
-            file_name=model_path, num_threads=2
+            file_name=model_path, num_threads=num_threads
         )
         detection_options = processor.DetectionOptions(
             max_results=3, score_threshold=0.3
@@ -20,15 +32,21 @@ class TFDetector(BaseDetector):
             base_options=base_options, detection_options=detection_options
         )
         self.detector_ = vision.ObjectDetector.create_from_options(options)
+        # reused for every frame so flipping does not allocate
+        self.flipped_: Union[np.ndarray, None] = None
 
     def detect(self) -> DetectionResult:
         if not self.camera_.is_camera_available():
             print("Failed to setup camera")
             return DetectionResult(False, [])
-        image = self.camera_.see()
-        image = cv2.flip(image, 1) # type: ignore
-        rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB) # type: ignore
-        input_tensor = vision.TensorImage.create_from_array(rgb_image)
+        status, image = self.camera_.see()
+        if not status:
+            return DetectionResult(False, [])
+        if self.flipped_ is None or self.flipped_.shape != image.shape:
+            self.flipped_ = np.empty(image.shape, dtype=np.uint8)
+        # the camera already gives RGB images, which is what the model takes
+        cv2.flip(image, 1, dst=self.flipped_) # type: ignore
+        input_tensor = self.vision_.TensorImage.create_from_array(self.flipped_)
         detection_result = self.detector_.detect(input_tensor)
         object_list = []
         if detection_result:
@@ -36,7 +54,103 @@ class TFDetector(BaseDetector):
                 for category in detection.categories:
                     object_list.append(DetectedObject(category.score, category.category_name))
         return DetectionResult(True, object_list)
-    
+
+    def shutdown(self) -> None:
+        self.camera_.shutdown()
+
+
+class DetectorService(BaseDetector):
+    """
+        Runs a detector on its own thread and votes over its last window results, so
+        reading what was seen never waits on inference. An object is seen when at
+        least min_votes of the results in the window scored it above score_threshold.
+        With a ThreadedCamera the detector runs once per new frame and the camera keeps
+        capturing during inference. Without a camera it runs at most once every period
+        seconds instead of back to back. Results older than max_age seconds, because 
+        the detector or the camera stopped, count as nothing seen.
+    """
+    # seconds to wait for a new frame before checking whether to stop
+    FRAME_TIMEOUT = 0.1
+
+    def __init__(
+            self,
+            detector: BaseDetector,
+            camera: Union[ThreadedCamera, None] = None,
+            window: int = 3,
+            min_votes: int = 2,
+            score_threshold: float = BaseDetector.SCORE_THRESHOLD,
+            max_age: float = 1.0,
+            period: float = 0.05
+            ) -> None:
+        self.detector_ = detector
+        self.camera_ = camera
+        self.min_votes_ = min_votes
+        self.score_threshold_ = score_threshold
+        self.max_age_ = max_age
+        self.period_ = period
+        # perf_counter time the next detection without a camera may start at
+        self.next_detection_ = 0.0
+        self.results_: Deque[DetectionResult] = deque(maxlen=window)
+        self.frame_sequence_ = 0
+        # replaced whole after every result so readers never see one half updated
+        self.latest_ = DetectionResult(False, [])
+        self.votes_: Dict[str, int] = {}
+        self.updated_ = 0.0
+        self.stage_ = Stage("detector_service", self.detect_once_, idle_sleep=0.001)
+        self.stage_.start()
+
+    @property
+    def metrics(self) -> StageMetrics:
+        return self.stage_.metrics
+
+    @property
+    def error(self) -> Union[BaseException, None]:
+        return self.stage_.error
+
+    def detect_once_(self) -> bool:
+        if self.camera_ is not None:
+            frame = self.camera_.wait_newer(self.frame_sequence_, self.FRAME_TIMEOUT)
+            if frame is None or frame.sequence == self.frame_sequence_:
+                return False
+            self.frame_sequence_ = frame.sequence
+        else:
+            wait = self.next_detection_ - time.perf_counter()
+            if wait > 0:
+                # short enough that stopping the stage is not held up
+                time.sleep(min(wait, self.FRAME_TIMEOUT))
+                return False
+            self.next_detection_ = time.perf_counter() + self.period_
+        result = self.detector_.detect()
+        self.results_.append(result)
+        votes: Counter = Counter()
+        for window_result in self.results_:
+            votes.update({
+                obj.name for obj in window_result.object_list if obj.score > self.score_threshold_
+            })
+        self.latest_, self.votes_, self.updated_ = result, dict(votes), time.perf_counter()
+        return True
+
+    def is_fresh_(self) -> bool:
+        return time.perf_counter() - self.updated_ <= self.max_age_
+
+    def detect(self) -> DetectionResult:
+        # the newest result, it does not run the detector
+        if not self.is_fresh_():
+            return DetectionResult(False, [])
+        return self.latest_
+
+    def votes(self, name: str) -> int:
+        if not self.is_fresh_():
+            return 0
+        return self.votes_.get(name, 0)
+
+    def is_seen(self, name: str) -> bool:
+        return self.votes(name) >= self.min_votes_
+
+    def shutdown(self) -> None:
+        self.stage_.stop(timeout=1.0)
+        self.detector_.shutdown()
+
 def test_detection_fps(
     total_test_time: float,
     model_path="./Models/lite0_int8_model.tflite",
@@ -1,16 +1,21 @@
-from typing import List, Tuple, Union, Iterable, Generator
+from typing import Dict, List, Tuple, Union, Iterable, Generator
+import math as py_math
 import numpy as np
+import cv2
 from Herbie.CMath.Api import Math, Position
 
 class Mapp:
     OBSTACLE_NOTFOUND = -1
     OBSTACLE_ID = 1
+    # the change log keeps at most this many cells, older ones are dropped
+    MAX_CHANGE_LOG = 4096
 
     def __init__(
             self, 
             num_rows: int, 
             num_columns: int, 
-            cell_size_in_cm: int
+            cell_size_in_cm: int,
+            inflation_radius_in_cm: float = 0.0
             ) -> None:
         
         self.num_columns = num_columns
@@ -18,6 +23,25 @@ class Mapp:
         self.cell_size_in_cm = cell_size_in_cm
         # row = y and column = x
         self._map = np.zeros((self.num_rows, self.num_columns), dtype=np.uint8)
+        # every (x, y) cell whose state changed, in the order it changed
+        self.changed_cells_: List[Tuple[int, int]] = []
+        # change index of changed_cells_[0], the cells before it were dropped
+        self.changes_start_ = 0
+        # Cells closer than inflation_radius to an obstacle are too close for the car.
+        # clearance_ caches the distance in cells from every cell to its nearest obstacle, 
+        # capped at inflation_radius + 1, and is only updated around cells that change.
+        self.inflation_radius = py_math.ceil(inflation_radius_in_cm / cell_size_in_cm)
+        self.clearance_ = np.full(
+            (self.num_rows, self.num_columns), self.inflation_radius + 1, dtype=np.float32
+            )
+        # the (dx, dy) offsets within inflation_radius of a cell and their distances
+        radius = self.inflation_radius
+        offset_dys, offset_dxs = np.mgrid[-radius:radius + 1, -radius:radius + 1]
+        offset_distances = np.hypot(offset_dxs, offset_dys)
+        within = offset_distances <= radius
+        self.inflation_dxs_ = offset_dxs[within]
+        self.inflation_dys_ = offset_dys[within]
+        self.inflation_distances_ = offset_distances[within]
 
     def is_inbounds(self, x: int, y: int) -> bool:
         if x < 0 or x >= self.num_columns:
@@ -28,7 +52,64 @@ class Mapp:
     
     def is_open(self, x: int, y: int) -> bool:
         return self._map[y, x] != Mapp.OBSTACLE_ID
+
+    def get_blocked_grid(self) -> np.ndarray:
+        # row = y and column = x. True where the planner can NOT drive.
+        return self._map == Mapp.OBSTACLE_ID
     
+    def get_clearance_grid(self) -> np.ndarray:
+        return self.clearance_
+
+    def get_inflated_blocked_grid(self) -> np.ndarray:
+        # True where the car's body would touch an obstacle
+        return self.clearance_ <= self.inflation_radius
+
+    def get_inflation_cost_grid(self, cost_per_cell: int = 4) -> np.ndarray:
+        # 0 for cells outside the inflation radius, growing by cost_per_cell per cell closer to an obstacle
+        costs = np.ceil(self.inflation_radius + 1 - self.clearance_).astype(np.int32) * cost_per_cell
+        costs[~self.get_inflated_blocked_grid()] = 0
+        return costs
+
+    def record_changes_(self, changed_cells: List[Tuple[int, int]]) -> None:
+        if not changed_cells:
+            return
+        self.changed_cells_.extend(changed_cells)
+        if len(self.changed_cells_) > self.MAX_CHANGE_LOG:
+            # keep the newest half so the log is not compacted again on every change
+            num_dropped = len(self.changed_cells_) - self.MAX_CHANGE_LOG // 2
+            del self.changed_cells_[:num_dropped]
+            self.changes_start_ += num_dropped
+        if self.inflation_radius > 0:
+            changed = np.array(changed_cells, dtype=np.int64).reshape(-1, 2)
+            self.update_clearance_(changed[:, 0], changed[:, 1])
+
+    def update_clearance_(self, xs: np.ndarray, ys: np.ndarray) -> None:
+        """
+            Recomputes the clearance of every cell within inflation_radius of the 
+            changed (xs, ys) cells, which is every cell they can affect. Works for cells 
+            that were cleared as well as added. Only those cells are visited, so hits 
+            on opposite sides of the car cost no more than hits next to each other.
+        """
+        dxs, dys, distances = self.inflation_dxs_, self.inflation_dys_, self.inflation_distances_
+        # row = y and column = x
+        affected_xs, affected_ys = (xs[:, None] + dxs).ravel(), (ys[:, None] + dys).ravel()
+        inbounds = (
+            (affected_xs >= 0) & (affected_xs < self.num_columns) 
+            & (affected_ys >= 0) & (affected_ys < self.num_rows)
+            )
+        affected = np.unique(affected_ys[inbounds] * self.num_columns + affected_xs[inbounds])
+        affected_ys, affected_xs = np.divmod(affected, self.num_columns)
+        # every affected cell against every offset at once, obstacles past the edge do not count
+        neigh_xs, neigh_ys = affected_xs[:, None] + dxs, affected_ys[:, None] + dys
+        inbounds = (
+            (neigh_xs >= 0) & (neigh_xs < self.num_columns) 
+            & (neigh_ys >= 0) & (neigh_ys < self.num_rows)
+            )
+        is_obstacle = np.zeros(neigh_xs.shape, dtype=np.bool_)
+        is_obstacle[inbounds] = self._map[neigh_ys[inbounds], neigh_xs[inbounds]] == Mapp.OBSTACLE_ID
+        clearance = np.where(is_obstacle, distances, self.inflation_radius + 1).min(axis=1)
+        self.clearance_[affected_ys, affected_xs] = clearance
+
     def get_open_neighbors(self, x, y) -> Iterable[Position]:
         offsets: List[Tuple[int, int]] = [
             (x + 1, y), 
@@ -77,6 +158,7 @@ class Mapp:
         # row = y and column = x
         if self.is_inbounds(x, y) and self.is_open(x, y):
             self._map[y, x] = Mapp.OBSTACLE_ID
+            self.record_changes_([(x, y)])
             return True
         return False
 
@@ -86,10 +168,54 @@ class Mapp:
             angles_distances: list[tuple[float, float]]
             ) -> bool:
         
-        found_new_obstacle = False
-        for ang_dist in angles_distances:
-            found_new_obstacle |= self.add_obstacle(car_position, ang_dist)
+        found_new_obstacle, _ = self.add_obstacles_array(
+            car_position, np.asarray(angles_distances, dtype=np.float64)
+            )
         return found_new_obstacle
+
+    def get_obstacle_idxs(
+            self, 
+            car_position: Position, 
+            angles_distances: np.ndarray
+            ) -> np.ndarray:
+        """
+            Batched get_obstacle_idx. Takes an (N, 2) array of (angle, distance) readings
+            and returns an (M, 2) int array of the rounded (x, y) cells for every reading
+            where an object was found.
+        """
+        readings = angles_distances.reshape(-1, 2)
+        readings = readings[readings[:, 1] != Mapp.OBSTACLE_NOTFOUND]
+        xs, ys = Math.project_xy_batch(
+            car_position.x, 
+            car_position.y, 
+            car_position.angle + readings[:, 0], 
+            readings[:, 1] / float(self.cell_size_in_cm),
+            flip_y = True
+            )
+        # np.rint rounds half to even just like the round() used by Position.xy_round
+        return np.stack([np.rint(xs), np.rint(ys)], axis=1).astype(np.int64)
+
+    def add_obstacles_array(
+            self, 
+            car_position: Position, 
+            angles_distances: np.ndarray
+            ) -> Tuple[bool, np.ndarray]:
+        """
+            Projects, bounds checks and deduplicates an (N, 2) array of (angle, distance)
+            readings in one pass and marks them with a single assignment. Returns whether
+            a new obstacle was found and the (K, 2) array of (x, y) cells that changed.
+        """
+        obstacle_xys = self.get_obstacle_idxs(car_position, angles_distances)
+        xs, ys = obstacle_xys[:, 0], obstacle_xys[:, 1]
+        inbounds = (xs >= 0) & (xs < self.num_columns) & (ys >= 0) & (ys < self.num_rows)
+        # row = y and column = x
+        flat_idxs = np.unique(ys[inbounds] * self.num_columns + xs[inbounds])
+        flat_idxs = flat_idxs[self._map.ravel()[flat_idxs] != Mapp.OBSTACLE_ID]
+        ys, xs = np.divmod(flat_idxs, self.num_columns)
+        self._map[ys, xs] = Mapp.OBSTACLE_ID
+        changed = np.stack([xs, ys], axis=1)
+        self.record_changes_(list(map(tuple, changed.tolist())))
+        return len(changed) > 0, changed
     
     def add_obstacles_xy(self, obstacle_xys: list[tuple[int, int]]) -> bool:     
         added_obstacle = False
@@ -97,10 +223,360 @@ class Mapp:
             added_obstacle |= self.add_obstacle_xy(xy)
         return added_obstacle
     
+    def can_replay_changes_since(self, change_idx: int) -> bool:
+        # False once the cells changed after change_idx were dropped from the log
+        return change_idx >= self.changes_start_
+
+    def get_changes_since(self, change_idx: int) -> Tuple[List[Tuple[int, int]], int]:
+        """
+            Returns the cells that changed after change_idx and the index to pass on the
+            next call, so each consumer can keep its own cursor into the change log. A 
+            consumer that can_replay_changes_since no longer allows has to re-read the 
+            whole map instead.
+        """
+        assert self.can_replay_changes_since(change_idx), f"changes before {self.changes_start_} were dropped"
+        end_idx = self.changes_start_ + len(self.changed_cells_)
+        return self.changed_cells_[change_idx - self.changes_start_:], end_idx
+
+    def get_change_idx(self) -> int:
+        # the index a consumer that just read the whole map continues from
+        return self.changes_start_ + len(self.changed_cells_)
+
+    def get_obstacles(self) -> list[tuple[int, int]]:
+        # row = y and column = x
+        ys, xs = np.nonzero(self._map == Mapp.OBSTACLE_ID)
+        return list(zip(xs.tolist(), ys.tolist()))
+
+    def get_obstacle_changes_since(
+            self, change_idx: int
+            ) -> Tuple[List[Tuple[int, int]], List[Tuple[int, int]], int]:
+        """
+            Returns the cells that became obstacles and the cells that were cleared after 
+            change_idx, plus the index to pass on the next call. Costs O(changes) instead 
+            of O(rows * columns) like get_obstacles.
+        """
+        changed_cells, change_idx = self.get_changes_since(change_idx)
+        # a cell can change more than once, only its current state matters
+        changed_cells = list(dict.fromkeys(changed_cells))
+        added = [(x, y) for x, y in changed_cells if not self.is_open(x, y)]
+        cleared = [(x, y) for x, y in changed_cells if self.is_open(x, y)]
+        return added, cleared, change_idx
+
+class OccupancyMapp(Mapp):
+    """
+        Probabilistic version of Mapp. Every cell holds the log-odds that it is occupied.
+        Each reading lowers the odds of the cells its beam passed through and raises the 
+        odds of the cell it hit, so a spurious echo is cleared again by later scans. 
+        _map holds the thresholded view so the planners and is_open work unchanged.
+    """
+    def __init__(
+            self, 
+            num_rows: int, 
+            num_columns: int, 
+            cell_size_in_cm: int,
+            log_odds_hit: float = 0.85,
+            log_odds_miss: float = -0.4,
+            log_odds_min: float = -2.0,
+            log_odds_max: float = 3.5,
+            occupied_threshold: float = 0.0,
+            max_range_in_cm: float = 400,
+            inflation_radius_in_cm: float = 0.0
+            ) -> None:
+        super(OccupancyMapp, self).__init__(
+            num_rows, num_columns, cell_size_in_cm, inflation_radius_in_cm
+            )
+        self.log_odds_hit = log_odds_hit
+        self.log_odds_miss = log_odds_miss
+        self.log_odds_min = log_odds_min
+        self.log_odds_max = log_odds_max
+        self.occupied_threshold = occupied_threshold
+        self.max_range_in_cm = max_range_in_cm
+        self.log_odds_ = np.zeros((self.num_rows, self.num_columns), dtype=np.float32)
+
+    def add_obstacle(
+            self, 
+            car_position: Position, 
+            angle_and_distance: tuple[float, float]
+            ) -> bool:
+        
+        found_new_obstacle, _ = self.add_obstacles_array(
+            car_position, np.asarray(angle_and_distance, dtype=np.float64)
+            )
+        return found_new_obstacle
+
+    def add_obstacle_xy(self, obstacle_xy: tuple[int, int]) -> bool:
+        x, y = obstacle_xy
+        if self.is_inbounds(x, y):
+            self.log_odds_[y, x] = self.log_odds_max
+        return super(OccupancyMapp, self).add_obstacle_xy(obstacle_xy)
+
+    def cast_rays(
+            self, 
+            car_position: Position, 
+            angles_distances: np.ndarray
+            ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+            DDA line from the car to the end of every beam at once. Returns the flat 
+            indices of the cells the beams passed through and of the cells they hit.
+            Readings at or past the sensor's range only clear cells.
+        """
+        readings = angles_distances.reshape(-1, 2)
+        readings = readings[readings[:, 1] != Mapp.OBSTACLE_NOTFOUND]
+        if len(readings) == 0:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty
+        is_hit = readings[:, 1] < self.max_range_in_cm
+        end_xs, end_ys = Math.project_xy_batch(
+            car_position.x, 
+            car_position.y, 
+            car_position.angle + readings[:, 0], 
+            np.minimum(readings[:, 1], self.max_range_in_cm) / float(self.cell_size_in_cm),
+            flip_y = True
+            )
+        start_x, start_y = round(car_position.x), round(car_position.y)
+        end_xs, end_ys = np.rint(end_xs), np.rint(end_ys)
+        dxs, dys = end_xs - start_x, end_ys - start_y
+        # one step per cell along the major axis, the end cell is excluded
+        num_steps = np.maximum(np.abs(dxs), np.abs(dys)).astype(np.int64)
+        steps = np.arange(max(int(num_steps.max()), 1))
+        along_beam = steps[None, :] < num_steps[:, None]
+        ts = steps[None, :] / np.maximum(num_steps, 1)[:, None]
+        free_xs = np.rint(start_x + ts * dxs[:, None])[along_beam].astype(np.int64)
+        free_ys = np.rint(start_y + ts * dys[:, None])[along_beam].astype(np.int64)
+        hit_xs, hit_ys = end_xs[is_hit].astype(np.int64), end_ys[is_hit].astype(np.int64)
+        return self.to_flat_idxs_(free_xs, free_ys), self.to_flat_idxs_(hit_xs, hit_ys)
+
+    def to_flat_idxs_(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        inbounds = (xs >= 0) & (xs < self.num_columns) & (ys >= 0) & (ys < self.num_rows)
+        # row = y and column = x
+        return np.unique(ys[inbounds] * self.num_columns + xs[inbounds])
+
+    def add_obstacles_array(
+            self, 
+            car_position: Position, 
+            angles_distances: np.ndarray
+            ) -> Tuple[bool, np.ndarray]:
+        """
+            Applies one log-odds update for a whole scan. Returns whether the thresholded
+            map changed and the (K, 2) array of (x, y) cells that became blocked or open.
+        """
+        free_idxs, hit_idxs = self.cast_rays(car_position, angles_distances)
+        # a beam passing through a cell another beam hit in the same scan does not clear it
+        free_idxs = np.setdiff1d(free_idxs, hit_idxs, assume_unique=True)
+        log_odds = self.log_odds_.ravel()
+        log_odds[free_idxs] += self.log_odds_miss
+        log_odds[hit_idxs] += self.log_odds_hit
+        touched = np.concatenate([free_idxs, hit_idxs])
+        log_odds[touched] = np.clip(log_odds[touched], self.log_odds_min, self.log_odds_max)
+
+        # only cells whose thresholded state flipped are written back to the map
+        cells = self._map.ravel()
+        is_blocked = log_odds[touched] > self.occupied_threshold
+        flipped = is_blocked != (cells[touched] == Mapp.OBSTACLE_ID)
+        touched, is_blocked = touched[flipped], is_blocked[flipped]
+        cells[touched] = np.where(is_blocked, Mapp.OBSTACLE_ID, 0)
+        ys, xs = np.divmod(touched, self.num_columns)
+        changed = np.stack([xs, ys], axis=1)
+        self.record_changes_(list(map(tuple, changed.tolist())))
+        return len(changed) > 0, changed
+
+
+class TiledMapp(Mapp):
+    """
+        Mapp for large areas. Cells are stored in tile_size x tile_size tiles that are only
+        allocated once an obstacle lands in them, so memory grows with the explored area
+        instead of num_rows * num_columns. Every tile also counts its obstacles, which is
+        the coarse level Pathfinder.hierarchical_a_star plans over. Obstacle inflation is
+        not supported, the inflation methods answer like a Mapp with no inflation radius.
+    """
+    def __init__(
+            self, 
+            num_rows: int, 
+            num_columns: int, 
+            cell_size_in_cm: int,
+            tile_size: int = 32
+            ) -> None:
+        # The dense grids Mapp.__init__ allocates are exactly what this class avoids, 
+        # so only the attributes the shared methods rely on are set up here.
+        self.num_columns = num_columns
+        self.num_rows = num_rows
+        self.cell_size_in_cm = cell_size_in_cm
+        self.tile_size = tile_size
+        self.num_tile_columns = -(-num_columns // tile_size)
+        self.num_tile_rows = -(-num_rows // tile_size)
+        self.changed_cells_: List[Tuple[int, int]] = []
+        self.changes_start_ = 0
+        self.inflation_radius = 0
+        # (tile_x, tile_y) -> tile, row = y and column = x
+        self.tiles_: Dict[Tuple[int, int], np.ndarray] = {}
+        self.tile_obstacle_counts_: Dict[Tuple[int, int], int] = {}
+        # Coarse level caches, dropped for a tile whenever it changes. Every tile is split 
+        # into its connected open regions (labels, -1 = blocked) and two neighboring tiles 
+        # are connected through the (label, neighbor label) pairs that touch across their border.
+        self.tile_labels_: Dict[Tuple[int, int], np.ndarray] = {}
+        self.tile_connections_: Dict[Tuple[Tuple[int, int], Tuple[int, int]], List[Tuple[int, int]]] = {}
+        self.empty_tile_labels_ = np.zeros((tile_size, tile_size), dtype=np.int16)
+
+    def get_tile_(self, tile_x: int, tile_y: int) -> np.ndarray:
+        tile = self.tiles_.get((tile_x, tile_y), None)
+        if tile is None:
+            tile = np.zeros((self.tile_size, self.tile_size), dtype=np.uint8)
+            self.tiles_[(tile_x, tile_y)] = tile
+            self.tile_obstacle_counts_[(tile_x, tile_y)] = 0
+        return tile
+
+    def is_open(self, x: int, y: int) -> bool:
+        tile = self.tiles_.get((x // self.tile_size, y // self.tile_size), None)
+        return tile is None or tile[y % self.tile_size, x % self.tile_size] != Mapp.OBSTACLE_ID
+
+    def get_allocated_bytes(self) -> int:
+        return sum(tile.nbytes for tile in self.tiles_.values())
+
+    def get_tile_blocked_fraction(self, tile_x: int, tile_y: int) -> float:
+        return self.tile_obstacle_counts_.get((tile_x, tile_y), 0) / float(self.tile_size * self.tile_size)
+
+    def add_obstacle_xy(self, obstacle_xy: tuple[int, int]) -> bool:
+        x, y = obstacle_xy
+        if not self.is_inbounds(x, y) or not self.is_open(x, y):
+            return False
+        tile_x, tile_y = x // self.tile_size, y // self.tile_size
+        self.get_tile_(tile_x, tile_y)[y % self.tile_size, x % self.tile_size] = Mapp.OBSTACLE_ID
+        self.tile_obstacle_counts_[(tile_x, tile_y)] += 1
+        self.tile_labels_.pop((tile_x, tile_y), None)
+        for dy in (-1, 0, 1):
+            for dx in (-1, 0, 1):
+                neigh = (tile_x + dx, tile_y + dy)
+                self.tile_connections_.pop(((tile_x, tile_y), neigh), None)
+                self.tile_connections_.pop((neigh, (tile_x, tile_y)), None)
+        self.record_changes_([(x, y)])
+        return True
+
+    def is_empty_tile_(self, tile_x: int, tile_y: int) -> bool:
+        # unallocated and fully inside the map, so every cell is open and connected
+        return (
+            (tile_x, tile_y) not in self.tiles_ 
+            and (tile_x + 1) * self.tile_size <= self.num_columns 
+            and (tile_y + 1) * self.tile_size <= self.num_rows
+            )
+
+    def get_tile_labels(self, tile_x: int, tile_y: int) -> np.ndarray:
+        """
+            Labels every cell of the tile with the 8-connected open region it belongs to, 
+            -1 for obstacles and cells past the edge of the map.
+        """
+        labels = self.tile_labels_.get((tile_x, tile_y), None)
+        if labels is not None:
+            return labels
+        if self.is_empty_tile_(tile_x, tile_y):
+            return self.empty_tile_labels_
+        size = self.tile_size
+        min_x, min_y = tile_x * size, tile_y * size
+        blocked = self.get_blocked_window(min_x, min_y, min_x + size - 1, min_y + size - 1)
+        _, labels = cv2.connectedComponents((~blocked).astype(np.uint8), connectivity=8) # type: ignore
+        # connectedComponents labels the blocked cells 0 and the open regions 1, 2, ...
+        labels = labels.astype(np.int16) - 1
+        self.tile_labels_[(tile_x, tile_y)] = labels
+        return labels
+
+    def get_tile_connections(
+            self, tile: Tuple[int, int], neigh_tile: Tuple[int, int]
+            ) -> List[Tuple[int, int]]:
+        """
+            The (region in tile, region in neigh_tile) pairs a car can drive between.
+            neigh_tile has to be one of the 8 tiles around tile.
+        """
+        connections = self.tile_connections_.get((tile, neigh_tile), None)
+        if connections is not None:
+            return connections
+        if self.is_empty_tile_(*tile) and self.is_empty_tile_(*neigh_tile):
+            return [(0, 0)]
+        labels = self.get_tile_labels(*tile)
+        neigh_labels = self.get_tile_labels(*neigh_tile)
+        dx, dy = neigh_tile[0] - tile[0], neigh_tile[1] - tile[1]
+        pairs = set()
+        if dx != 0 and dy != 0:
+            # diagonal neighbors only touch at their corners
+            corner = int(labels[-1 if dy == 1 else 0, -1 if dx == 1 else 0])
+            neigh_corner = int(neigh_labels[0 if dy == 1 else -1, 0 if dx == 1 else -1])
+            if corner >= 0 and neigh_corner >= 0:
+                pairs.add((corner, neigh_corner))
+        else:
+            # the rows or columns of cells that face each other across the shared border
+            if dx != 0:
+                edge, neigh_edge = labels[:, -1 if dx == 1 else 0], neigh_labels[:, 0 if dx == 1 else -1]
+            else:
+                edge, neigh_edge = labels[-1 if dy == 1 else 0, :], neigh_labels[0 if dy == 1 else -1, :]
+            # cells facing each other or one cell apart diagonally are connected
+            for shift in [-1, 0, 1]:
+                shifted = np.roll(neigh_edge, shift)
+                touching = (edge >= 0) & (shifted >= 0)
+                # np.roll wraps around, the cell that wrapped is not a neighbor
+                if shift == 1:
+                    touching[0] = False
+                elif shift == -1:
+                    touching[-1] = False
+                pairs.update(zip(edge[touching].tolist(), shifted[touching].tolist()))
+        connections = sorted(pairs)
+        self.tile_connections_[(tile, neigh_tile)] = connections
+        return connections
+
+    def add_obstacles_array(
+            self, 
+            car_position: Position, 
+            angles_distances: np.ndarray
+            ) -> Tuple[bool, np.ndarray]:
+        
+        obstacle_xys = self.get_obstacle_idxs(car_position, angles_distances)
+        # only a scan's worth of cells so adding them one at a time is cheap
+        changed = [
+            (x, y) for x, y in dict.fromkeys(map(tuple, obstacle_xys.tolist())) 
+            if self.add_obstacle_xy((x, y))
+        ]
+        return len(changed) > 0, np.array(changed, dtype=np.int64).reshape(-1, 2)
+
+    def get_blocked_window(
+            self, min_x: int, min_y: int, max_x: int, max_y: int
+            ) -> np.ndarray:
+        """
+            Dense blocked grid for the cells (min_x, min_y) - (max_x, max_y) inclusive. 
+            Cells outside the map are blocked.
+        """
+        window = np.ones((max_y - min_y + 1, max_x - min_x + 1), dtype=np.bool_)
+        x0, y0 = max(min_x, 0), max(min_y, 0)
+        x1, y1 = min(max_x, self.num_columns - 1), min(max_y, self.num_rows - 1)
+        if x0 > x1 or y0 > y1:
+            return window
+        window[y0 - min_y:y1 - min_y + 1, x0 - min_x:x1 - min_x + 1] = False
+        size = self.tile_size
+        for tile_y in range(y0 // size, y1 // size + 1):
+            for tile_x in range(x0 // size, x1 // size + 1):
+                tile = self.tiles_.get((tile_x, tile_y), None)
+                if tile is None:
+                    continue
+                # overlap of the tile and the window in map coordinates
+                tx0, ty0 = max(tile_x * size, x0), max(tile_y * size, y0)
+                tx1, ty1 = min(tile_x * size + size - 1, x1), min(tile_y * size + size - 1, y1)
+                window[ty0 - min_y:ty1 - min_y + 1, tx0 - min_x:tx1 - min_x + 1] = (
+                    tile[ty0 - tile_y * size:ty1 - tile_y * size + 1, tx0 - tile_x * size:tx1 - tile_x * size + 1] == Mapp.OBSTACLE_ID
+                    )
+        return window
+
+    def get_clearance_grid(self) -> np.ndarray:
+        return np.full((self.num_rows, self.num_columns), self.inflation_radius + 1, dtype=np.float32)
+
+    def get_inflated_blocked_grid(self) -> np.ndarray:
+        return np.zeros((self.num_rows, self.num_columns), dtype=np.bool_)
+
+    def get_inflation_cost_grid(self, cost_per_cell: int = 4) -> np.ndarray:
+        return np.zeros((self.num_rows, self.num_columns), dtype=np.int32)
+
+    def get_blocked_grid(self) -> np.ndarray:
+        # Allocates the whole map, prefer get_blocked_window.
+        return self.get_blocked_window(0, 0, self.num_columns - 1, self.num_rows - 1)
+
     def get_obstacles(self) -> list[tuple[int, int]]:
         obstacles = []
-        for y in range(self.num_rows):
-            for x in range(self.num_columns):
-                if not self.is_open(x, y):
-                    obstacles.append((x, y))
-        return obstacles
\ No newline at end of file
+        for (tile_x, tile_y), tile in self.tiles_.items():
+            ys, xs = np.nonzero(tile == Mapp.OBSTACLE_ID)
+            obstacles.extend(zip((xs + tile_x * self.tile_size).tolist(), (ys + tile_y * self.tile_size).tolist()))
+        return obstacles
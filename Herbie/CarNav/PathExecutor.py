@@ -0,0 +1,45 @@
+from typing import Iterable, List, NamedTuple
+import math as py_math
+
+from Herbie.CMath.Api import Position, GridMotion
+
+class MotionSegment(NamedTuple):
+    # turn to make in place before driving the segment
+    turning_angle: int
+    # heading of the car along the segment
+    heading: int
+    cells: List[Position]
+    # distance to each cell from the one before it
+    centimeters: List[float]
+
+    @property
+    def length(self) -> float:
+        return sum(self.centimeters)
+
+
+class PathExecutor:
+    @staticmethod
+    def plan_segments(
+            starting: Position, path: Iterable[Position], cell_size_in_cm: float
+            ) -> List[MotionSegment]:
+        """
+            Splits a path of neighboring cells into straight runs. The car drives
+            each run as one motion without stopping between its cells. Every run
+            starts with a turn in place, even a 45 degree one: an arc that leaves
+            along the current heading can not end on a diagonal neighbor facing
+            along the diagonal.
+        """
+        segments: List[MotionSegment] = []
+        current = starting
+        for cell in path:
+            dx, dy = cell.x - current.x, cell.y - current.y
+            centimeters = py_math.hypot(dx, dy) * cell_size_in_cm
+            turning_angle = GridMotion.turning_angle(current.angle, dx, dy)
+            heading = GridMotion.new_heading(current.angle, dx, dy)
+            if segments and turning_angle == 0:
+                segments[-1].cells.append(cell)
+                segments[-1].centimeters.append(centimeters)
+            else:
+                segments.append(MotionSegment(turning_angle, heading, [cell], [centimeters]))
+            current = Position(cell.x, cell.y, heading)
+        return segments
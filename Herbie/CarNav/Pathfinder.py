@@ -1,14 +1,29 @@
-from typing import Union, List, Tuple
+from typing import Dict, Union, List, Tuple
 from heapq import heapify, heappush, heappop
+import math as py_math
+import numpy as np
 
-from Herbie.CarNav.Mapp import Mapp
-from Herbie.CMath.Api import Math, Position
+from Herbie.CarNav.Mapp import Mapp, TiledMapp
+from Herbie.CMath.Api import Math, Position, PositionArray
+from Herbie.CMath.GridMotion import (
+    GridMotion, HEADING_OFFSETS, NUM_HEADINGS, OFFSET_BINS, STEP_COSTS, TURN_COSTS, NEIGHBOR_ORDER, heading_to_bin
+)
 
 class Pathfinder:
+    INFLATION_NONE = 0
+    INFLATION_COST = 1
+    INFLATION_HARD = 2
+    # how many tiles of the coarse path hierarchical_a_star refines per a_star_grid call
+    TILES_PER_CHUNK = 4
+    # Every search adds the nodes it expanded, set it to 0 before a search to count
+    # only that one. Benchmarks use it to compare how much work each engine does.
+    nodes_expanded = 0
+    # searches find_path can select, all of them take (mapp, starting, target, max_steps)
+    METHODS = ("a_star", "a_star_array", "jump_point_search", "bidirectional_a_star")
 
     @staticmethod
     def a_star(
-            mapp: Mapp, starting: Position, target: Position
+            mapp: Mapp, starting: Position, target: Position, max_steps: int = 1_000
             ) -> List[Position]:
         
         num_rows = mapp.num_rows
@@ -39,11 +54,9 @@ class Pathfinder:
                     ) -> "Node":             
                 # current_node is the node we are coming from and self is the node
                 # we are potentially moving to.
-                self.angle_score = abs(Math.calc_turning_angle(
-                    Position(current_node.x, current_node.y, current_node.heading),
-                    Position(self.x, self.y),
-                    should_round = True
-                    )) / 45
+                self.angle_score = GridMotion.turn_cost(
+                    current_node.heading, self.x - current_node.x, self.y - current_node.y
+                    )
                 self.hscore = self.get_distance(target_node)
                 self.gscore = current_node.gscore + self.get_distance(current_node) + self.angle_score
                 self.fscore = self.gscore + self.hscore #+ self.angle_score
@@ -65,6 +78,9 @@ class Pathfinder:
             path.reverse()
             return path
 
+        if not (mapp.is_inbounds(int(target.x), int(target.y)) and mapp.is_open(int(target.x), int(target.y))):
+            print(f"Target position: {target} is outside of the map or blocked")
+            return []
         target_node = Node(int(target.x), int(target.y)) 
         start_x, start_y, start_heading = starting
         starting_node = Node(int(start_x), int(start_y), start_heading) 
@@ -76,17 +92,16 @@ class Pathfinder:
         heapify(open_list)
         open_set = {starting_node.key : 0.0}
         closed_set = set()
-        max_steps_start = 1_000
-        max_steps = max_steps_start
+        max_steps_start = max_steps
         while len(open_list) > 0 and max_steps > 0:
             current_node = heappop(open_list)
             if current_node == target_node:
+                Pathfinder.nodes_expanded += max_steps_start - max_steps
                 return find_path(current_node)
             closed_set.add(current_node.key)
             for neigh_pos in mapp.get_open_neighbors(current_node.x, current_node.y):
-                neigh_heading = Math.calc_new_heading_from_position(
-                    Position(current_node.x, current_node.y, current_node.heading), 
-                    neigh_pos
+                neigh_heading = GridMotion.new_heading(
+                    current_node.heading, neigh_pos.x - current_node.x, neigh_pos.y - current_node.y
                     )
                 neigh_node = Node(
                     int(neigh_pos.x),
@@ -103,5 +118,544 @@ class Pathfinder:
                 heappush(open_list, neigh_node)
                 open_set[neigh_node.key] = neigh_node.gscore
             max_steps -= 1
+        Pathfinder.nodes_expanded += max_steps_start - max_steps
         print(f"Failed to find path within maximum steps: {max_steps_start}")
-        return []
\ No newline at end of file
+        return []
+
+    @staticmethod
+    def a_star_array(
+            mapp: Mapp, 
+            starting: Position, 
+            target: Position, 
+            max_steps: int = 1_000, 
+            inflation: int = INFLATION_NONE,
+            inflation_cost_per_cell: int = 4
+            ) -> List[Position]:
+        """
+            Same cost model as a_star but not the same search, so the paths can differ.
+            Every (x, y, heading) state is its own node, where a_star's node keys merge
+            some of them and can miss a path that exists, and ties go to the oldest
+            entry. Every score, parent pointer and closed flag lives in a preallocated
+            array indexed by (y, x, heading) and the open list is a heap of packed
+            integer keys, so no per-node objects are created.
+
+            inflation selects how the Mapp's inflated obstacles are used:
+                INFLATION_NONE = ignored
+                INFLATION_COST = entering a cell near an obstacle costs extra,
+                    inflation_cost_per_cell more for every cell closer to it
+                INFLATION_HARD = cells near an obstacle are blocked
+        """
+        blocked_grid = mapp.get_blocked_grid()
+        cell_costs = None
+        if inflation == Pathfinder.INFLATION_HARD:
+            inflated = mapp.get_inflated_blocked_grid()
+            # the car has to be able to leave its own cell and enter the target
+            # even when they are close to an obstacle
+            for x, y in [(int(starting.x), int(starting.y)), (int(target.x), int(target.y))]:
+                if mapp.is_inbounds(x, y):
+                    inflated[y, x] = blocked_grid[y, x]
+            blocked_grid = inflated
+        elif inflation == Pathfinder.INFLATION_COST:
+            cell_costs = mapp.get_inflation_cost_grid(inflation_cost_per_cell)
+        return Pathfinder.a_star_grid(blocked_grid, starting, target, max_steps, cell_costs).to_positions()
+
+    @staticmethod
+    def is_open_target_(blocked_grid: np.ndarray, target: Position) -> bool:
+        # a search for a target it can never enter would run until max_steps
+        num_rows, num_columns = blocked_grid.shape
+        x, y = int(target.x), int(target.y)
+        if not (0 <= x < num_columns and 0 <= y < num_rows):
+            print(f"Target position: {target} is outside of the map")
+            return False
+        if blocked_grid[y, x]:
+            print(f"Target position: {target} is blocked")
+            return False
+        return True
+
+    @staticmethod
+    def a_star_grid(
+            blocked_grid: np.ndarray, 
+            starting: Position, 
+            target: Position, 
+            max_steps: int = 1_000, 
+            cell_costs: Union[np.ndarray, None] = None
+            ) -> PositionArray:
+        """
+            The search behind a_star_array over a (rows, columns) grid that is True where
+            the car can not drive. cell_costs optionally adds a cost for entering each cell.
+            The path is returned as a PositionArray, empty when no path was found.
+        """
+        num_rows, num_columns = blocked_grid.shape
+        if not (0 <= int(starting.x) < num_columns and 0 <= int(starting.y) < num_rows):
+            print(f"Starting position: {starting} is outside of the map")
+            return PositionArray()
+        if not Pathfinder.is_open_target_(blocked_grid, target):
+            return PositionArray()
+        cell_costs_flat = None
+        if cell_costs is not None:
+            cell_costs_flat = np.pad(cell_costs, 1).ravel().tolist()
+        # Pad the grid with a blocked border so neighbors never need a bounds check.
+        blocked = np.pad(blocked_grid, 1, constant_values=True)
+        padded_columns = blocked.shape[1]
+        blocked_flat = blocked.ravel().tolist()
+        num_states = blocked.size * NUM_HEADINGS
+        cell_deltas = [dy * padded_columns + dx for dx, dy in HEADING_OFFSETS]
+
+        gscores = np.full(num_states, np.iinfo(np.int32).max, dtype=np.int32)
+        parents = np.full(num_states, -1, dtype=np.int32)
+        closed = np.zeros(num_states, dtype=np.bool_)
+
+        target_x, target_y = int(target.x) + 1, int(target.y) + 1
+        target_cell = target_y * padded_columns + target_x
+        start_x, start_y = int(starting.x) + 1, int(starting.y) + 1
+        start_state = (start_y * padded_columns + start_x) * NUM_HEADINGS + heading_to_bin(starting.angle)
+        gscores[start_state] = 0
+        # key = (fscore << 32) | push_count so popping the smallest key pops the smallest
+        # fscore and ties go to the oldest entry. pushed_states maps push_count -> state.
+        open_list = [0]
+        pushed_states = [start_state]
+        steps_taken = 0
+        while open_list and steps_taken < max_steps:
+            state = pushed_states[heappop(open_list) & 0xFFFFFFFF]
+            if closed[state]:
+                continue
+            closed[state] = True
+            cell, heading = divmod(state, NUM_HEADINGS)
+            if cell == target_cell:
+                Pathfinder.nodes_expanded += steps_taken
+                return Pathfinder.find_array_path_(parents, state, padded_columns)
+            gscore = int(gscores[state])
+            turn_costs = TURN_COSTS[heading]
+            for new_heading in NEIGHBOR_ORDER:
+                neigh_cell = cell + cell_deltas[new_heading]
+                if blocked_flat[neigh_cell]:
+                    continue
+                neigh_state = neigh_cell * NUM_HEADINGS + new_heading
+                if closed[neigh_state]:
+                    continue
+                neigh_gscore = gscore + STEP_COSTS[new_heading] + turn_costs[new_heading]
+                if cell_costs_flat is not None:
+                    neigh_gscore += cell_costs_flat[neigh_cell]
+                if neigh_gscore < gscores[neigh_state]:
+                    gscores[neigh_state] = neigh_gscore
+                    parents[neigh_state] = state
+                    neigh_y, neigh_x = divmod(neigh_cell, padded_columns)
+                    hscore = (neigh_x - target_x)**2 + (neigh_y - target_y)**2
+                    heappush(open_list, ((neigh_gscore + hscore) << 32) | len(pushed_states))
+                    pushed_states.append(neigh_state)
+            steps_taken += 1
+        Pathfinder.nodes_expanded += steps_taken
+        print(f"Failed to find path within maximum steps: {max_steps}")
+        return PositionArray()
+
+    @staticmethod
+    def find_path(
+            mapp: Mapp, starting: Position, target: Position, method: str = "a_star", max_steps: int = 1_000
+            ) -> List[Position]:
+        """
+            Plans with the search named by method, one of Pathfinder.METHODS. They all
+            take a Mapp and return the cells of the path or [] if there is none.
+        """
+        assert method in Pathfinder.METHODS, f"Unknown pathfinding method: {method}"
+        return getattr(Pathfinder, method)(mapp, starting, target, max_steps=max_steps)
+
+    @staticmethod
+    def jump_point_search(
+            mapp: Mapp, starting: Position, target: Position, max_steps: int = 1_000
+            ) -> List[Position]:
+        return Pathfinder.jump_point_grid(mapp.get_blocked_grid(), starting, target, max_steps).to_positions()
+
+    @staticmethod
+    def jump_point_grid(
+            blocked_grid: np.ndarray, starting: Position, target: Position, max_steps: int = 1_000
+            ) -> PositionArray:
+        """
+            Jump Point Search over the (x, y, heading) states of a_star_grid. Instead of
+            stepping to every neighbor it runs straight and diagonally until it reaches a
+            cell where the path could have to turn, so on open ground only a handful of 
+            cells are expanded. The heading only changes at those jump points, which is 
+            where the turn costs are charged. The pruning itself ignores turn costs, so 
+            a path can turn slightly more than the one a_star_grid finds. Cell costs are
+            not supported because every move along a jump has to cost the same.
+        """
+        num_rows, num_columns = blocked_grid.shape
+        if not (0 <= int(starting.x) < num_columns and 0 <= int(starting.y) < num_rows):
+            print(f"Starting position: {starting} is outside of the map")
+            return PositionArray()
+        if not Pathfinder.is_open_target_(blocked_grid, target):
+            return PositionArray()
+        # Pad the grid with a blocked border so neighbors never need a bounds check.
+        blocked = np.pad(blocked_grid, 1, constant_values=True)
+        padded_columns = blocked.shape[1]
+        blocked_flat = blocked.ravel().tolist()
+        cell_deltas = [dy * padded_columns + dx for dx, dy in HEADING_OFFSETS]
+        target_x, target_y = int(target.x) + 1, int(target.y) + 1
+        target_cell = target_y * padded_columns + target_x
+        start_cell = (int(starting.y) + 1) * padded_columns + int(starting.x) + 1
+        start_state = start_cell * NUM_HEADINGS + heading_to_bin(starting.angle)
+
+        def jump_straight(cell: int, delta: int, side: int) -> Tuple[int, int]:
+            # (jump point, steps) or (-1, 0) when the run ends at an obstacle
+            steps = 0
+            while True:
+                cell += delta
+                steps += 1
+                if blocked_flat[cell]:
+                    return -1, 0
+                if cell == target_cell:
+                    return cell, steps
+                # an obstacle beside the run with an open cell diagonally ahead of it
+                if (blocked_flat[cell + side] and not blocked_flat[cell + side + delta]) or (
+                        blocked_flat[cell - side] and not blocked_flat[cell - side + delta]):
+                    return cell, steps
+
+        def jump(cell: int, direction: int) -> Tuple[int, int]:
+            dx, dy = HEADING_OFFSETS[direction]
+            delta = cell_deltas[direction]
+            if dx == 0:
+                return jump_straight(cell, delta, 1)
+            if dy == 0:
+                return jump_straight(cell, delta, padded_columns)
+            row_delta = dy * padded_columns
+            steps = 0
+            while True:
+                cell += delta
+                steps += 1
+                if blocked_flat[cell]:
+                    return -1, 0
+                if cell == target_cell:
+                    return cell, steps
+                if (blocked_flat[cell - dx] and not blocked_flat[cell - dx + row_delta]) or (
+                        blocked_flat[cell - row_delta] and not blocked_flat[cell + dx - row_delta]):
+                    return cell, steps
+                # a diagonal run stops where one of its straight parts finds something
+                if jump_straight(cell, dx, padded_columns)[0] != -1 or jump_straight(cell, row_delta, 1)[0] != -1:
+                    return cell, steps
+
+        def directions(cell: int, direction: int) -> List[int]:
+            # the natural and forced directions to continue in after arriving moving direction
+            dx, dy = HEADING_OFFSETS[direction]
+            if dx == 0 or dy == 0:
+                side = 1 if dx == 0 else padded_columns
+                side_dx, side_dy = (1, 0) if dx == 0 else (0, 1)
+                found = [direction]
+                for sign in [1, -1]:
+                    if blocked_flat[cell + sign * side] and not blocked_flat[cell + sign * side + cell_deltas[direction]]:
+                        found.append(OFFSET_BINS[(dx + sign * side_dx, dy + sign * side_dy)])
+                return found
+            found = [direction, OFFSET_BINS[(dx, 0)], OFFSET_BINS[(0, dy)]]
+            if blocked_flat[cell - dx]:
+                found.append(OFFSET_BINS[(-dx, dy)])
+            if blocked_flat[cell - dy * padded_columns]:
+                found.append(OFFSET_BINS[(dx, -dy)])
+            return found
+
+        def heuristic(cell: int) -> int:
+            # Manhattan distance, a diagonal step costs 2
+            y, x = divmod(cell, padded_columns)
+            return abs(x - target_x) + abs(y - target_y)
+
+        gscores: Dict[int, int] = {start_state: 0}
+        parents: Dict[int, Tuple[int, int, int]] = {}
+        closed = set()
+        open_list = [(heuristic(start_cell), 0, start_state)]
+        steps_taken = 0
+        while open_list and steps_taken < max_steps:
+            _, _, state = heappop(open_list)
+            if state in closed:
+                continue
+            closed.add(state)
+            cell, heading = divmod(state, NUM_HEADINGS)
+            if cell == target_cell:
+                Pathfinder.nodes_expanded += steps_taken
+                cells = [cell]
+                while state in parents:
+                    state, direction, steps = parents[state]
+                    for _ in range(steps):
+                        cells.append(cells[-1] - cell_deltas[direction])
+                ys, xs = np.divmod(np.array(cells[::-1]), padded_columns)
+                return PositionArray(np.column_stack([xs - 1, ys - 1]))
+            gscore = gscores[state]
+            turn_costs = TURN_COSTS[heading]
+            for direction in (NEIGHBOR_ORDER if state == start_state else directions(cell, heading)):
+                jump_cell, steps = jump(cell, direction)
+                if jump_cell == -1:
+                    continue
+                jump_state = jump_cell * NUM_HEADINGS + direction
+                jump_gscore = gscore + steps * STEP_COSTS[direction] + turn_costs[direction]
+                if jump_gscore < gscores.get(jump_state, jump_gscore + 1):
+                    gscores[jump_state] = jump_gscore
+                    parents[jump_state] = (state, direction, steps)
+                    heappush(open_list, (jump_gscore + heuristic(jump_cell), -jump_gscore, jump_state))
+            steps_taken += 1
+        Pathfinder.nodes_expanded += steps_taken
+        print(f"Failed to find path within maximum steps: {max_steps}")
+        return PositionArray()
+
+    @staticmethod
+    def bidirectional_a_star(
+            mapp: Mapp, starting: Position, target: Position, max_steps: int = 1_000
+            ) -> List[Position]:
+        return Pathfinder.bidirectional_grid(mapp.get_blocked_grid(), starting, target, max_steps).to_positions()
+
+    @staticmethod
+    def bidirectional_grid(
+            blocked_grid: np.ndarray, starting: Position, target: Position, max_steps: int = 1_000
+            ) -> PositionArray:
+        """
+            A* from the start and backward from the target at the same time over the
+            (x, y, heading) states and costs of a_star_grid, always expanding the side 
+            with the lower fscore. The backward search arrives at a cell with every 
+            heading, so turn costs are charged the same in both directions. It stops 
+            once neither side can lead to a cheaper path than the best one where they met.
+        """
+        num_rows, num_columns = blocked_grid.shape
+        if not (0 <= int(starting.x) < num_columns and 0 <= int(starting.y) < num_rows):
+            print(f"Starting position: {starting} is outside of the map")
+            return PositionArray()
+        if not Pathfinder.is_open_target_(blocked_grid, target):
+            return PositionArray()
+        blocked = np.pad(blocked_grid, 1, constant_values=True)
+        padded_columns = blocked.shape[1]
+        blocked_flat = blocked.ravel().tolist()
+        cell_deltas = [dy * padded_columns + dx for dx, dy in HEADING_OFFSETS]
+        target_x, target_y = int(target.x) + 1, int(target.y) + 1
+        target_cell = target_y * padded_columns + target_x
+        start_x, start_y = int(starting.x) + 1, int(starting.y) + 1
+        start_cell = start_y * padded_columns + start_x
+        start_state = start_cell * NUM_HEADINGS + heading_to_bin(starting.angle)
+        if start_cell == target_cell:
+            return PositionArray(np.array([[start_x - 1, start_y - 1]]))
+        if blocked_flat[target_cell]:
+            print(f"Failed to find path to target: {target}")
+            return PositionArray()
+
+        def distance(cell: int, x: int, y: int) -> int:
+            cell_y, cell_x = divmod(cell, padded_columns)
+            return abs(cell_x - x) + abs(cell_y - y)
+
+        forward_gscores: Dict[int, int] = {start_state: 0}
+        backward_gscores: Dict[int, int] = {}
+        # forward parents point toward the start and backward ones toward the target
+        forward_parents: Dict[int, int] = {}
+        backward_parents: Dict[int, int] = {}
+        forward_closed = set()
+        backward_closed = set()
+        forward_open = [(distance(start_cell, target_x, target_y), 0, start_state)]
+        backward_open = []
+        for heading in range(NUM_HEADINGS):
+            backward_gscores[target_cell * NUM_HEADINGS + heading] = 0
+            backward_open.append((distance(target_cell, start_x, start_y), 0, target_cell * NUM_HEADINGS + heading))
+        best_cost = float("inf")
+        meeting_state = -1
+        steps_taken = 0
+        while forward_open and backward_open and steps_taken < max_steps:
+            while forward_open and forward_open[0][2] in forward_closed:
+                heappop(forward_open)
+            while backward_open and backward_open[0][2] in backward_closed:
+                heappop(backward_open)
+            if not forward_open or not backward_open or max(forward_open[0][0], backward_open[0][0]) >= best_cost:
+                break
+            steps_taken += 1
+            if forward_open[0][0] <= backward_open[0][0]:
+                _, _, state = heappop(forward_open)
+                forward_closed.add(state)
+                cell, heading = divmod(state, NUM_HEADINGS)
+                gscore = forward_gscores[state]
+                turn_costs = TURN_COSTS[heading]
+                for new_heading in NEIGHBOR_ORDER:
+                    neigh_cell = cell + cell_deltas[new_heading]
+                    if blocked_flat[neigh_cell]:
+                        continue
+                    neigh_state = neigh_cell * NUM_HEADINGS + new_heading
+                    neigh_gscore = gscore + STEP_COSTS[new_heading] + turn_costs[new_heading]
+                    if neigh_gscore >= forward_gscores.get(neigh_state, neigh_gscore + 1):
+                        continue
+                    forward_gscores[neigh_state] = neigh_gscore
+                    forward_parents[neigh_state] = state
+                    heappush(forward_open, (neigh_gscore + distance(neigh_cell, target_x, target_y), -neigh_gscore, neigh_state))
+                    if neigh_gscore + backward_gscores.get(neigh_state, best_cost) < best_cost:
+                        best_cost = neigh_gscore + backward_gscores[neigh_state]
+                        meeting_state = neigh_state
+            else:
+                _, _, state = heappop(backward_open)
+                backward_closed.add(state)
+                cell, heading = divmod(state, NUM_HEADINGS)
+                prev_cell = cell - cell_deltas[heading]
+                if blocked_flat[prev_cell]:
+                    continue
+                gscore = backward_gscores[state]
+                for prev_heading in range(NUM_HEADINGS):
+                    prev_state = prev_cell * NUM_HEADINGS + prev_heading
+                    prev_gscore = gscore + STEP_COSTS[heading] + TURN_COSTS[prev_heading][heading]
+                    if prev_gscore >= backward_gscores.get(prev_state, prev_gscore + 1):
+                        continue
+                    backward_gscores[prev_state] = prev_gscore
+                    backward_parents[prev_state] = state
+                    heappush(backward_open, (prev_gscore + distance(prev_cell, start_x, start_y), -prev_gscore, prev_state))
+                    if prev_gscore + forward_gscores.get(prev_state, best_cost) < best_cost:
+                        best_cost = prev_gscore + forward_gscores[prev_state]
+                        meeting_state = prev_state
+        Pathfinder.nodes_expanded += steps_taken
+        if meeting_state == -1:
+            print(f"Failed to find path within maximum steps: {max_steps}")
+            return PositionArray()
+        states = [meeting_state]
+        while states[-1] in forward_parents:
+            states.append(forward_parents[states[-1]])
+        states.reverse()
+        while states[-1] in backward_parents:
+            states.append(backward_parents[states[-1]])
+        ys, xs = np.divmod(np.array(states) // NUM_HEADINGS, padded_columns)
+        return PositionArray(np.column_stack([xs - 1, ys - 1]))
+
+    @staticmethod
+    def hierarchical_a_star(
+            mapp: TiledMapp, 
+            starting: Position, 
+            target: Position, 
+            refine_tiles: Union[int, None] = None,
+            max_steps: int = 100_000
+            ) -> List[Position]:
+        """
+            HPA* style planner for a TiledMapp. It plans over the connected open regions 
+            of the tiles first, then refines that coarse path into cells a few tiles at a 
+            time, each time with a_star_grid over a small window holding only the tiles 
+            along the coarse path. With refine_tiles set only the first refine_tiles 
+            tiles are refined, so the path ends partway and should be planned again 
+            once the car reaches its end.
+        """
+        start_node = Pathfinder.coarse_node_(mapp, int(starting.x), int(starting.y))
+        target_node = Pathfinder.coarse_node_(mapp, int(target.x), int(target.y))
+        coarse_path = []
+        if start_node[2] >= 0 and target_node[2] >= 0:
+            coarse_path = Pathfinder.coarse_a_star_(mapp, start_node, target_node)
+        if not coarse_path:
+            print(f"Failed to find a tile path to target: {target}")
+            return []
+        tiles_per_chunk = refine_tiles if refine_tiles else Pathfinder.TILES_PER_CHUNK
+        segments = [PositionArray(np.array([[int(starting.x), int(starting.y), 0]]))]
+        current = starting
+        chunk_start = 0
+        while True:
+            chunk_end = min(chunk_start + tiles_per_chunk, len(coarse_path) - 1)
+            goal = target
+            if chunk_end < len(coarse_path) - 1:
+                goal = Pathfinder.coarse_waypoint_(mapp, coarse_path[chunk_end])
+            chunk_tiles = [(tile_x, tile_y) for tile_x, tile_y, _ in coarse_path[chunk_start:chunk_end + 1]]
+            segment = PositionArray()
+            # widen the corridor if the tiles along the coarse path are not enough
+            for margin in [0, 1]:
+                segment = Pathfinder.refine_tiles_(mapp, chunk_tiles, margin, current, goal, max_steps)
+                if segment:
+                    break
+            if not len(segment):
+                return []
+            segments.append(segment[1:]) # type: ignore
+            if refine_tiles or chunk_end == len(coarse_path) - 1:
+                return PositionArray(np.concatenate([part.data_ for part in segments])).to_positions()
+            # carry the heading of the last move into the next chunk
+            (prev_x, prev_y), (x, y) = segment.xy_array()[-2:].tolist()
+            current = Position(x, y, HEADING_OFFSETS.index((x - prev_x, y - prev_y)) * 45)
+            chunk_start = chunk_end
+
+    @staticmethod
+    def coarse_node_(mapp: TiledMapp, x: int, y: int) -> Tuple[int, int, int]:
+        # (tile_x, tile_y, open region of the tile the cell is in)
+        size = mapp.tile_size
+        return (x // size, y // size, int(mapp.get_tile_labels(x // size, y // size)[y % size, x % size]))
+
+    @staticmethod
+    def coarse_a_star_(
+            mapp: TiledMapp, start_node: Tuple[int, int, int], target_node: Tuple[int, int, int]
+            ) -> List[Tuple[int, int, int]]:
+        # (fscore, -gscore, node) so ties go to the node farthest along
+        open_list = [(0, 0, start_node)]
+        gscores: Dict[Tuple[int, int, int], int] = {start_node: 0}
+        parents: Dict[Tuple[int, int, int], Tuple[int, int, int]] = {}
+        closed = set()
+        while open_list:
+            _, neg_gscore, node = heappop(open_list)
+            gscore = -neg_gscore
+            if node in closed:
+                continue
+            if node == target_node:
+                coarse_path = [node]
+                while coarse_path[-1] in parents:
+                    coarse_path.append(parents[coarse_path[-1]])
+                coarse_path.reverse()
+                return coarse_path
+            closed.add(node)
+            tile_x, tile_y, region = node
+            for heading, (dx, dy) in enumerate(HEADING_OFFSETS):
+                neigh_tile = (tile_x + dx, tile_y + dy)
+                if not (0 <= neigh_tile[0] < mapp.num_tile_columns and 0 <= neigh_tile[1] < mapp.num_tile_rows):
+                    continue
+                # prefer driving through emptier tiles
+                neigh_gscore = gscore + STEP_COSTS[heading] + round(mapp.get_tile_blocked_fraction(*neigh_tile) * 10)
+                for from_region, neigh_region in mapp.get_tile_connections((tile_x, tile_y), neigh_tile):
+                    neigh = (neigh_tile[0], neigh_tile[1], neigh_region)
+                    if from_region != region or neigh_gscore >= gscores.get(neigh, neigh_gscore + 1):
+                        continue
+                    gscores[neigh] = neigh_gscore
+                    parents[neigh] = node
+                    hscore = abs(neigh[0] - target_node[0]) + abs(neigh[1] - target_node[1])
+                    heappush(open_list, (neigh_gscore + hscore, -neigh_gscore, neigh))
+        return []
+
+    @staticmethod
+    def coarse_waypoint_(mapp: TiledMapp, node: Tuple[int, int, int]) -> Position:
+        # the cell of the node's open region closest to the middle of its tile
+        tile_x, tile_y, region = node
+        size = mapp.tile_size
+        region_ys, region_xs = np.nonzero(mapp.get_tile_labels(tile_x, tile_y) == region)
+        closest = np.argmin((region_xs - size // 2)**2 + (region_ys - size // 2)**2)
+        return Position(tile_x * size + int(region_xs[closest]), tile_y * size + int(region_ys[closest]))
+
+    @staticmethod
+    def refine_tiles_(
+            mapp: TiledMapp, 
+            tiles: List[Tuple[int, int]], 
+            margin: int, 
+            starting: Position, 
+            goal: Position,
+            max_steps: int
+            ) -> PositionArray:
+        size = mapp.tile_size
+        corridor = {
+            (tile_x + dx, tile_y + dy) 
+            for tile_x, tile_y in tiles
+            for dy in range(-margin, margin + 1) for dx in range(-margin, margin + 1)
+        }
+        min_tile_x = min(tile_x for tile_x, _ in corridor)
+        min_tile_y = min(tile_y for _, tile_y in corridor)
+        max_tile_x = max(tile_x for tile_x, _ in corridor)
+        max_tile_y = max(tile_y for _, tile_y in corridor)
+        min_x, min_y = min_tile_x * size, min_tile_y * size
+        window = mapp.get_blocked_window(min_x, min_y, (max_tile_x + 1) * size - 1, (max_tile_y + 1) * size - 1)
+        # tiles in the bounding box but off the corridor are walls
+        for tile_y in range(min_tile_y, max_tile_y + 1):
+            for tile_x in range(min_tile_x, max_tile_x + 1):
+                if (tile_x, tile_y) not in corridor:
+                    y0, x0 = (tile_y - min_tile_y) * size, (tile_x - min_tile_x) * size
+                    window[y0:y0 + size, x0:x0 + size] = True
+        segment = Pathfinder.a_star_grid(
+            window, 
+            starting.clone(starting.x - min_x, starting.y - min_y), 
+            goal.clone(goal.x - min_x, goal.y - min_y), 
+            max_steps
+            )
+        return segment.xy_shift(min_x, min_y)
+
+    @staticmethod
+    def find_array_path_(
+            parents: np.ndarray, end_state: int, padded_columns: int
+            ) -> PositionArray:
+        states = []
+        state = end_state
+        while state != -1:
+            states.append(state)
+            state = int(parents[state])
+        ys, xs = np.divmod(np.array(states[::-1]) // NUM_HEADINGS, padded_columns)
+        # remove the padding added around the map
+        return PositionArray(np.column_stack([xs - 1, ys - 1]))
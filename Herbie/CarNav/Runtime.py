@@ -0,0 +1,144 @@
+from typing import Any, Callable, Deque, Dict, Generic, Tuple, TypeVar, Union
+from collections import deque
+import threading
+import time
+
+T = TypeVar("T")
+
+class LatestValue(Generic[T]):
+    """
+        Channel that only keeps the newest value. Writers never block and readers
+        always get the freshest value, older values are dropped when nobody read them.
+    """
+
+    def __init__(self, value: Union[T, None] = None) -> None:
+        self.condition_ = threading.Condition()
+        self.value_ = value
+        self.version_ = 0
+        self.timestamp_ = time.perf_counter()
+
+    def put(self, value: T) -> None:
+        with self.condition_:
+            self.value_ = value
+            self.version_ += 1
+            self.timestamp_ = time.perf_counter()
+            self.condition_.notify_all()
+
+    def get(self) -> Tuple[Union[T, None], int]:
+        with self.condition_:
+            return self.value_, self.version_
+
+    def age(self) -> float:
+        # seconds since the newest value was put
+        with self.condition_:
+            return time.perf_counter() - self.timestamp_
+
+    def wait_newer(self, version: int, timeout: float) -> Tuple[Union[T, None], int]:
+        """
+            Blocks until a value newer than version is put or timeout seconds pass.
+            Returns the (value, version) the channel holds at that point.
+        """
+        with self.condition_:
+            self.condition_.wait_for(lambda : self.version_ > version, timeout)
+            return self.value_, self.version_
+
+
+class StageMetrics:
+    """
+        Latency of the last window runs of a stage plus how old its input was
+        when the stage picked it up.
+    """
+
+    def __init__(self, window: int = 100) -> None:
+        self.lock_ = threading.Lock()
+        self.latencies_: Deque[float] = deque(maxlen=window)
+        self.input_ages_: Deque[float] = deque(maxlen=window)
+        self.count_ = 0
+
+    def record(self, latency: float, input_age: Union[float, None] = None) -> None:
+        with self.lock_:
+            self.count_ += 1
+            self.latencies_.append(latency)
+            if input_age is not None:
+                self.input_ages_.append(input_age)
+
+    def summary(self) -> Dict[str, float]:
+        # everything in milliseconds except count
+        with self.lock_:
+            latencies = sorted(self.latencies_)
+            input_ages = list(self.input_ages_)
+            count = self.count_
+        if not latencies:
+            return {"count": 0}
+        summary = {
+            "count": count,
+            "last_ms": round(self.latencies_[-1] * 1_000, 3),
+            "mean_ms": round(sum(latencies) / len(latencies) * 1_000, 3),
+            "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))] * 1_000, 3),
+            "max_ms": round(latencies[-1] * 1_000, 3)
+        }
+        if input_ages:
+            summary["input_age_ms"] = round(sum(input_ages) / len(input_ages) * 1_000, 3)
+        return summary
+
+
+class Stage:
+    """
+        Runs work on its own thread until stopped. With an input channel work(value)
+        runs once per new value, otherwise work() runs in a loop and returns whether
+        it did anything worth timing. Exceptions stop the stage and are kept in error.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            work: Callable[..., Any],
+            input_channel: Union[LatestValue, None] = None,
+            idle_sleep: float = 0.005,
+            metrics: Union[StageMetrics, None] = None
+            ) -> None:
+        self.name = name
+        self.work_ = work
+        self.input_channel_ = input_channel
+        self.idle_sleep_ = idle_sleep
+        self.metrics = metrics if metrics else StageMetrics()
+        self.error: Union[BaseException, None] = None
+        self.stop_ = threading.Event()
+        self.thread_ = threading.Thread(target=self.run_, name=name, daemon=True)
+
+    def start(self) -> None:
+        self.thread_.start()
+
+    def request_stop(self) -> None:
+        self.stop_.set()
+
+    def stop(self, timeout: Union[float, None] = None) -> None:
+        self.request_stop()
+        if self.thread_.is_alive() and threading.current_thread() is not self.thread_:
+            self.thread_.join(timeout)
+
+    def is_running(self) -> bool:
+        return self.thread_.is_alive()
+
+    def run_(self) -> None:
+        version = 0
+        try:
+            while not self.stop_.is_set():
+                if self.input_channel_ is None:
+                    start = time.perf_counter()
+                    if self.work_():
+                        self.metrics.record(time.perf_counter() - start)
+                    else:
+                        time.sleep(self.idle_sleep_)
+                    continue
+                value, new_version = self.input_channel_.wait_newer(version, self.idle_sleep_ * 10)
+                if new_version == version:
+                    continue
+                version = new_version
+                input_age = self.input_channel_.age()
+                start = time.perf_counter()
+                self.work_(value)
+                self.metrics.record(time.perf_counter() - start, input_age)
+        except BaseException as e:
+            self.error = e
+            self.stop_.set()
@@ -16,21 +16,84 @@ let connect_btn: HTMLButtonElement | null = null;
 let websocket: WebSocket | null = null;
 let ip_port_value = "localhost:8000"
 
+// Must match Telemetry in Herbie/Network/Telemetry.py
+const TELEMETRY_VERSION = 1;
+const FRAME_RAW_RGB = 0;
+const FRAME_JPEG = 1;
+const FRAME_WEBP = 2;
+// version u8, encoding u8, width u16, height u16, sequence u32, timestamp f64, little endian
+const FRAME_HEADER_SIZE = 18;
+
 interface recv_data {
-	image: Array<number>;
 	speed: number;
 	obstacle: Array<[number, number]>;
+	frame: number;
+}
+
+interface frame_header {
+	version: number;
+	encoding: number;
+	width: number;
+	height: number;
+	sequence: number;
+	timestamp: number;
+}
+
+function read_frame_header(buffer: ArrayBuffer): frame_header {
+	const view = new DataView(buffer);
+	return {
+		version: view.getUint8(0),
+		encoding: view.getUint8(1),
+		width: view.getUint16(2, true),
+		height: view.getUint16(4, true),
+		sequence: view.getUint32(6, true),
+		timestamp: view.getFloat64(10, true)
+	};
+}
+
+function draw_raw_frame(header: frame_header, pixels: Uint8Array) {
+	if(!ctx) {
+		return;
+	}
+	let palette = ctx.createImageData(header.width, header.height);
+	for(let src = 0, dst = 0; src < pixels.length; src += 3, dst += 4) {
+		palette.data[dst] = pixels[src];
+		palette.data[dst + 1] = pixels[src + 1];
+		palette.data[dst + 2] = pixels[src + 2];
+		palette.data[dst + 3] = 255;
+	}
+	ctx.putImageData(palette, 0, 0);
 }
 
-function update_canvas(data: recv_data) {
-	if(ctx) {
-		let palette = ctx.getImageData(0, 0, CANVAS_WIDTH, CANVAS_HEIGHT); 
-		palette.data.set(new Uint8ClampedArray(data.image));
-		ctx.putImageData(palette, 0, 0);
+// tells the car the frame was drawn, so it only sends as many as this browser can draw
+function acknowledge_frame(header: frame_header) {
+	if(websocket && websocket.readyState === WebSocket.OPEN) {
+		websocket.send(JSON.stringify({ ack: header.sequence }));
 	}
-	else {
+}
+
+function update_canvas(buffer: ArrayBuffer) {
+	if(!ctx) {
 		console.log("Cannot update canvas because it is not setup.");
+		return;
 	}
+	const header = read_frame_header(buffer);
+	if(header.version !== TELEMETRY_VERSION) {
+		console.log(`Unsupported telemetry version: ${header.version}`);
+		return;
+	}
+	const payload = new Uint8Array(buffer, FRAME_HEADER_SIZE);
+	if(header.encoding === FRAME_RAW_RGB) {
+		draw_raw_frame(header, payload);
+		acknowledge_frame(header);
+		return;
+	}
+	const type = header.encoding === FRAME_WEBP ? "image/webp" : "image/jpeg";
+	createImageBitmap(new Blob([payload], { type: type })).then((bitmap: ImageBitmap) => {
+		ctx?.drawImage(bitmap, 0, 0, CANVAS_WIDTH, CANVAS_HEIGHT);
+		bitmap.close();
+		acknowledge_frame(header);
+	});
 }
 
 function update_fields(data: recv_data) {
@@ -40,10 +103,6 @@ function update_fields(data: recv_data) {
 	}
 }
 
-function update(data: recv_data) {
-	update_canvas(data);
-	update_fields(data);
-}
 
 const keychange = (e: KeyboardEvent) => {
 	const prev_directions = JSON.parse(JSON.stringify(directions));
@@ -72,6 +131,8 @@ const keychange = (e: KeyboardEvent) => {
 
 function create_websocket(ip_port: String) {
 	let ws = new WebSocket(`ws://${ip_port}`);
+	// frames arrive as binary messages and everything else as JSON text
+	ws.binaryType = "arraybuffer";
 	ws.onerror = (e: Event) => {
 		console.log(`Websocket Failed: ${e}`);
 	};
@@ -80,8 +141,12 @@ function create_websocket(ip_port: String) {
 		ws.send(JSON.stringify(directions));
 	}
 	ws.onmessage = (ev: MessageEvent<any>) => {
+		if(ev.data instanceof ArrayBuffer) {
+			update_canvas(ev.data);
+			return;
+		}
 		const decoded_data: recv_data = JSON.parse(ev.data);
-		update(decoded_data)
+		update_fields(decoded_data);
 	}
 	return ws;
 }
@@ -1,3 +1,5 @@
 from Herbie.Hardware.Camera import *
 from Herbie.Hardware.DriveTrain import *
+from Herbie.Hardware.Odometry import *
+from Herbie.Hardware.Pins import *
 from Herbie.Hardware.UltraSonic import *
\ No newline at end of file
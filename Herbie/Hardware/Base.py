@@ -1,5 +1,6 @@
-from typing import List, Tuple, Union, Iterable, Any
+from typing import Callable, Dict, Generator, List, Tuple, Union, Iterable, Any
 from abc import ABC, abstractmethod
+import threading
 import time
 
 class BaseHardware(ABC):
@@ -8,13 +9,50 @@ class BaseHardware(ABC):
     def shutdown(self) -> None:
         ...
 
+class BasePin(BaseHardware, ABC):
+    # set while a background thread polls the pin for on_edge
+    poll_stop_: Union[threading.Event, None] = None
+
+    @abstractmethod
+    def high(self) -> None:
+        ...
+
+    @abstractmethod
+    def low(self) -> None:
+        ...
+
+    @abstractmethod
+    def value(self) -> int:
+        ...
+
+    def on_edge(self, callback: Callable[[int, int], None], poll_interval: float = 0.0001) -> None:
+        """
+            Calls callback(new value, time.perf_counter_ns()) every time the pin changes.
+            Pins that can not raise interrupts are polled from a background thread,
+            which sleeps between reads instead of spinning.
+        """
+        self.poll_stop_ = threading.Event()
+        def poll(stop: threading.Event) -> None:
+            last_value = self.value()
+            while not stop.is_set():
+                value = self.value()
+                if value != last_value:
+                    callback(value, time.perf_counter_ns())
+                    last_value = value
+                time.sleep(poll_interval)
+        threading.Thread(target=poll, args=(self.poll_stop_,), daemon=True).start()
+
+    def shutdown(self) -> None:
+        if self.poll_stop_:
+            self.poll_stop_.set()
+
 class BaseDriveTrain(BaseHardware, ABC):
     @abstractmethod
     def stop(self) -> None:
         ...
 
     @abstractmethod
-    def forward_for(self, power: int, centimeters: float) -> None:
+    def forward_for(self, power: int, centimeters: float, stop: bool = True) -> None:
         ...
 
     @abstractmethod
@@ -78,17 +116,30 @@ class AbstractSensor(BaseHardware, ABC):
         ...
 
 class BaseSensor(AbstractSensor):
+    # The servo needs about 0.1 seconds to turn 60 degrees plus a little time to
+    # stop shaking, so the time to wait after a move grows with how far it turned.
+    SETTLE_TIME_PER_DEGREE = 0.1 / 60
+    MIN_SETTLE_TIME = 0.01
+    # last angle the sensor was moved to, None until the first move
+    sensor_angle_: Union[float, None] = None
     
     def get_distance_at(self, degrees_to: float) -> Tuple[float, float]:
         self.move_sensor_to(degrees_to)
         return (degrees_to, self.get_distance())
 
-    def scan(
-            self, from_degrees: float, 
-            to_degrees: float, 
-            num_steps: int, 
-            samples_per_step: int = 2
-            ) -> List[Tuple[float, float]]:
+    def track_sensor_move_(self, degrees_to: float) -> float:
+        """
+            Records that the sensor is moving to degrees_to and returns how long to 
+            wait for the servo to get there.
+        """
+        travel = 180.0
+        if self.sensor_angle_ is not None:
+            travel = abs(degrees_to - self.sensor_angle_)
+        self.sensor_angle_ = degrees_to
+        return self.MIN_SETTLE_TIME + self.SETTLE_TIME_PER_DEGREE * travel
+
+    @staticmethod
+    def scan_angles_(from_degrees: float, to_degrees: float, num_steps: int) -> List[float]:
         half_steps = num_steps // 2 
         #        
         step_size = from_degrees // half_steps
@@ -97,24 +148,52 @@ class BaseSensor(AbstractSensor):
         step_size = to_degrees // half_steps
         to_angles = [to_degrees - (i * step_size) for i in range(half_steps)]
         #
-        all_angles = sorted(from_angles + to_angles + [0])
-        measurements = []
-        for angle in all_angles:
-            angle_center, distance_center = self.get_distance_at(angle)
-            samples = [distance_center]
-            sample_size = 20 // samples_per_step
-            for i in range(1, (samples_per_step // 2) + 1):
-                _, d = self.get_distance_at(angle - sample_size * i)
-                samples.append(d)
-            for i in range(1, (samples_per_step // 2) + 1):
-                _, d = self.get_distance_at(angle + sample_size * i)
-                samples.append(d)
-            if samples.count(-1) > len(samples) // 2:
-                continue
-            else:
+        return sorted(from_angles + to_angles + [0])
+
+    def scan(
+            self, from_degrees: float, 
+            to_degrees: float, 
+            num_steps: int, 
+            samples_per_step: int = 2
+            ) -> List[Tuple[float, float]]:
+        return sorted(self.scan_iter(from_degrees, to_degrees, num_steps, samples_per_step))
+
+    def scan_iter(
+            self, from_degrees: float, 
+            to_degrees: float, 
+            num_steps: int, 
+            samples_per_step: int = 2
+            ) -> Generator[Tuple[float, float], None, None]:
+        """
+            Yields (angle, averaged distance) for the same angles and samples as scan 
+            as soon as all the samples of an angle are in. The sensor sweeps once from 
+            the end of the range it is closest to and reads every angle only once, even
+            when neighboring angles share samples.
+        """
+        sample_size = 20 // samples_per_step
+        offsets = [0] + [
+            sign * sample_size * i for sign in [-1, 1] for i in range(1, (samples_per_step // 2) + 1)
+            ]
+        centers = self.scan_angles_(from_degrees, to_degrees, num_steps)
+        sweep = sorted({center + offset for center in centers for offset in offsets})
+        if self.sensor_angle_ is not None and abs(sweep[-1] - self.sensor_angle_) < abs(sweep[0] - self.sensor_angle_):
+            sweep.reverse()
+            centers.reverse()
+        distances: Dict[float, float] = {}
+        next_center = 0
+        for angle in sweep:
+            _, distances[angle] = self.get_distance_at(angle)
+            # the sweep is monotonic so centers finish in order
+            while next_center < len(centers) and all(
+                    centers[next_center] + offset in distances for offset in offsets
+                    ):
+                center = centers[next_center]
+                next_center += 1
+                samples = [distances[center + offset] for offset in offsets]
+                if samples.count(-1) > len(samples) // 2:
+                    continue
                 filtered_samples = list(filter(lambda dist : dist != -1, samples))
-                measurements.append([angle_center, sum(filtered_samples) / len(filtered_samples)])
-        return measurements
+                yield (center, sum(filtered_samples) / len(filtered_samples))
 
 
 class BaseCamera(BaseHardware, ABC):
@@ -1,5 +1,6 @@
 import cv2
 import time
+import threading
 from typing import Any, Iterable, NamedTuple, List, Union
 from dataclasses import dataclass
 
@@ -25,8 +26,110 @@ class Camera(BaseCamera):
 	def see(self) -> Any:
 		status, image = self.cap.read()
 		if status == False:
-			return status, np.zeros((self.width_, self.height_, 3))
+			return status, np.zeros((self.height_, self.width_, 3), dtype=np.uint8)
 		return status, cv2.cvtColor(image, cv2.COLOR_BGR2RGB) # type: ignore
 
 	def shutdown(self) -> None:
 		pass
+
+
+class CapturedFrame(NamedTuple):
+	# RGB image in one of the camera's ring buffers, see ThreadedCamera
+	image: np.ndarray
+	# counts up from 1 with every frame captured
+	sequence: int
+	# time.perf_counter() when the frame was read
+	timestamp: float
+
+
+class ThreadedCamera(BaseCamera):
+	"""
+		Reads frames on a background thread into a ring of num_buffers preallocated
+		buffers, so nothing is allocated per frame and see never waits on the camera.
+		latest and see hand out the buffer itself without copying it. A frame stays
+		untouched until num_buffers - 1 newer frames were captured, copy it to keep it
+		longer. capture can be any object with the read, isOpened and release methods
+		of cv2.VideoCapture, which is opened from camera_id when none is given.
+	"""
+	# seconds to wait before reading again after a failed read
+	RETRY_SLEEP = 0.01
+
+	def __init__(self,
+				camera_id: int = 0,
+				width: int = 320,
+				height: int = 320,
+				num_buffers: int = 3,
+				capture: Any = None
+			):
+		assert num_buffers >= 2, "The capture thread needs a buffer of its own to write into"
+		self.width_ = width
+		self.height_ = height
+		self.cap = capture
+		if self.cap is None:
+			self.cap = cv2.VideoCapture(camera_id) # type: ignore
+			self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width) # type: ignore
+			self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height) # type: ignore
+		# the camera can ignore the requested size, the buffers follow the first frame
+		self.bgr_buffer_: Union[np.ndarray, None] = None
+		self.buffers_: List[np.ndarray] = []
+		self.num_buffers_ = num_buffers
+		self.failed_reads = 0
+		self.condition_ = threading.Condition()
+		self.latest_: Union[CapturedFrame, None] = None
+		self.stop_ = threading.Event()
+		self.thread_ = threading.Thread(target=self.run_, name="camera", daemon=True)
+		self.thread_.start()
+
+	def is_camera_available(self) -> bool:
+		return self.cap is not None and self.cap.isOpened()
+
+	def run_(self) -> None:
+		sequence = 0
+		while not self.stop_.is_set():
+			status, image = self.cap.read(self.bgr_buffer_)
+			if not status or image is None:
+				self.failed_reads += 1
+				time.sleep(self.RETRY_SLEEP)
+				continue
+			timestamp = time.perf_counter()
+			if self.bgr_buffer_ is None or image.shape != self.bgr_buffer_.shape:
+				self.allocate_(image.shape)
+			sequence += 1
+			buffer = self.buffers_[sequence % self.num_buffers_]
+			# straight into the buffer, the newest frame is never the one being written
+			cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=buffer) # type: ignore
+			with self.condition_:
+				self.latest_ = CapturedFrame(buffer, sequence, timestamp)
+				self.condition_.notify_all()
+
+	def allocate_(self, shape: Any) -> None:
+		self.bgr_buffer_ = np.empty(shape, dtype=np.uint8)
+		self.buffers_ = [np.empty(shape, dtype=np.uint8) for _ in range(self.num_buffers_)]
+
+	def latest(self) -> Union[CapturedFrame, None]:
+		# None until the first frame was captured
+		with self.condition_:
+			return self.latest_
+
+	def wait_newer(self, sequence: int, timeout: float) -> Union[CapturedFrame, None]:
+		"""
+			Blocks until a frame newer than sequence is captured or timeout seconds
+			pass. Returns the latest frame at that point.
+		"""
+		with self.condition_:
+			self.condition_.wait_for(
+				lambda : self.latest_ is not None and self.latest_.sequence > sequence, timeout
+				)
+			return self.latest_
+
+	def see(self) -> Any:
+		frame = self.latest()
+		if frame is None:
+			return False, np.zeros((self.height_, self.width_, 3), dtype=np.uint8)
+		return True, frame.image
+
+	def shutdown(self) -> None:
+		self.stop_.set()
+		if self.thread_.is_alive():
+			self.thread_.join()
+		self.cap.release()
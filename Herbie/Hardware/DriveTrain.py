@@ -1,26 +1,19 @@
-
-
 from Herbie.Hardware.Base import BaseDriveTrain
+from Herbie.Hardware.Odometry import Odometry
+from Herbie.CMath.Api import Position
 
 from typing import Union, Callable
-import time
 import math
 
 
-def block_for(
-        time_to_block, starting_speed, sample_speed_func, step=0.01, max_steps=1000
-        ) -> None:
-    num_steps = time_to_block / step
-    while num_steps > 0 and max_steps > 0: 
-        time.sleep(step)
-        current_speed = sample_speed_func()
-        expected_distance_travelled = starting_speed * step
-        actual_distance_travelled = current_speed * step
-        missed_step = (expected_distance_travelled - actual_distance_travelled) / expected_distance_travelled
-        num_steps += missed_step - 1
-        max_steps -= 1
-
 class DriveTrain(BaseDriveTrain):
+    # Motions end once the odometry measured the distance or angle. If the wheel
+    # sensors stop reporting they end after this many times the time they should take
+    # at the speed the car usually drives.
+    EXPECTED_SPEED = 30 # centimeters per second
+    MOTION_TIMEOUT_FACTOR = 2.0
+    RADIUS_FROM_MOTOR_TO_CENTER = 11.5 # centimeters
+
     def __init__(self):
         from picar_4wd.pwm import PWM
         from picar_4wd.pin import Pin
@@ -37,61 +30,63 @@ class DriveTrain(BaseDriveTrain):
         self.left_rear_speed.start()
         self.right_rear_speed.start()
 
+        self.odometry = Odometry(
+            lambda : self.get_left_rear_speed, 
+            lambda : self.get_right_rear_speed,
+            track_width_in_cm=2 * self.RADIUS_FROM_MOTOR_TO_CENTER
+            )
+        self.odometry.start()
+        # odometry distance the run of forward_for(stop=False) motions in progress ends at
+        self.run_target_: Union[float, None] = None
+
         self.stop()
 
-    def stop(self) -> None:
-        self.left_front.set_power(0)
-        self.left_rear.set_power(0)
-        self.right_front.set_power(0)
-        self.right_rear.set_power(0)
+    def set_power_(self, left_power: int, right_power: int) -> None:
+        self.left_front.set_power(left_power)
+        self.left_rear.set_power(left_power)
+        self.right_front.set_power(right_power)
+        self.right_rear.set_power(right_power)
+        # the speed sensors can not tell which way the wheels turn
+        self.odometry.set_direction(
+            (left_power > 0) - (left_power < 0), (right_power > 0) - (right_power < 0)
+            )
 
-    def forward_for(self, power: int, centimeters: float) -> None:
-        starting_speed = 30 # cm
+    def motion_timeout_(self, centimeters: float) -> float:
+        return self.MOTION_TIMEOUT_FACTOR * centimeters / self.EXPECTED_SPEED
+
+    def stop(self) -> None:
+        self.set_power_(0, 0)
+        self.run_target_ = None
+
+    def forward_for(self, power: int, centimeters: float, stop: bool = True) -> None:
+        # With stop=False the motors keep running into the next motion. The next one is 
+        # measured from where this one was meant to end, not from when it is called, so
+        # the distance driven while the caller scans in between is not driven twice.
+        travelled = self.odometry.get_distance_travelled()
+        target = (travelled if self.run_target_ is None else self.run_target_) + centimeters
         self.forward(power)
-        block_for(
-            centimeters / starting_speed, 
-            starting_speed, 
-            lambda : self.get_avg_speed, 
-            step=0.01, 
-            max_steps=200
-            )
-        self.stop()
+        self.odometry.wait_for_distance_travelled(target, self.motion_timeout_(max(target - travelled, 0)))
+        if stop:
+            self.stop()
+        else:
+            self.run_target_ = target
 
     def backward_for(self, power: int, centimeters: float) -> None:
-        starting_speed = 30 # cm
         self.backward(power)
-        block_for(
-            centimeters / starting_speed, 
-            starting_speed, 
-            lambda : self.get_avg_speed, 
-            step=0.01, 
-            max_steps=200
-            )
+        self.odometry.wait_for_distance(centimeters, self.motion_timeout_(centimeters))
         self.stop()
 
     def forward(self, power: int) -> None:
-        self.left_front.set_power(power)
-        self.left_rear.set_power(power)
-        self.right_front.set_power(power)
-        self.right_rear.set_power(power)
+        self.set_power_(power, power)
 
     def backward(self, power: int) -> None:
-        self.left_front.set_power(-power)
-        self.left_rear.set_power(-power)
-        self.right_front.set_power(-power)
-        self.right_rear.set_power(-power)
+        self.set_power_(-power, -power)
 
     def turn_left(self, power: int) -> None:
-        self.left_front.set_power(-power)
-        self.left_rear.set_power(-power)
-        self.right_front.set_power(power)
-        self.right_rear.set_power(power)
+        self.set_power_(-power, power)
 
     def turn_right(self, power: int) -> None:
-        self.left_front.set_power(power)
-        self.left_rear.set_power(power)
-        self.right_front.set_power(-power)
-        self.right_rear.set_power(-power)
+        self.set_power_(power, -power)
 
     def rotate(self, degrees_to: float):
         self.stop()
@@ -104,21 +99,16 @@ class DriveTrain(BaseDriveTrain):
         self.stop()
 
     def _rotate(self, degrees_to: float, turn_func: Callable[[int], None]) -> None:
-        starting_speed = 35 / 100 # centimeters per second to meters per second
-        target_radians = math.radians(abs(degrees_to))
-        radius_from_motor_to_center = 11.5 / 100 # centimeters to meters
-        time_to_rotate = (target_radians * radius_from_motor_to_center) / starting_speed # in seconds
+        wheel_travel = math.radians(abs(degrees_to)) * self.RADIUS_FROM_MOTOR_TO_CENTER
         turn_func(60) # start turning
-        block_for(
-            time_to_rotate, 
-            starting_speed, 
-            lambda : self.get_avg_speed / 100, 
-            step=0.01, 
-            max_steps=1_000
-            )
+        self.odometry.wait_for_rotation(degrees_to, self.motion_timeout_(wheel_travel))
+
+    def get_pose(self) -> Position:
+        return self.odometry.get_pose()
 
     def shutdown(self) -> None:
         self.stop()
+        self.odometry.stop()
         self.left_rear_speed.deinit()
         self.right_rear_speed.deinit()
 
@@ -141,7 +131,7 @@ class MockDriveTrain(BaseDriveTrain):
         #if self.verbose_:
         print("DriveTrain Stopping")
 
-    def forward_for(self, power: int, centimeters: float) -> None:
+    def forward_for(self, power: int, centimeters: float, stop: bool = True) -> None:
         print(f"DriveTrain Moving Forward For: {power} - {centimeters}")
 
     def backward_for(self, power: int, centimeters: float) -> None:
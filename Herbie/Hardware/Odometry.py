@@ -0,0 +1,117 @@
+from typing import Callable, Union
+import math
+import threading
+import time
+
+from Herbie.CMath.Api import Position
+
+class Odometry:
+    """
+        Dead reckoning from the rear wheel speed sensors. Every update integrates the
+        speeds over the time since the last one, so the estimate does not depend on
+        how often it runs. The encoders can not tell forward from backward, so the
+        drive train reports which way each side is driven with set_direction.
+
+        The pose is in centimeters from where the odometry started with x forward,
+        y to the left and the heading in degrees counter clockwise.
+    """
+
+    def __init__(
+            self,
+            left_speed: Callable[[], float],
+            right_speed: Callable[[], float],
+            track_width_in_cm: float = 23.0,
+            sample_interval: float = 0.01,
+            clock: Callable[[], float] = time.perf_counter,
+            sleep: Callable[[float], None] = time.sleep
+            ):
+        self.left_speed_ = left_speed
+        self.right_speed_ = right_speed
+        self.track_width_in_cm = track_width_in_cm
+        self.sample_interval = sample_interval
+        self.clock_ = clock
+        self.sleep_ = sleep
+        self.lock_ = threading.Lock()
+        self.left_direction_ = 0
+        self.right_direction_ = 0
+        self.x_ = 0.0
+        self.y_ = 0.0
+        self.heading_ = 0.0 # radians
+        # total distance and rotation ever travelled, they only grow
+        self.distance_travelled_ = 0.0
+        self.rotation_travelled_ = 0.0 # radians
+        self.last_update_ = self.clock_()
+        self.stop_: Union[threading.Event, None] = None
+
+    def set_direction(self, left_direction: int, right_direction: int) -> None:
+        # 1 forward, -1 backward and 0 stopped for each side
+        self.update()
+        with self.lock_:
+            self.left_direction_ = left_direction
+            self.right_direction_ = right_direction
+
+    def update(self) -> None:
+        left_speed = self.left_speed_() * self.left_direction_
+        right_speed = self.right_speed_() * self.right_direction_
+        with self.lock_:
+            now = self.clock_()
+            dt = now - self.last_update_
+            self.last_update_ = now
+            distance = (left_speed + right_speed) / 2 * dt
+            rotation = (right_speed - left_speed) / self.track_width_in_cm * dt
+            # move along the average heading over the interval
+            mid_heading = self.heading_ + rotation / 2
+            self.x_ += distance * math.cos(mid_heading)
+            self.y_ += distance * math.sin(mid_heading)
+            self.heading_ += rotation
+            self.distance_travelled_ += abs(distance)
+            self.rotation_travelled_ += abs(rotation)
+
+    def get_pose(self) -> Position:
+        with self.lock_:
+            return Position(self.x_, self.y_, math.degrees(self.heading_) % 360)
+
+    def get_distance_travelled(self) -> float:
+        with self.lock_:
+            return self.distance_travelled_
+
+    def get_rotation_travelled(self) -> float:
+        # degrees
+        with self.lock_:
+            return math.degrees(self.rotation_travelled_)
+
+    def wait_for_distance(self, centimeters: float, timeout: float) -> bool:
+        """
+            Blocks until the car has travelled centimeters more, in any direction.
+            Returns False if that did not happen within timeout seconds.
+        """
+        return self.wait_for_distance_travelled(self.get_distance_travelled() + centimeters, timeout)
+
+    def wait_for_distance_travelled(self, centimeters: float, timeout: float) -> bool:
+        # blocks until get_distance_travelled reaches centimeters, at once if it already has
+        return self.wait_until_(lambda : self.get_distance_travelled() >= centimeters, timeout)
+
+    def wait_for_rotation(self, degrees: float, timeout: float) -> bool:
+        target = self.get_rotation_travelled() + abs(degrees)
+        return self.wait_until_(lambda : self.get_rotation_travelled() >= target, timeout)
+
+    def wait_until_(self, condition: Callable[[], bool], timeout: float) -> bool:
+        start = self.clock_()
+        while not condition():
+            if self.clock_() - start > timeout:
+                return False
+            self.sleep_(self.sample_interval)
+            self.update()
+        return True
+
+    def start(self) -> None:
+        # keep the pose current while nothing is waiting on a motion
+        self.stop_ = threading.Event()
+        def run(stop: threading.Event) -> None:
+            while not stop.wait(self.sample_interval):
+                self.update()
+        threading.Thread(target=run, args=(self.stop_,), daemon=True).start()
+
+    def stop(self) -> None:
+        if self.stop_:
+            self.stop_.set()
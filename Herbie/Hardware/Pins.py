@@ -0,0 +1,106 @@
+from Herbie.Hardware.Base import BasePin
+
+from typing import Callable, List, Union
+import time
+
+class PicarPin(BasePin):
+    def __init__(self, name: str):
+        from picar_4wd.pin import Pin
+        self.pin_ = Pin(name)
+        # the GPIO channel with an edge interrupt registered on it
+        self.edge_channel_: Union[int, None] = None
+
+    def high(self) -> None:
+        self.pin_.high()
+
+    def low(self) -> None:
+        self.pin_.low()
+
+    def value(self) -> int:
+        return self.pin_.value()
+
+    def on_edge(self, callback: Callable[[int, int], None], poll_interval: float = 0.0001) -> None:
+        import RPi.GPIO as GPIO
+        # Pin.irq always sets a bouncetime in milliseconds, which would swallow the
+        # falling edge of short echoes, so register the interrupt directly.
+        channel = self.pin_._pin
+        GPIO.setup(channel, GPIO.IN)
+        GPIO.add_event_detect(
+            channel, 
+            GPIO.BOTH, 
+            callback=lambda channel : callback(GPIO.input(channel), time.perf_counter_ns())
+            )
+        self.edge_channel_ = channel
+
+    def shutdown(self) -> None:
+        if self.edge_channel_ is not None:
+            import RPi.GPIO as GPIO
+            GPIO.remove_event_detect(self.edge_channel_)
+            self.edge_channel_ = None
+
+
+class MockPin(BasePin):
+    def __init__(self, on_falling: Union[Callable[[], None], None] = None):
+        self.value_ = 0
+        self.on_falling_ = on_falling
+        self.callbacks_: List[Callable[[int, int], None]] = []
+
+    def high(self) -> None:
+        self.set_value(1)
+
+    def low(self) -> None:
+        was_high = self.value_ == 1
+        self.set_value(0)
+        if was_high and self.on_falling_:
+            self.on_falling_()
+
+    def value(self) -> int:
+        return self.value_
+
+    def set_value(self, value: int, timestamp_ns: Union[int, None] = None) -> None:
+        if value != self.value_:
+            self.value_ = value
+            for callback in self.callbacks_:
+                callback(value, timestamp_ns if timestamp_ns is not None else time.perf_counter_ns())
+
+    def on_edge(self, callback: Callable[[int, int], None], poll_interval: float = 0.0001) -> None:
+        self.callbacks_.append(callback)
+
+
+class ReplayEchoPin(MockPin):
+    """
+        Echo pin that replays recorded pulse durations in seconds, one per ping and
+        None for a ping that never came back. Edge callbacks get the exact recorded
+        timestamps and value() follows the same pulse on clock, so both the polling
+        and the edge timed measurement can be tested without hardware. Give it the
+        same fake clock as the sensor to make the polling measurement exact.
+    """
+
+    def __init__(
+            self, 
+            pulse_durations: List[Union[float, None]], 
+            echo_delay: float = 0.0005, 
+            clock: Callable[[], float] = time.perf_counter
+            ):
+        super(ReplayEchoPin, self).__init__()
+        self.pulse_durations_ = list(pulse_durations)
+        self.echo_delay_ns_ = int(echo_delay * 1e9)
+        self.clock_ = clock
+        self.pulse_ns_ = (0, 0)
+
+    def trigger(self) -> None:
+        # called when the trigger pin falls, which sends the ping
+        if not self.pulse_durations_:
+            return
+        duration = self.pulse_durations_.pop(0)
+        if duration is None:
+            return
+        rise_ns = int(self.clock_() * 1e9) + self.echo_delay_ns_
+        self.pulse_ns_ = (rise_ns, rise_ns + int(duration * 1e9))
+        for value, timestamp_ns in [(1, self.pulse_ns_[0]), (0, self.pulse_ns_[1])]:
+            for callback in self.callbacks_:
+                callback(value, timestamp_ns)
+
+    def value(self) -> int:
+        rise_ns, fall_ns = self.pulse_ns_
+        return int(rise_ns <= int(self.clock_() * 1e9) < fall_ns)
@@ -1,45 +1,118 @@
-from Herbie.Hardware.Base import BaseSensor
+from Herbie.Hardware.Base import BaseSensor, BasePin
 
-from typing import Union, Callable
+from typing import Any, Union, Callable
+import statistics
+import threading
 import numpy as np
 import time
 
+class EchoTimer:
+    """
+        Times echo pulses from the echo pin's edge callbacks, so waiting for a ping 
+        blocks on an Event instead of spinning on the pin.
+    """
+
+    def __init__(self):
+        self.rise_ns_: Union[int, None] = None
+        self.fall_ns_: Union[int, None] = None
+        self.done_ = threading.Event()
+
+    def reset(self) -> None:
+        self.rise_ns_ = None
+        self.fall_ns_ = None
+        self.done_.clear()
+
+    def on_edge(self, value: int, timestamp_ns: int) -> None:
+        if value == 1:
+            self.rise_ns_ = timestamp_ns
+        elif self.rise_ns_ is not None:
+            self.fall_ns_ = timestamp_ns
+            self.done_.set()
+
+    def wait(self, timeout: float) -> Union[float, None]:
+        # seconds the echo pin was high or None if no echo came back in time
+        if not self.done_.wait(timeout) or self.rise_ns_ is None or self.fall_ns_ is None:
+            return None
+        return (self.fall_ns_ - self.rise_ns_) / 1e9
+
+
 class UltraSonic(BaseSensor):
     MAX_DISTANCE = 400 # 400 centimeters is the max range of the sensor
     ANGLE_RANGE = 180
     STEP = 18
 
-    def __init__(self, servo_offset: int, timeout: float = 0.01):
-        from picar_4wd.pwm import PWM
-        from picar_4wd.pin import Pin
-        from picar_4wd.servo import Servo
+    def __init__(
+            self, 
+            servo_offset: int, 
+            timeout: float = 0.01,
+            edge_timing: bool = False,
+            pings_per_reading: int = 1,
+            trig: Union[BasePin, None] = None,
+            echo: Union[BasePin, None] = None,
+            servo: Any = None,
+            clock: Callable[[], float] = time.perf_counter
+            ):
         self.servo_offset = int(servo_offset)
         self.timeout = timeout
-        self.trig = Pin("D8")
-        self.echo = Pin("D9")
-        self.servo = Servo(PWM("P0"), offset=self.servo_offset)
+        # times the busy wait, tests pass a fake one so preemption can not skew it
+        self.clock_ = clock
+        self.pings_per_reading = pings_per_reading
+        if trig is None or echo is None:
+            from Herbie.Hardware.Pins import PicarPin
+            trig, echo = PicarPin("D8"), PicarPin("D9")
+        self.trig = trig
+        self.echo = echo
+        if servo is None:
+            from picar_4wd.pwm import PWM
+            from picar_4wd.servo import Servo
+            servo = Servo(PWM("P0"), offset=self.servo_offset)
+        self.servo = servo
         self.max_angle = self.ANGLE_RANGE / 2
         self.min_angle = -self.ANGLE_RANGE / 2
+        # with edge timing the echo is timed from pin interrupts instead of busy waiting
+        self.echo_timer_: Union[EchoTimer, None] = None
+        if edge_timing:
+            self.echo_timer_ = EchoTimer()
+            self.echo.on_edge(self.echo_timer_.on_edge)
 
     def get_distance(self) -> float:
+        """
+            Median distance of pings_per_reading pings, or -1 when more than half
+            of them found nothing.
+        """
+        distances = [self.ping_() for _ in range(self.pings_per_reading)]
+        if distances.count(-1) > len(distances) // 2:
+            return -1
+        return statistics.median(filter(lambda dist : dist != -1, distances))
+
+    def ping_(self) -> float:
+        if self.echo_timer_:
+            self.echo_timer_.reset()
         self.trig.low()
         time.sleep(0.01)
         self.trig.high()
         time.sleep(0.000015)
         self.trig.low()
+        if self.echo_timer_:
+            during = self.echo_timer_.wait(self.timeout)
+            if during is None:
+                return -1
+            return self.to_distance_(during)
         pulse_end = 0
         pulse_start = 0
-        timeout_start = time.time()
+        timeout_start = self.clock_()
         while self.echo.value() == 0:
-            pulse_start = time.time()
+            pulse_start = self.clock_()
             if pulse_start - timeout_start > self.timeout:
                 return -1
         while self.echo.value() == 1:
-            pulse_end = time.time()
+            pulse_end = self.clock_()
             if pulse_end - timeout_start > self.timeout:
                 return -1
                 #return -2
-        during = pulse_end - pulse_start
+        return self.to_distance_(pulse_end - pulse_start)
+
+    def to_distance_(self, during: float) -> float:
         # 340 = the speed of sound is 343.4 m/s or 0.0343 cm / microsecond
         dist = round(during * 340 / 2 * 100, 2) # in centimeters
         if dist > self.MAX_DISTANCE:
@@ -47,9 +120,10 @@ class UltraSonic(BaseSensor):
         return dist
     
     def move_sensor_to(self, angle: float) -> bool:
+        settle_time = self.track_sensor_move_(angle)
         self.servo.set_angle(angle)
-        time.sleep(0.1)
+        time.sleep(settle_time)
         return True
 
     def shutdown(self) -> None:
-        pass
\ No newline at end of file
+        self.echo.shutdown()
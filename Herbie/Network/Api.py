@@ -1,2 +1,4 @@
 from Herbie.Network.Client import *
-from Herbie.Network.Server import *
\ No newline at end of file
+from Herbie.Network.Server import *
+from Herbie.Network.Telemetry import *
+from Herbie.Network.Streaming import *
\ No newline at end of file
@@ -13,12 +13,15 @@ class Client:
         self.server_port = server_port
         self.socket.settimeout(0.5)
         self.is_connected = False
+        # counts successful connects, a new connection may be to a server that knows nothing yet
+        self.num_connections = 0
         #self.socket.connect((self.server_host, self.server_port))
 
     def connect(self) -> "Client":
         try:
             self.socket.connect((self.server_host, self.server_port))
             self.is_connected = True
+            self.num_connections += 1
         except ConnectionError as e:
             print(f"FAILED to connect to server {(self.server_host, self.server_port)} because: {str(e)}")
             self.is_connected = False
@@ -11,7 +11,10 @@ from collections import deque
 from websockets.server import serve
 from websockets.sync.client import connect
 
-socket.AF_BLUETOOTH
+import numpy as np
+
+from Herbie.Network.Telemetry import Telemetry
+from Herbie.Network.Streaming import Frame, ClientStream
 
 class SocketServer:
     CLOSING_MESSAGE = "CLOSING_SOCKET"
@@ -64,16 +67,44 @@ class SocketServer:
 
 
 class WebSocketServer:
-    def __init__(self, host=socket.gethostbyname(socket.gethostname()), port=8000) -> None:
+    """
+        Every connection gets a ClientStream that sends from its own task, so send and
+        send_frame only queue and return right away however many clients there are.
+        Messages are encoded once for all of them, and a client whose send does not
+        finish within send_timeout seconds is dropped.
+    """
+    def __init__(
+            self,
+            host=socket.gethostbyname(socket.gethostname()),
+            port=8000,
+            max_queued_frames: int = 2,
+            send_timeout: float = 2.0
+            ) -> None:
         self.host = host
         self.port = port
-        self.connections_ = set()
+        self.max_queued_frames_ = max_queued_frames
+        self.send_timeout_ = send_timeout
+        self.connections_: Dict[Any, ClientStream] = {}
+        # every connection ever accepted, so the controller can tell when a new one arrives
+        self.num_connections = 0
         self.messages_: deque[Dict[str, Any]] = deque()
 
-    async def send(self, message: Dict[str, Any]):
-        encoded_data = json.dumps(message)
-        for ws in self.connections_:
-            await ws.send(encoded_data)
+    async def send(self, message: Union[Dict[str, Any], bytes]):
+        # bytes, like the frames from Telemetry.encode_frame, go out as binary messages
+        encoded_data = message
+        if isinstance(message, dict):
+            encoded_data = Telemetry.encode_scalars(message)
+        for stream in self.connections_.values():
+            stream.offer_message(encoded_data)
+
+    def send_frame(self, image: np.ndarray, sequence: int, encoding: str = "jpeg", quality: int = 80) -> None:
+        """
+            Queues a camera frame for every client. Each one gets it encoded at the
+            quality it can keep up with, or skips it if a newer frame arrives first.
+        """
+        frame = Frame(image, sequence, encoding, quality, time.time())
+        for stream in self.connections_.values():
+            stream.offer_frame(frame)
 
     def get_message(self) -> Dict[str, Any]:
         if self.messages_:
@@ -82,23 +113,43 @@ class WebSocketServer:
 
     async def recv_(self, ws):
         async for message in ws:
-            print(f"Received Message: {message}")
             decoded_data = message
             if isinstance(message, bytes):
                 decoded_data = message.decode()
-            self.messages_.append(json.loads(decoded_data))
+            decoded_message = json.loads(decoded_data)
+            if "ack" in decoded_message:
+                # the client drew a frame, this is not a command
+                self.connections_[ws].acknowledge(decoded_message["ack"])
+                continue
+            print(f"Received Message: {message}")
+            self.messages_.append(decoded_message)
             await asyncio.sleep(0.05)
 
     async def handle(self, ws):
-        self.connections_.add(ws)
+        stream = ClientStream(ws, self.max_queued_frames_, send_timeout=self.send_timeout_)
+        self.connections_[ws] = stream
+        self.num_connections += 1
         print(f"Adding Connection: {ws}")
         consumer_task = asyncio.create_task(self.recv_(ws))
-        done, pending = await asyncio.wait(
-            [consumer_task],
-            return_when=asyncio.FIRST_COMPLETED,
-        )
-        for task in pending:
-            task.cancel()
+        sender_task = asyncio.create_task(stream.run())
+        try:
+            # either task ends when the client goes away
+            done, pending = await asyncio.wait(
+                [consumer_task, sender_task],
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            for task in done:
+                if isinstance(task.exception(), asyncio.TimeoutError):
+                    print(f"Connection Timed Out: {ws}")
+                elif task.exception():
+                    print(f"Connection Failed: {ws} - {task.exception()!r}")
+        finally:
+            consumer_task.cancel()
+            sender_task.cancel()
+            # the other task can fail on the same closed connection before it is cancelled
+            await asyncio.gather(consumer_task, sender_task, return_exceptions=True)
+            del self.connections_[ws]
+            print(f"Removing Connection: {ws}")
 
     async def run(self):
         async with serve(lambda ws : self.handle(ws), self.host, self.port):
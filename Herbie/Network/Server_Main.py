@@ -39,6 +39,7 @@ def car_server_main():
             cell_size = data.get("cell_size", cell_size)
             current_path: list[Tuple[int, int]] = data.get("current_path", [])
             obstacles: list[Tuple[int, int]] = data.get("obstacles", [])
+            cleared_obstacles: list[Tuple[int, int]] = data.get("cleared_obstacles", [])
             position: Tuple[int, int] = data.get("position", ())
             heading: float = data.get("heading", -1)
             target: Tuple[int, int] = data.get("target", ())
@@ -50,10 +51,15 @@ def car_server_main():
             if map_size and car_map.shape != (map_size, map_size, 3):
                 print(f"Resizing map to: {(map_size, map_size, 3)}")
                 car_map = np.zeros((map_size, map_size, 3))
+            if data.get("obstacles_snapshot", False):
+                # obstacles holds the whole map instead of the changes since the last message
+                car_map = np.zeros(car_map.shape)
             if current_path:
                 state_updated |= write_to_map(car_map, previous_path, value=(0, 0, 0)) # type: ignore
                 state_updated |= write_to_map(car_map, current_path, value=(255, 0, 0)) # type: ignore
                 previous_path = current_path
+            # obstacles only holds the changes since the last message so the map accumulates them
+            state_updated |= write_to_map(car_map, cleared_obstacles, value=(0, 0, 0)) # type: ignore
             state_updated |= write_to_map(car_map, obstacles, value=(0, 255, 0)) # type: ignore
             state_updated |= write_to_map(car_map, [position], value=(0, 0, 255)) # type: ignore
             state_updated |= write_to_map(car_map, [target], value=(255, 255, 255)) # type: ignore
@@ -0,0 +1,185 @@
+from typing import Any, Dict, Tuple, Union
+import asyncio
+import time
+from collections import deque
+
+import numpy as np
+
+from Herbie.Network.Telemetry import Telemetry
+
+class Frame:
+    """
+        A camera frame shared by every client. Each quality level is encoded once, by
+        the first client that needs it, and every other client sends the same bytes.
+    """
+    # (share of the frame quality, image scale) from the best level to the worst
+    QUALITY_LEVELS = ((1.0, 1.0), (0.75, 1.0), (0.6, 0.75), (0.5, 0.5), (0.4, 0.25))
+
+    def __init__(self, image: np.ndarray, sequence: int, encoding: str, quality: int, timestamp: float) -> None:
+        # RGB image as returned by Camera.see
+        self.image = image
+        self.sequence = sequence
+        self.encoding = encoding
+        # the quality a client gets when it keeps up
+        self.quality = quality
+        # time.time() when the frame was captured
+        self.timestamp = timestamp
+        self.encoded_: Dict[int, "asyncio.Future[bytes]"] = {}
+
+    async def encode(self, level: int) -> bytes:
+        if level not in self.encoded_:
+            share, scale = self.QUALITY_LEVELS[level]
+            # encoding releases the GIL, so it runs off the event loop
+            self.encoded_[level] = asyncio.get_running_loop().run_in_executor(
+                None,
+                Telemetry.encode_frame,
+                self.image,
+                self.encoding,
+                int(self.quality * share),
+                self.sequence,
+                self.timestamp,
+                scale
+                )
+        # a client that goes away while waiting must not cancel it for the others
+        return await asyncio.shield(self.encoded_[level])
+
+
+class ClientStream:
+    """
+        Sends to one websocket client from its own task, so a slow client only delays
+        itself. Frames wait in a short queue that drops the oldest frame when full, so
+        a client that falls behind skips ahead to the latest one.
+
+        A client that acknowledges the frames it has drawn, by sending {"ack": sequence},
+        has at most max_in_flight frames on the way at a time, and the time until an
+        acknowledgement arrives measures how fast it takes frames. Other clients are
+        measured by how long sending a frame takes, which only grows once the network
+        buffers are full. When the client takes longer per frame than the time between
+        frames it gets smaller and lower quality frames, and better ones again once it
+        has room to spare.
+
+        A send that takes longer than send_timeout ends run with a TimeoutError, which
+        is how the server finds clients that are gone without closing the connection.
+    """
+    # frames sent between quality changes, so one slow send does not flip the level
+    QUALITY_HOLD_FRAMES = 10
+    # weight of the newest sample in the moving averages
+    SMOOTHING = 0.2
+    # a frame not acknowledged after this long is taken as lost
+    ACK_TIMEOUT = 1.0 # seconds
+
+    def __init__(
+            self,
+            ws: Any,
+            max_frames: int = 2,
+            max_messages: int = 16,
+            max_in_flight: int = 2,
+            send_timeout: float = 2.0
+            ) -> None:
+        self.ws = ws
+        self.send_timeout_ = send_timeout
+        self.max_in_flight_ = max_in_flight
+        # sequence -> (time sent, bytes) of frames not acknowledged yet
+        self.in_flight_: Dict[int, Tuple[float, int]] = {}
+        self.acknowledges_ = False
+        self.frames_: deque[Frame] = deque(maxlen=max_frames)
+        # already encoded messages, scalars are small so they go before any frame
+        self.messages_: deque[Union[str, bytes]] = deque(maxlen=max_messages)
+        self.ready_ = asyncio.Event()
+        self.level = 0
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self.bytes_sent = 0
+        # moving averages in seconds
+        self.frame_time_ = 0.0
+        self.frame_interval_ = 0.0
+        self.bytes_per_frame_ = 0.0
+        self.last_offer_: Union[float, None] = None
+        self.frames_at_level_ = 0
+
+    @property
+    def throughput(self) -> float:
+        # bytes per second the client has been taking frames at
+        return self.bytes_per_frame_ / max(self.frame_time_, 1e-6)
+
+    def offer_message(self, data: Union[str, bytes]) -> None:
+        self.messages_.append(data)
+        self.ready_.set()
+
+    def offer_frame(self, frame: Frame) -> None:
+        now = time.perf_counter()
+        if self.last_offer_ is not None:
+            self.frame_interval_ = self.smooth_(self.frame_interval_, now - self.last_offer_)
+        self.last_offer_ = now
+        if len(self.frames_) == self.frames_.maxlen:
+            self.frames_dropped += 1
+        self.frames_.append(frame)
+        self.ready_.set()
+
+    def acknowledge(self, sequence: int) -> None:
+        self.acknowledges_ = True
+        # frames sent before it were lost, they are not coming back
+        for older in [s for s in self.in_flight_ if s < sequence]:
+            del self.in_flight_[older]
+        if sequence in self.in_flight_:
+            sent, num_bytes = self.in_flight_.pop(sequence)
+            # with several frames on the way at once each one takes a share of the round trip
+            self.record_frame_(num_bytes, (time.perf_counter() - sent) / self.max_in_flight_)
+        self.ready_.set()
+
+    def can_send_frame_(self) -> bool:
+        if not self.frames_:
+            return False
+        if not self.acknowledges_ or len(self.in_flight_) < self.max_in_flight_:
+            return True
+        oldest = next(iter(self.in_flight_))
+        if time.perf_counter() - self.in_flight_[oldest][0] > self.ACK_TIMEOUT:
+            del self.in_flight_[oldest]
+            return True
+        return False
+
+    async def send_(self, data: Union[str, bytes]) -> None:
+        # a client that takes this long is gone, the timeout ends run and the connection
+        await asyncio.wait_for(self.ws.send(data), self.send_timeout_)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                # wake up now and then to give up on frames that were never acknowledged
+                await asyncio.wait_for(self.ready_.wait(), self.ACK_TIMEOUT)
+            except asyncio.TimeoutError:
+                pass
+            self.ready_.clear()
+            while self.messages_ or self.can_send_frame_():
+                if self.messages_:
+                    await self.send_(self.messages_.popleft())
+                    continue
+                frame = self.frames_.popleft()
+                data = await frame.encode(self.level)
+                start = time.perf_counter()
+                await self.send_(data)
+                self.frames_sent += 1
+                self.bytes_sent += len(data)
+                self.in_flight_[frame.sequence] = (start, len(data))
+                if not self.acknowledges_:
+                    self.record_frame_(len(data), time.perf_counter() - start)
+                    if len(self.in_flight_) > self.max_in_flight_:
+                        del self.in_flight_[next(iter(self.in_flight_))]
+
+    def record_frame_(self, num_bytes: int, frame_time: float) -> None:
+        self.frame_time_ = self.smooth_(self.frame_time_, frame_time)
+        self.bytes_per_frame_ = self.smooth_(self.bytes_per_frame_, num_bytes)
+        self.frames_at_level_ += 1
+        if self.frames_at_level_ < self.QUALITY_HOLD_FRAMES or self.frame_interval_ == 0.0:
+            return
+        if self.frame_time_ > self.frame_interval_ and self.level < len(Frame.QUALITY_LEVELS) - 1:
+            self.level += 1
+            self.frames_at_level_ = 0
+        elif self.frame_time_ < self.frame_interval_ / 2 and self.level > 0:
+            self.level -= 1
+            self.frames_at_level_ = 0
+
+    def smooth_(self, average: float, sample: float) -> float:
+        if average == 0.0:
+            return sample
+        return average + self.SMOOTHING * (sample - average)
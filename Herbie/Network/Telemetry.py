@@ -0,0 +1,89 @@
+from typing import Any, Dict, NamedTuple, Tuple, Union
+import json
+import struct
+import time
+
+import cv2
+import numpy as np
+
+class FrameHeader(NamedTuple):
+    version: int
+    encoding: int
+    width: int
+    height: int
+    # counts up with every frame so a client can tell how many it missed
+    sequence: int
+    # time.time() when the frame was encoded
+    timestamp: float
+
+
+class Telemetry:
+    """
+        The telemetry protocol between the car and the WebController dashboard. Scalar
+        fields like the speed go out as JSON text messages. Camera frames go out as
+        binary messages of a FrameHeader followed by the image, either raw RGB rows or
+        a JPEG or WebP file.
+    """
+    VERSION = 1
+    RAW_RGB = 0
+    JPEG = 1
+    WEBP = 2
+    ENCODINGS = {"raw": RAW_RGB, "jpeg": JPEG, "webp": WEBP}
+    # version, encoding, width, height, sequence, timestamp. Little endian so the
+    # browser can read it with a DataView.
+    HEADER = struct.Struct("<BBHHId")
+
+    @staticmethod
+    def encode_frame(
+            image: np.ndarray,
+            encoding: str = "jpeg",
+            quality: int = 80,
+            sequence: int = 0,
+            timestamp: Union[float, None] = None,
+            scale: float = 1.0
+            ) -> bytes:
+        """
+            image is an RGB image, as returned by Camera.see. quality goes from 0 to 100
+            and is ignored by raw frames. A scale below 1 shrinks the image first.
+        """
+        assert encoding in Telemetry.ENCODINGS, f"Unknown frame encoding: {encoding}"
+        image = np.ascontiguousarray(image, dtype=np.uint8)
+        if scale < 1.0:
+            height, width = image.shape[:2]
+            new_size = (max(int(width * scale), 1), max(int(height * scale), 1))
+            image = cv2.resize(image, new_size, interpolation=cv2.INTER_AREA) # type: ignore
+        height, width = image.shape[:2]
+        header = Telemetry.HEADER.pack(
+            Telemetry.VERSION,
+            Telemetry.ENCODINGS[encoding],
+            width,
+            height,
+            sequence & 0xFFFFFFFF,
+            time.time() if timestamp is None else timestamp
+            )
+        if encoding == "raw":
+            return header + image.tobytes()
+        # OpenCV encodes BGR images
+        bgr_image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR) # type: ignore
+        if encoding == "jpeg":
+            status, data = cv2.imencode(".jpg", bgr_image, [cv2.IMWRITE_JPEG_QUALITY, quality]) # type: ignore
+        else:
+            status, data = cv2.imencode(".webp", bgr_image, [cv2.IMWRITE_WEBP_QUALITY, max(quality, 1)]) # type: ignore
+        if not status:
+            print(f"Failed to encode frame as: {encoding}")
+            return b""
+        return header + data.tobytes()
+
+    @staticmethod
+    def decode_frame(data: bytes) -> Tuple[FrameHeader, np.ndarray]:
+        header = FrameHeader(*Telemetry.HEADER.unpack_from(data))
+        assert header.version == Telemetry.VERSION, f"Unsupported telemetry version: {header.version}"
+        payload = np.frombuffer(data, dtype=np.uint8, offset=Telemetry.HEADER.size)
+        if header.encoding == Telemetry.RAW_RGB:
+            return header, payload.reshape(header.height, header.width, 3)
+        image = cv2.imdecode(payload, cv2.IMREAD_COLOR) # type: ignore
+        return header, cv2.cvtColor(image, cv2.COLOR_BGR2RGB) # type: ignore
+
+    @staticmethod
+    def encode_scalars(message: Dict[str, Any]) -> str:
+        return json.dumps(message)
@@ -0,0 +1,5 @@
+from Herbie.Sim.World import *
+from Herbie.Sim.Devices import *
+from Herbie.Sim.Episode import *
+from Herbie.Sim.Runner import *
+from Herbie.Sim.Corpus import *
\ No newline at end of file
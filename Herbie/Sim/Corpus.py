@@ -0,0 +1,139 @@
+from typing import Iterable, List, NamedTuple
+
+import numpy as np
+import cv2
+
+from Herbie.CarNav.Mapp import Mapp, TiledMapp
+from Herbie.CMath.Api import Position
+
+class CorpusMap(NamedTuple):
+    kind: str
+    size: int
+    seed: int
+    # row = y and column = x, True where the car can not drive
+    blocked: np.ndarray
+    start: Position
+    target: Position
+
+    @property
+    def name(self) -> str:
+        return f"{self.kind}-{self.size}-{self.seed}"
+
+    def to_mapp(self, cell_size_in_cm: int = 10) -> Mapp:
+        mapp = Mapp(self.size, self.size, cell_size_in_cm)
+        ys, xs = np.nonzero(self.blocked)
+        mapp.add_obstacles_xy(list(zip(xs.tolist(), ys.tolist())))
+        return mapp
+
+    def to_tiled_mapp(self, cell_size_in_cm: int = 10, tile_size: int = 32) -> TiledMapp:
+        mapp = TiledMapp(self.size, self.size, cell_size_in_cm, tile_size)
+        ys, xs = np.nonzero(self.blocked)
+        mapp.add_obstacles_xy(list(zip(xs.tolist(), ys.tolist())))
+        return mapp
+
+
+class MapCorpus:
+    """
+        Seeded square maps for benchmarking planners. The same kind, size and seed
+        always give the same map. Every map starts at the top left corner and ends at
+        the bottom right one, both of which are kept open. Every kind except clutter
+        connects the two. Use odd sizes, because a maze only carves cells with odd 
+        coordinates and the corner cells (1, 1) and (size - 2, size - 2) are both odd
+        only when size is.
+    """
+    KINDS = ("clutter", "maze", "corridors", "open_field")
+
+    @staticmethod
+    def clutter(size: int, seed: int, obstacle_ratio: float = 0.2) -> np.ndarray:
+        rng = np.random.default_rng(seed)
+        return rng.random((size, size)) < obstacle_ratio
+
+    @staticmethod
+    def maze(size: int, seed: int) -> np.ndarray:
+        # depth first maze carved between the cells with odd coordinates
+        rng = np.random.default_rng(seed)
+        blocked = np.ones((size, size), dtype=np.bool_)
+        num_cells = (size - 1) // 2
+        if num_cells < 1:
+            return np.zeros((size, size), dtype=np.bool_)
+        visited = np.zeros((num_cells, num_cells), dtype=np.bool_)
+        directions = ((1, 0), (-1, 0), (0, 1), (0, -1))
+        stack = [(0, 0)]
+        visited[0, 0] = True
+        blocked[1, 1] = False
+        while stack:
+            x, y = stack[-1]
+            options = [
+                (x + dx, y + dy) for dx, dy in directions
+                if 0 <= x + dx < num_cells and 0 <= y + dy < num_cells and not visited[y + dy, x + dx]
+            ]
+            if not options:
+                stack.pop()
+                continue
+            next_x, next_y = options[int(rng.integers(len(options)))]
+            visited[next_y, next_x] = True
+            # open the cell and the wall between it and the one it was carved from
+            blocked[2 * next_y + 1, 2 * next_x + 1] = False
+            blocked[next_y + y + 1, next_x + x + 1] = False
+            stack.append((next_x, next_y))
+        return blocked
+
+    @staticmethod
+    def corridors(size: int, seed: int, corridor_width: int = 3) -> np.ndarray:
+        # walls across the map with a gap at alternating ends, so the path snakes back and forth
+        rng = np.random.default_rng(seed)
+        blocked = np.zeros((size, size), dtype=np.bool_)
+        gap = max(corridor_width, 1)
+        for i, y in enumerate(range(corridor_width + 1, size - 1, corridor_width + 1)):
+            blocked[y, :] = True
+            # the gap wanders a little so every seed gives a different map
+            offset = int(rng.integers(0, max(size // 10, 1)))
+            if i % 2 == 0:
+                blocked[y, size - gap - offset:size - offset] = False
+            else:
+                blocked[y, offset:offset + gap] = False
+        return blocked
+
+    @staticmethod
+    def open_field(size: int, seed: int, num_rectangles: int = 5, max_draws: int = 10) -> np.ndarray:
+        # mostly empty with a few large buildings
+        rng = np.random.default_rng(seed)
+        blocked = np.zeros((size, size), dtype=np.bool_)
+        for _ in range(num_rectangles):
+            # a building that cuts the corners apart is drawn again somewhere else
+            for _ in range(max_draws):
+                width, height = rng.integers(1, max(size // 5, 2), size=2)
+                x, y = rng.integers(0, max(size - width, 1)), rng.integers(0, max(size - height, 1))
+                with_rectangle = blocked.copy()
+                with_rectangle[y:y + height, x:x + width] = True
+                if MapCorpus.are_corners_connected(with_rectangle):
+                    blocked = with_rectangle
+                    break
+        return blocked
+
+    @staticmethod
+    def are_corners_connected(blocked: np.ndarray) -> bool:
+        # the start and target cells are opened by make, the car moves to any of its 8 neighbors
+        size = blocked.shape[0]
+        open_cells = (~blocked).astype(np.uint8)
+        open_cells[1, 1] = open_cells[size - 2, size - 2] = 1
+        _, labels = cv2.connectedComponents(open_cells, connectivity=8)
+        return bool(labels[1, 1] == labels[size - 2, size - 2])
+
+    @staticmethod
+    def make(kind: str, size: int, seed: int = 0) -> CorpusMap:
+        assert kind in MapCorpus.KINDS, f"Unknown map kind: {kind}"
+        blocked = getattr(MapCorpus, kind)(size, seed)
+        start = Position(1, 1, 0)
+        target = Position(size - 2, size - 2, 0)
+        for x, y, _ in [start, target]:
+            blocked[y, x] = False
+        return CorpusMap(kind, size, seed, blocked, start, target)
+
+    @staticmethod
+    def generate(
+            kinds: Iterable[str], sizes: Iterable[int], seeds: Iterable[int] = (0,)
+            ) -> List[CorpusMap]:
+        return [
+            MapCorpus.make(kind, size, seed) for kind in kinds for size in sizes for seed in seeds
+        ]
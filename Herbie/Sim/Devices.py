@@ -0,0 +1,247 @@
+from typing import Any, Tuple, Union
+import math as py_math
+
+import cv2
+import numpy as np
+
+from Herbie.Hardware.Base import BaseDriveTrain, BaseSensor, BaseCamera
+from Herbie.CarNav.Base import BaseDetector, DetectionResult, DetectedObject
+from Herbie.CMath.Api import Position
+from Herbie.Sim.World import World
+
+SPEED_OF_SOUND = 34_300 # centimeters per second
+
+class SimClock:
+    """
+        Simulated time. Devices add the time their actions would take instead of
+        sleeping, so an episode runs as fast as the code allows.
+    """
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class SimDriveTrain(BaseDriveTrain):
+    """
+        Kinematic car that has to accelerate up to and brake down from max_speed.
+        The car stops at the edge of a blocked cell instead of driving into it and
+        counts the collision. Noise is a fraction of every distance and angle driven.
+    """
+    RADIUS_FROM_MOTOR_TO_CENTER = 11.5 # centimeters
+    ROTATE_SPEED = 35.0 # centimeters per second at the wheels
+
+    def __init__(
+            self,
+            world: World,
+            position: Position,
+            clock: SimClock,
+            max_speed: float = 30.0,
+            acceleration: float = 60.0,
+            noise: float = 0.0,
+            seed: Union[int, None] = None
+            ):
+        self.world_ = world
+        # x and y in centimeters, angle in degrees
+        self.position = position
+        self.clock_ = clock
+        self.max_speed = max_speed
+        self.acceleration = acceleration
+        self.noise = noise
+        self.rng_ = np.random.default_rng(seed)
+        self.speed = 0.0
+        self.collisions = 0
+        self.distance_travelled = 0.0
+
+    def with_noise_(self, value: float) -> float:
+        if self.noise == 0:
+            return value
+        return value * (1 + self.rng_.normal(0, self.noise))
+
+    def drive_(self, centimeters: float, direction: int, stop: bool) -> None:
+        centimeters = self.with_noise_(centimeters)
+        x, y, angle = self.position
+        rads = py_math.radians(angle)
+        dx, dy = py_math.cos(rads) * direction, -py_math.sin(rads) * direction
+        step = self.world_.cell_size_in_cm / 4
+        travelled = 0.0
+        while travelled < centimeters:
+            next_travelled = min(travelled + step, centimeters)
+            if self.world_.is_blocked(x + dx * next_travelled, y + dy * next_travelled):
+                self.collisions += 1
+                stop = True
+                break
+            travelled = next_travelled
+        self.position = Position(x + dx * travelled, y + dy * travelled, angle)
+        self.distance_travelled += travelled
+        self.add_drive_time_(travelled)
+        if stop:
+            self.stop()
+
+    def add_drive_time_(self, centimeters: float) -> None:
+        # accelerate towards max_speed then cruise
+        accelerate_distance = (self.max_speed**2 - self.speed**2) / (2 * self.acceleration)
+        if accelerate_distance >= centimeters:
+            new_speed = py_math.sqrt(self.speed**2 + 2 * self.acceleration * centimeters)
+            self.clock_.sleep((new_speed - self.speed) / self.acceleration)
+            self.speed = new_speed
+        else:
+            self.clock_.sleep((self.max_speed - self.speed) / self.acceleration)
+            self.clock_.sleep((centimeters - accelerate_distance) / self.max_speed)
+            self.speed = self.max_speed
+
+    def turn_by_(self, degrees_to: float) -> None:
+        x, y, angle = self.position
+        self.position = Position(x, y, (angle + self.with_noise_(degrees_to)) % 360)
+
+    def stop(self) -> None:
+        self.clock_.sleep(self.speed / self.acceleration)
+        self.speed = 0.0
+
+    def forward_for(self, power: int, centimeters: float, stop: bool = True) -> None:
+        self.drive_(centimeters, 1, stop)
+
+    def backward_for(self, power: int, centimeters: float) -> None:
+        self.drive_(centimeters, -1, True)
+
+    def rotate(self, degrees_to: float):
+        self.stop()
+        self.turn_by_(degrees_to)
+        self.clock_.sleep(py_math.radians(abs(degrees_to)) * self.RADIUS_FROM_MOTOR_TO_CENTER / self.ROTATE_SPEED)
+
+    # the simulation only moves the car in whole motions
+    def forward(self, power: int) -> None:
+        pass
+
+    def backward(self, power: int) -> None:
+        pass
+
+    def turn_left(self, power: int) -> None:
+        pass
+
+    def turn_right(self, power: int) -> None:
+        pass
+
+    def shutdown(self) -> None:
+        self.stop()
+
+    @property
+    def get_left_rear_speed(self) -> Union[int, float]: # speed in centimeters per second
+        return self.speed
+    @property
+    def get_right_rear_speed(self) -> Union[int, float]: # speed in centimeters per second
+        return self.speed
+    @property
+    def get_avg_speed(self) -> float:
+        return self.speed
+
+
+class SimUltraSonic(BaseSensor):
+    """
+        Ultrasonic sensor on a servo that casts a single ray through the world from
+        where the simulated car is. noise is the standard deviation in centimeters.
+    """
+    MAX_DISTANCE = 400 # centimeters, the same range as UltraSonic
+    PING_DELAY = 0.01 # UltraSonic waits this long before every ping
+
+    def __init__(
+            self,
+            world: World,
+            drive_train: SimDriveTrain,
+            clock: SimClock,
+            noise: float = 0.0,
+            seed: Union[int, None] = None
+            ):
+        self.world_ = world
+        self.drive_train_ = drive_train
+        self.clock_ = clock
+        self.noise = noise
+        self.rng_ = np.random.default_rng(seed)
+        self.sensor_angle_ = 0.0
+
+    def get_distance(self) -> float:
+        x, y, angle = self.drive_train_.position
+        distance = self.world_.cast_ray(x, y, angle + self.sensor_angle_, self.MAX_DISTANCE)
+        if distance is None:
+            self.clock_.sleep(self.PING_DELAY + 2 * self.MAX_DISTANCE / SPEED_OF_SOUND)
+            return -1
+        self.clock_.sleep(self.PING_DELAY + 2 * distance / SPEED_OF_SOUND)
+        if self.noise:
+            distance = max(distance + self.rng_.normal(0, self.noise), 0.0)
+        return round(distance, 2)
+
+    def move_sensor_to(self, angle: float) -> bool:
+        self.clock_.sleep(self.track_sensor_move_(angle))
+        return True
+
+    def shutdown(self) -> None:
+        pass
+
+
+class SimCamera(BaseCamera):
+    """
+        Renders every stop sign in the field of view as a red disk on a gray image,
+        left of center when the sign is to the left and larger the closer it is.
+    """
+    STOP_SIGN_RADIUS = 10 # centimeters
+
+    def __init__(
+            self,
+            world: World,
+            drive_train: SimDriveTrain,
+            width: int = 320,
+            height: int = 320,
+            field_of_view: float = 60.0,
+            max_range_in_cm: float = 150.0
+            ):
+        self.world_ = world
+        self.drive_train_ = drive_train
+        self.width_ = width
+        self.height_ = height
+        self.field_of_view = field_of_view
+        self.max_range_in_cm = max_range_in_cm
+
+    def is_camera_available(self) -> bool:
+        return True
+
+    def see(self) -> Tuple[bool, Any]:
+        image = np.full((self.height_, self.width_, 3), 127, dtype=np.uint8)
+        x, y, angle = self.drive_train_.position
+        focal_length = (self.width_ / 2) / py_math.tan(py_math.radians(self.field_of_view / 2))
+        for sign_x, sign_y in self.world_.stop_signs:
+            distance = py_math.hypot(sign_x - x, sign_y - y)
+            # degrees to the left of where the car is facing, y grows downward
+            bearing = (py_math.degrees(py_math.atan2(-(sign_y - y), sign_x - x)) - angle + 180) % 360 - 180
+            if distance > self.max_range_in_cm or abs(bearing) > self.field_of_view / 2:
+                continue
+            wall = self.world_.cast_ray(x, y, angle + bearing, distance)
+            if wall is not None and wall < distance - self.world_.cell_size_in_cm:
+                continue
+            column = int(self.width_ / 2 - focal_length * py_math.tan(py_math.radians(bearing)))
+            radius = max(int(focal_length * self.STOP_SIGN_RADIUS / max(distance, 1.0)), 1)
+            cv2.circle(image, (column, self.height_ // 2), radius, (255, 0, 0), -1) # type: ignore
+        return True, image
+
+    def shutdown(self) -> None:
+        pass
+
+
+class SimDetector(BaseDetector):
+    # share of the image that has to be red for a score of 1
+    FULL_SCORE_RED_FRACTION = 0.01
+
+    def __init__(self, camera: BaseCamera):
+        self.camera_ = camera
+
+    def detect(self) -> DetectionResult:
+        status, image = self.camera_.see()
+        red = (image[:, :, 0] > 200) & (image[:, :, 1] < 60) & (image[:, :, 2] < 60)
+        score = min(float(red.mean()) / self.FULL_SCORE_RED_FRACTION, 1.0)
+        if score == 0:
+            return DetectionResult(status, [])
+        return DetectionResult(status, [DetectedObject(score, "stop sign")])
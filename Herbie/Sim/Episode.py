@@ -0,0 +1,98 @@
+from typing import Any, NamedTuple, Tuple, Union
+import math as py_math
+
+from Herbie.CarNav.Controllers import AutonomousController
+from Herbie.CMath.Api import Position
+from Herbie.Sim.World import World
+from Herbie.Sim.Devices import SimClock, SimDriveTrain, SimUltraSonic, SimCamera, SimDetector
+
+class EpisodeResult(NamedTuple):
+    # the true position of the car ended on the target cell
+    reached_target: bool
+    steps: int
+    # seconds the drive would have taken on the car
+    sim_time: float
+    collisions: int
+    distance_travelled: float
+    # seconds the controller spent planning and how often it planned after the first path
+    planning_time: float
+    replans: int
+
+
+class Episode:
+
+    @staticmethod
+    def make_controller(
+            world: World,
+            target: Position,
+            start: Union[Position, None] = None,
+            noise: float = 0.0,
+            seed: Union[int, None] = None,
+            sensor_noise: float = 0.0,
+            **controller_kwargs: Any
+            ) -> Tuple[AutonomousController, SimDriveTrain, SimClock]:
+        """
+            AutonomousController driving the simulated devices from the start cell, by
+            default the center of the map. The world has to be square and as big as the
+            map the controller builds. noise is passed to the drive train and sensor_noise,
+            the standard deviation of every distance reading in centimeters, to the sensor.
+        """
+        assert world.num_columns == world.num_rows, "The controller only builds square maps"
+        if start is None:
+            start = Position(world.num_columns // 2, world.num_rows // 2, 0)
+        clock = SimClock()
+        drive_train = SimDriveTrain(
+            world,
+            Position(start.x * world.cell_size_in_cm, start.y * world.cell_size_in_cm, start.angle),
+            clock,
+            noise=noise,
+            seed=seed
+            )
+        sensor = SimUltraSonic(world, drive_train, clock, noise=sensor_noise, seed=seed)
+        detector = SimDetector(SimCamera(world, drive_train)) if world.stop_signs else None
+        controller = AutonomousController(
+            world.num_columns,
+            world.cell_size_in_cm, # type: ignore
+            target,
+            drive_train,
+            sensor,
+            detector=detector,
+            sleep=clock.sleep,
+            start=start,
+            **controller_kwargs
+            )
+        return controller, drive_train, clock
+
+    @staticmethod
+    def run(
+            world: World,
+            target: Position,
+            start: Union[Position, None] = None,
+            max_steps: int = 1000,
+            noise: float = 0.0,
+            seed: Union[int, None] = None,
+            sensor_noise: float = 0.0,
+            **controller_kwargs: Any
+            ) -> EpisodeResult:
+        controller, drive_train, clock = Episode.make_controller(
+            world, target, start, noise, seed, sensor_noise, **controller_kwargs
+            )
+        steps = 0
+        for _ in controller.drive():
+            steps += 1
+            if steps >= max_steps:
+                break
+        controller.shutdown()
+        x, y, _ = drive_train.position
+        reached_target = py_math.hypot(
+            x - target.x * world.cell_size_in_cm, y - target.y * world.cell_size_in_cm
+            ) < world.cell_size_in_cm / 2
+        return EpisodeResult(
+            reached_target,
+            steps,
+            clock.time(),
+            drive_train.collisions,
+            drive_train.distance_travelled,
+            controller.planning_time_,
+            max(controller.num_plans_ - 1, 0)
+            )
@@ -0,0 +1,134 @@
+from typing import Any, Dict, Iterable, List, NamedTuple, Tuple, Union
+import multiprocessing
+
+import numpy as np
+
+from Herbie.CMath.Api import Position
+from Herbie.Sim.World import World
+from Herbie.Sim.Episode import Episode, EpisodeResult
+
+class EpisodeSpec(NamedTuple):
+    # the world is rebuilt from its seed in the worker instead of being sent to it
+    seed: int
+    map_size: int
+    cell_size: int
+    obstacle_ratio: float
+    start: Tuple[int, int]
+    target: Tuple[int, int]
+    max_steps: int
+    controller_kwargs: Dict[str, Any]
+
+    def make_world(self) -> World:
+        return World.random(
+            self.map_size,
+            self.map_size,
+            self.cell_size,
+            self.obstacle_ratio,
+            seed=self.seed,
+            keep_clear=[Position(*self.start, 0), Position(*self.target, 0)]
+            )
+
+
+class BatchRunner:
+    """
+        Runs many simulated episodes on a process pool and collects the results into
+        columns, one numpy array per field, so runs with different planners or map
+        settings can be compared with a few array operations.
+    """
+    # a random start and target are at least this many cells apart
+    MIN_START_TARGET_DISTANCE = 5
+
+    @staticmethod
+    def random_specs(
+            num_episodes: int,
+            map_size: int,
+            cell_size: int,
+            obstacle_ratio: float = 0.1,
+            seed: int = 0,
+            max_steps: int = 300,
+            **controller_kwargs: Any
+            ) -> List[EpisodeSpec]:
+        specs: List[EpisodeSpec] = []
+        # Every episode gets its own child of the seed, so batches with different seeds 
+        # never share worlds, whatever their number of episodes.
+        for episode_seed in np.random.SeedSequence(seed).spawn(num_episodes):
+            rng = np.random.default_rng(episode_seed)
+            # targets on the edge can not be kept clear on every side
+            start = tuple(int(v) for v in rng.integers(1, map_size - 1, size=2))
+            target = start
+            while max(abs(target[0] - start[0]), abs(target[1] - start[1])) < BatchRunner.MIN_START_TARGET_DISTANCE:
+                target = tuple(int(v) for v in rng.integers(1, map_size - 1, size=2))
+            specs.append(EpisodeSpec(
+                # the world and the simulated devices are seeded with a plain int
+                int(episode_seed.generate_state(1)[0]),
+                map_size,
+                cell_size,
+                obstacle_ratio,
+                start, # type: ignore
+                target, # type: ignore
+                max_steps,
+                controller_kwargs
+                ))
+        return specs
+
+    @staticmethod
+    def run_spec(spec: EpisodeSpec) -> EpisodeResult:
+        return Episode.run(
+            spec.make_world(),
+            Position(*spec.target, 0),
+            start=Position(*spec.start, 0),
+            max_steps=spec.max_steps,
+            seed=spec.seed,
+            **spec.controller_kwargs
+            )
+
+    @staticmethod
+    def run(
+            specs: List[EpisodeSpec], processes: Union[int, None] = None, chunksize: int = 4
+            ) -> Dict[str, np.ndarray]:
+        """
+            Runs every spec and returns the columns of the results in the order of specs.
+            processes=None uses every core and processes=1 runs in this process.
+        """
+        if processes == 1:
+            results: Iterable[EpisodeResult] = [BatchRunner.run_spec(spec) for spec in specs]
+        else:
+            with multiprocessing.Pool(processes) as pool:
+                results = pool.map(BatchRunner.run_spec, specs, chunksize=chunksize)
+        return BatchRunner.to_columns(specs, list(results))
+
+    @staticmethod
+    def to_columns(specs: List[EpisodeSpec], results: List[EpisodeResult]) -> Dict[str, np.ndarray]:
+        columns = {
+            "seed": np.array([spec.seed for spec in specs], dtype=np.int64),
+            "map_size": np.array([spec.map_size for spec in specs], dtype=np.int64),
+            "cell_size": np.array([spec.cell_size for spec in specs], dtype=np.int64),
+            "obstacle_ratio": np.array([spec.obstacle_ratio for spec in specs], dtype=np.float64),
+            "start": np.array([spec.start for spec in specs], dtype=np.int64).reshape(-1, 2),
+            "target": np.array([spec.target for spec in specs], dtype=np.int64).reshape(-1, 2)
+        }
+        for field in EpisodeResult._fields:
+            columns[field] = np.array([getattr(result, field) for result in results])
+        return columns
+
+    @staticmethod
+    def save(path: str, columns: Dict[str, np.ndarray]) -> None:
+        np.savez_compressed(path, **columns)
+
+    @staticmethod
+    def load(path: str) -> Dict[str, np.ndarray]:
+        with np.load(path) as data:
+            return {name: data[name] for name in data.files}
+
+    @staticmethod
+    def summary(columns: Dict[str, np.ndarray]) -> Dict[str, float]:
+        reached = columns["reached_target"]
+        return {
+            "episodes": float(len(reached)),
+            "success_rate": float(reached.mean()) if len(reached) else 0.0,
+            "mean_planning_ms": float(columns["planning_time"].mean() * 1000) if len(reached) else 0.0,
+            "mean_replans": float(columns["replans"].mean()) if len(reached) else 0.0,
+            # only successful episodes have a path length worth comparing
+            "mean_path_length": float(columns["distance_travelled"][reached].mean()) if reached.any() else 0.0,
+            "collisions": float(columns["collisions"].sum())
+        }
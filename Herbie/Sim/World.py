@@ -0,0 +1,82 @@
+from typing import List, Tuple, Union
+import math as py_math
+
+import numpy as np
+
+from Herbie.CMath.Api import Position
+
+class World:
+    """
+        Ground truth for the simulator. Cells line up with the cells of a Mapp of the
+        same size, cell (x, y) covers the square of cell_size_in_cm centered on
+        (x * cell_size_in_cm, y * cell_size_in_cm) with y growing downward.
+    """
+
+    def __init__(self, num_columns: int, num_rows: int, cell_size_in_cm: float):
+        self.num_columns = num_columns
+        self.num_rows = num_rows
+        self.cell_size_in_cm = cell_size_in_cm
+        self.blocked_ = np.zeros((num_rows, num_columns), dtype=np.bool_)
+        # (x, y) in centimeters
+        self.stop_signs: List[Tuple[float, float]] = []
+
+    @staticmethod
+    def random(
+            num_columns: int,
+            num_rows: int,
+            cell_size_in_cm: float,
+            obstacle_ratio: float = 0.1,
+            seed: Union[int, None] = None,
+            keep_clear: Union[List[Position], None] = None
+            ) -> "World":
+        """
+            World with obstacle_ratio of its cells blocked at random. Cells within one
+            cell of any position in keep_clear stay open.
+        """
+        rng = np.random.default_rng(seed)
+        world = World(num_columns, num_rows, cell_size_in_cm)
+        world.blocked_ = rng.random((num_rows, num_columns)) < obstacle_ratio
+        for x, y, _ in keep_clear or []:
+            world.blocked_[max(int(y) - 1, 0):int(y) + 2, max(int(x) - 1, 0):int(x) + 2] = False
+        return world
+
+    def add_obstacles_xy(self, cells: List[Tuple[int, int]]) -> None:
+        for x, y in cells:
+            self.blocked_[y, x] = True
+
+    def is_blocked_cell(self, x: int, y: int) -> bool:
+        # outside the world counts as a wall
+        if not (0 <= x < self.num_columns and 0 <= y < self.num_rows):
+            return True
+        return bool(self.blocked_[y, x])
+
+    def is_blocked(self, x_in_cm: float, y_in_cm: float) -> bool:
+        return self.is_blocked_cell(
+            round(x_in_cm / self.cell_size_in_cm), round(y_in_cm / self.cell_size_in_cm)
+            )
+
+    def cast_ray(
+            self, x_in_cm: float, y_in_cm: float, angle: float, max_range_in_cm: float
+            ) -> Union[float, None]:
+        """
+            Distance in centimeters from (x, y) to the center of the first blocked cell
+            in the direction angle (degrees, 90 = up) or None if there is nothing within
+            max_range_in_cm. The center and not the face of the cell is used because Mapp
+            marks the cell a reading lands in, the face of a cell seen at an angle is
+            often closer to one of its open neighbors.
+        """
+        rads = py_math.radians(angle)
+        dx, dy = py_math.cos(rads), -py_math.sin(rads)
+        # a quarter cell per step can not jump over a cell
+        step = self.cell_size_in_cm / 4
+        distance = step
+        while distance <= max_range_in_cm:
+            cell_x = round((x_in_cm + dx * distance) / self.cell_size_in_cm)
+            cell_y = round((y_in_cm + dy * distance) / self.cell_size_in_cm)
+            if self.is_blocked_cell(cell_x, cell_y):
+                center_distance = py_math.hypot(
+                    cell_x * self.cell_size_in_cm - x_in_cm, cell_y * self.cell_size_in_cm - y_in_cm
+                    )
+                return center_distance if center_distance <= max_range_in_cm else None
+            distance += step
+        return None
@@ -1,4 +1,10 @@
-from Herbie.CMath.Math import Math, Position
+import math
+import pickle
+
+import numpy as np
+
+from Herbie.CMath.Math import Math, Position, PositionArray
+from Herbie.CMath.GridMotion import GridMotion, HEADING_OFFSETS
 from Tests.utils import *
 
 
@@ -56,4 +62,83 @@ def test_calc_new_heading():
     ]
     for current, turn_angle, expected in current_new:
         new_heading = Math.calc_new_heading(current, turn_angle)
-        assert expected == new_heading, f"Expected: {expected} != New: {new_heading} Current: {current} Turn Angle: {turn_angle}"
\ No newline at end of file
+        assert expected == new_heading, f"Expected: {expected} != New: {new_heading} Current: {current} Turn Angle: {turn_angle}"
+
+def legacy_calc_turning_angle(origin: Position, target: Position, should_round=False) -> float:
+    # the np.array based implementation calc_turning_angle replaced
+    origin_dir = Math.project_position(origin.clone(0, 0), scaled_distance=1, flip_y=True, should_round=True)
+    va = np.array([origin_dir.x, origin_dir.y])
+    vb = np.array([target.x - origin.x, target.y - origin.y])
+    amag = math.sqrt(np.dot(va, va))
+    bmag = math.sqrt(np.dot(vb, vb))
+    cross_v = -round(float(va[0] / amag * vb[1] / bmag - va[1] / amag * vb[0] / bmag))
+    unsigned_angle = math.degrees(math.acos(np.dot(va, vb) / (amag * bmag)))
+    if cross_v != 0:
+        unsigned_angle *= cross_v
+    if should_round:
+        unsigned_angle = round(unsigned_angle)
+    return unsigned_angle
+
+
+def test_turning_angle_fast_path():
+    rng = np.random.default_rng(0)
+    grid_cases = [
+        (Position(3, 4, heading), Position(3 + dx, 4 + dy))
+        for heading in range(0, 360, 45) for dx in range(-5, 6) for dy in range(-5, 6) if dx or dy
+    ]
+    float_cases = [
+        (Position(*rng.uniform(-50, 50, 2).tolist(), 45 * int(rng.integers(0, 8))), Position(*rng.uniform(-50, 50, 2).tolist()))
+        for _ in range(500)
+    ]
+    for origin, target in grid_cases:
+        assert Math.calc_turning_angle(origin, target) == legacy_calc_turning_angle(origin, target)
+    for origin, target in grid_cases + float_cases:
+        assert Math.calc_turning_angle(origin, target, True) == legacy_calc_turning_angle(origin, target, True)
+
+    cases = grid_cases + float_cases
+    origins = np.array([tuple(origin) for origin, _ in cases])
+    targets = np.array([target.xy_tuple() for _, target in cases])
+    expected = np.array([legacy_calc_turning_angle(origin, target) for origin, target in cases])
+    assert np.allclose(Math.calc_turning_angles(origins, targets), expected, rtol=0, atol=1e-9)
+    expected = np.array([legacy_calc_turning_angle(origin, target, True) for origin, target in cases])
+    assert (Math.calc_turning_angles(origins, targets, should_round=True) == expected).all()
+
+
+def test_grid_motion():
+    # every table entry must match what Math computes for the same move
+    for heading in list(range(0, 360, 45)) + [30, 100, 359.5]:
+        for dx, dy in HEADING_OFFSETS:
+            origin = Position(5, 5, heading)
+            target = Position(5 + dx, 5 + dy)
+            turning_angle = Math.calc_turning_angle(origin, target, should_round=True)
+            assert GridMotion.turning_angle(heading, dx, dy) == turning_angle
+            assert GridMotion.new_heading(heading, dx, dy) == Math.calc_new_heading_from_position(origin, target)
+            assert GridMotion.turn_cost(heading, dx, dy) == abs(turning_angle) / 45
+    # moves longer than one cell fall back to Math
+    assert GridMotion.turning_angle(0, 3, 3) == TURN_HALF_RIGHT
+
+
+def test_position_array():
+    positions = [Position(1, 2), Position(3, 4, 90), Position(5, 6, 180)]
+    array = PositionArray.from_positions(positions)
+    assert len(array) == 3 and array.data_.shape == (3, 3)
+    assert array.to_positions() == positions and list(array) == positions
+    assert array[1] == Position(3, 4, 90)
+    assert array[1:].to_positions() == positions[1:]
+    assert array.xy_tuples() == [(1, 2), (3, 4), (5, 6)]
+    assert array.xy_shift(10, -1).xy_tuples() == [(11, 1), (13, 3), (15, 5)]
+    assert PositionArray(np.array([[1.4, 2.6]])).xy_round().to_positions() == [Position(1, 3)]
+    assert len(PositionArray()) == 0 and PositionArray().to_positions() == []
+    # Position unpacks, compares and hashes like the frozen dataclass it replaced
+    x, y, angle = positions[1]
+    assert (x, y, angle) == (3, 4, 90) and len({Position(1, 2), Position(1, 2, 0)}) == 1
+    assert Position(1, 2) != Position(1, 2, 90) and hash(Position(1, 2)) == hash(Position(1, 2, 0))
+    assert Position(5, 5) != (5, 5, 0) and (5, 5, 0) != Position(5, 5)
+    assert repr(Position(1, 2)) == "Position(x=1, y=2, angle=0)"
+    assert pickle.loads(pickle.dumps(Position(1, 2, 90))) == Position(1, 2, 90)
+    for operation in [lambda p : p + p, lambda p : p < p, lambda p : p[0], lambda p : setattr(p, "x", 3)]:
+        try:
+            operation(Position(1, 2))
+        except (TypeError, AttributeError):
+            continue
+        assert False, "Position behaves like a tuple"
@@ -1,6 +1,240 @@
-from Herbie.CarNav.Api import Car, AutonomousController
+import json
+from typing import List, Tuple
 
+from Herbie.CarNav.Api import Car, AutonomousController, PathExecutor
+from Herbie.CarNav.DStarLite import DStarLite
+from Herbie.CarNav.Base import BaseDetector, DetectionResult, DetectedObject
+from Herbie.Hardware.Base import BaseSensor
+from Herbie.Hardware.DriveTrain import MockDriveTrain
+from Herbie.CMath.Api import Position
+from Tests.utils import *
+
+
+class FixedSensor(BaseSensor):
+    def __init__(self, distance: float):
+        self.distance = distance
+
+    def get_distance(self) -> float:
+        return self.distance
+
+    def move_sensor_to(self, angle: float) -> bool:
+        return True
+
+    def shutdown(self) -> None:
+        pass
 
 
 def test_car():
-    pass
\ No newline at end of file
+    pass
+
+
+def test_log_data():
+    controller = AutonomousController(11, 10, Position(9, 5), MockDriveTrain(), FixedSensor(20))
+    log_data = controller.get_log_data()
+    assert log_data["obstacles"] == [] and log_data["position"] == (5, 5)
+    controller.scan_update_path_()
+    log_data = controller.get_log_data()
+    assert log_data["obstacles"] == [(7, 5)]
+    assert log_data["current_path"] and log_data["current_path"][-1] == (9, 5)
+    # nothing changed so no obstacles are sent again
+    assert controller.get_log_data()["obstacles"] == []
+    json.dumps(log_data)
+    # a server that connects now gets every obstacle already in the map
+    log_data = controller.get_log_data(snapshot=True)
+    assert log_data["obstacles"] == [(7, 5)] and log_data["obstacles_snapshot"]
+    assert controller.get_log_data()["obstacles"] == []
+
+
+def test_change_log_resync():
+    controller = AutonomousController(
+        11, 10, Position(9, 5), MockDriveTrain(), FixedSensor(20), incremental_planning=True
+        )
+    controller.mapp_.MAX_CHANGE_LOG = 2
+    controller.find_path_()
+    controller.get_log_data()
+    # more changes than the map keeps, the planner and the log both start over from the map
+    controller.mapp_.add_obstacles_xy([(7, 4), (7, 5), (7, 6), (1, 1)])
+    path = controller.find_path_()
+    assert path == DStarLite(controller.mapp_, Position(9, 5)).plan(controller.car_position)
+    assert all(controller.mapp_.is_open(x, y) for x, y, _ in path)
+    log_data = controller.get_log_data()
+    assert log_data["obstacles_snapshot"] and sorted(log_data["obstacles"]) == [(1, 1), (7, 4), (7, 5), (7, 6)]
+    assert controller.get_log_data()["obstacles"] == []
+
+
+class SweepSensor(FixedSensor):
+    def __init__(self, readings: List[Tuple[float, float]]):
+        super(SweepSensor, self).__init__(-1)
+        self.readings = readings
+
+    def scan_iter(self, from_degrees, to_degrees, num_steps, samples_per_step=2):
+        yield from self.readings
+
+
+def test_sweep_added_as_one_batch():
+    # the first reading hits (8, 5) and the other beams pass through it on their way out
+    sensor = SweepSensor([(0, 30), (3, 60), (-3, 60), (2, 60)])
+    controller = AutonomousController(
+        21, 10, Position(15, 5), MockDriveTrain(), sensor, occupancy_grid=True, scan_num_steps=5,
+        start=Position(5, 5, 0)
+        )
+    controller.scan_update_path_()
+    assert not controller.mapp_.is_open(8, 5)
+    assert Position(8, 5) not in controller.current_path_
+
+
+class ReconnectingClient:
+    def __init__(self):
+        self.num_connections = 1
+        self.messages: List[dict] = []
+
+    def connect(self) -> "ReconnectingClient":
+        return self
+
+    def send(self, data: dict) -> None:
+        self.messages.append(data)
+
+    def shutdown(self) -> None:
+        pass
+
+
+def test_car_snapshot_on_connect():
+    controller = AutonomousController(11, 10, Position(9, 5), MockDriveTrain(), FixedSensor(20))
+    client = ReconnectingClient()
+    car = Car(controller, client) # type: ignore
+    controller.scan_update_path_()
+    car.send_server_data_()
+    car.send_server_data_()
+    # the server went away and the client connected to a new one
+    client.num_connections += 1
+    car.send_server_data_()
+    assert [message["obstacles_snapshot"] for message in client.messages] == [True, False, True]
+    assert [message["obstacles"] for message in client.messages] == [[(7, 5)], [], [(7, 5)]]
+
+
+def test_rejected_options():
+    for options in [
+            {"tile_size": 16, "car_radius_in_cm": 10},
+            {"tile_size": 16, "occupancy_grid": True},
+            {"tile_size": 16, "incremental_planning": True},
+            {"pathfinding_method": "dijkstra"},
+            {"pathfinding_method": "jump_point_search", "incremental_planning": True},
+            {"pathfinding_method": "jump_point_search", "tile_size": 16},
+            {"pathfinding_method": "jump_point_search", "planning_time_budget": 0.1},
+            {"pathfinding_method": "jump_point_search", "car_radius_in_cm": 10}
+            ]:
+        try:
+            AutonomousController(64, 10, Position(60, 60), MockDriveTrain(), FixedSensor(20), **options)
+        except AssertionError:
+            continue
+        assert False, f"{options} was accepted"
+    controller = AutonomousController(
+        64, 10, Position(60, 60), MockDriveTrain(), FixedSensor(20), car_radius_in_cm=10,
+        pathfinding_method="a_star_array"
+        )
+    assert controller.find_path_()[-1].xy_compare(Position(60, 60))
+
+
+def test_unreachable_target():
+    for continuous_motion in [False, True]:
+        controller = AutonomousController(
+            11, 10, Position(9, 5), MockDriveTrain(), FixedSensor(-1), continuous_motion=continuous_motion
+            )
+        # a wall around the target
+        controller.mapp_.add_obstacles_xy([(x, y) for x in range(8, 11) for y in range(4, 7) if (x, y) != (9, 5)])
+        drive = controller.drive()
+        for i, _ in enumerate(drive):
+            assert i < 5, "Car kept planning for an unreachable target"
+        assert controller.car_position.xy_compare(Position(5, 5))
+
+
+class RecordingDriveTrain(MockDriveTrain):
+    def __init__(self):
+        super(RecordingDriveTrain, self).__init__()
+        self.motions: List[Tuple[str, float, bool]] = []
+        self.moving = False
+
+    def stop(self) -> None:
+        self.moving = False
+
+    def forward_for(self, power: int, centimeters: float, stop: bool = True) -> None:
+        self.motions.append(("forward", centimeters, stop))
+        self.moving = not stop
+
+    def rotate(self, degrees_to: float):
+        self.motions.append(("rotate", degrees_to, True))
+        self.moving = False
+
+
+def test_plan_segments():
+    path = [Position(6, 5), Position(7, 5), Position(8, 4), Position(8, 3), Position(8, 2)]
+    segments = PathExecutor.plan_segments(Position(5, 5, LOOKING_FULL_RIGHT), path, 10)
+    assert [segment.cells for segment in segments] == [path[:2], path[2:3], path[3:]]
+    assert [segment.turning_angle for segment in segments] == [0, TURN_HALF_LEFT, TURN_HALF_LEFT]
+    assert segments[0].length == 20 and segments[2].heading == LOOKING_FULL_UP
+
+
+def test_continuous_motion():
+    drive_trains = []
+    for continuous_motion in [False, True]:
+        drive_train = RecordingDriveTrain()
+        controller = AutonomousController(
+            21, 10, Position(16, 7), drive_train, FixedSensor(-1), continuous_motion=continuous_motion
+            )
+        for i, _ in enumerate(controller.drive()):
+            assert i < 100, "Car did not reach the target"
+            # the car never waits on the caller with the motors running
+            assert not drive_train.moving
+        assert controller.car_position.xy_compare(Position(16, 7))
+        drive_trains.append(drive_train)
+    stop_and_go, continuous = drive_trains
+    # every cell ends in a stop without continuous motion
+    assert all(stop for _, _, stop in stop_and_go.motions)
+    assert sum(stop for _, _, stop in continuous.motions) < sum(stop for _, _, stop in stop_and_go.motions)
+    assert ("forward", 10, False) in continuous.motions and continuous.motions[-1][2]
+    # turns, even 45 degree ones, are made in place after stopping
+    for before, motion in zip(continuous.motions, continuous.motions[1:]):
+        assert motion[0] != "rotate" or before[2]
+
+
+class RecordingSensor(FixedSensor):
+    def __init__(self, distance: float, drive_train: RecordingDriveTrain):
+        super(RecordingSensor, self).__init__(distance)
+        self.drive_train = drive_train
+        # (sensor angle, whether the car was moving) for every reading
+        self.readings: List[Tuple[float, bool]] = []
+
+    def get_distance_at(self, degrees_to: float) -> Tuple[float, float]:
+        self.readings.append((degrees_to, self.drive_train.moving))
+        return super(RecordingSensor, self).get_distance_at(degrees_to)
+
+
+def test_continuous_motion_sweeps_when_stopped():
+    drive_train = RecordingDriveTrain()
+    sensor = RecordingSensor(-1, drive_train)
+    controller = AutonomousController(
+        21, 10, Position(16, 7), drive_train, sensor, scan_num_steps=5, continuous_motion=True
+        )
+    for i, _ in enumerate(controller.drive()):
+        assert i < 100, "Car did not reach the target"
+    # only the reading straight ahead is taken while the motors run
+    assert any(moving for _, moving in sensor.readings)
+    assert all(angle == 0 for angle, moving in sensor.readings if moving)
+    assert any(angle != 0 for angle, _ in sensor.readings)
+
+
+class StopSignDetector(BaseDetector):
+    def detect(self) -> DetectionResult:
+        return DetectionResult(True, [DetectedObject(0.9, "stop sign")])
+
+
+def test_stop_sign_stops_the_car():
+    drive_train = RecordingDriveTrain()
+    moving_while_waiting = []
+    controller = AutonomousController(
+        21, 10, Position(16, 7), drive_train, FixedSensor(-1), detector=StopSignDetector(),
+        continuous_motion=True, sleep=lambda seconds : moving_while_waiting.append(drive_train.moving)
+        )
+    drive_train.forward_for(50, 10, stop=False)
+    controller.see_objects_()
+    assert moving_while_waiting == [False]
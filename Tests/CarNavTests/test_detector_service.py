@@ -0,0 +1,108 @@
+import time
+
+from Herbie.CarNav.Api import AutonomousController, ConcurrentController, DetectorService
+from Herbie.CarNav.Base import BaseDetector, DetectionResult, DetectedObject
+from Herbie.Hardware.Camera import ThreadedCamera
+from Herbie.Hardware.DriveTrain import MockDriveTrain
+from Herbie.CMath.Api import Position
+from Tests.CarNavTests.test_car import FixedSensor
+from Tests.HardwareTests.test_camera import FakeVideoCapture
+from Tests.utils import *
+
+
+class ScriptedDetector(BaseDetector):
+    # sees a stop sign in the frames where script is True, then keeps repeating the last one
+    def __init__(self, script, inference_time=0.0):
+        self.script_ = list(script)
+        self.inference_time_ = inference_time
+        self.calls = 0
+        self.stopped = False
+
+    def detect(self) -> DetectionResult:
+        time.sleep(self.inference_time_)
+        seen = self.script_[min(self.calls, len(self.script_) - 1)]
+        self.calls += 1
+        return DetectionResult(True, [DetectedObject(0.9, "stop sign")] if seen else [])
+
+    def shutdown(self) -> None:
+        self.stopped = True
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        assert time.perf_counter() < deadline, "Timed out"
+        time.sleep(0.001)
+
+
+def test_detector_service_voting():
+    def votes_seen(script):
+        detector = ScriptedDetector(script, inference_time=0.01)
+        service = DetectorService(detector, window=3, min_votes=2)
+        seen = False
+        while detector.calls < len(script) + 2:
+            seen |= service.is_seen("stop sign")
+        service.shutdown()
+        assert detector.stopped and service.error is None
+        return seen
+    # a single detection is noise, two of the last three frames are a stop sign
+    assert not votes_seen([False, True, False, False, True, False, False])
+    assert votes_seen([False, True, False, True, False, False])
+    # results only count while they are fresh
+    stale = DetectorService(ScriptedDetector([True]), max_age=0.05)
+    wait_for(lambda : stale.is_seen("stop sign"))
+    stale.shutdown()
+    time.sleep(0.1)
+    assert not stale.is_seen("stop sign") and not stale.detect().status
+
+
+def test_detector_service_does_not_block():
+    detector = ScriptedDetector([True], inference_time=0.2)
+    service = DetectorService(detector)
+    start = time.perf_counter()
+    for _ in range(100):
+        service.is_seen("stop sign")
+        service.detect()
+    assert time.perf_counter() - start < 0.05
+    wait_for(lambda : service.is_seen("stop sign"))
+    assert service.metrics.summary()["count"] >= 2
+    service.shutdown()
+
+
+def test_detector_service_once_per_frame():
+    capture = FakeVideoCapture(frame_time=0.02)
+    camera = ThreadedCamera(width=32, height=24, capture=capture)
+    detector = ScriptedDetector([False])
+    service = DetectorService(detector, camera=camera)
+    time.sleep(0.3)
+    service.shutdown()
+    camera.shutdown()
+    # the detector is much faster than the camera but never sees a frame twice
+    assert 0 < detector.calls <= capture.frames
+
+
+def test_detector_service_period():
+    # without a camera a fast detector runs once a period instead of pinning a core
+    detector = ScriptedDetector([False])
+    service = DetectorService(detector, period=0.05)
+    time.sleep(0.3)
+    service.shutdown()
+    assert 0 < detector.calls <= 8
+
+
+def test_concurrent_controller_with_detector_service():
+    target = Position(9, 7)
+    service = DetectorService(ScriptedDetector([True], inference_time=0.01))
+    controller = AutonomousController(11, 10, target, MockDriveTrain(), FixedSensor(-1), detector=service)
+    runtime = ConcurrentController(controller, report_interval=0.01)
+    runtime.STOP_SIGN_WAIT = 0.05
+    assert "detection" not in [stage.name for stage in runtime.stages_]
+    # the mock car gets there faster than the stop sign gets its votes
+    wait_for(lambda : service.is_seen("stop sign"))
+    for i, _ in enumerate(runtime.drive()):
+        assert i < 500, "Car did not reach the target"
+    assert controller.car_position.xy_compare(target)
+    assert controller.seen_objects_["stop sign"]
+    assert runtime.get_metrics()["detection"]["count"] >= 2
+    runtime.shutdown()
+    assert service.error is None
@@ -1,5 +1,6 @@
 from typing import List, Tuple, Union
-from Herbie.CarNav.Mapp import Mapp
+import numpy as np
+from Herbie.CarNav.Mapp import Mapp, OccupancyMapp, TiledMapp
 from Herbie.CMath.Api import Math, Position
 from Tests.utils import *
 
@@ -36,4 +37,116 @@ def test_map():
         car_position, sensor_measurement, projected_obstacle_position = entry
         x, y = projected_obstacle_position
         target_pos: Position = mapp.get_obstacle_idx(car_position, sensor_measurement)
-        assert (x, y) == target_pos.xy_tuple(), f"Entry: {i} Target: {projected_obstacle_position} != Actual: {target_pos} -> Car Pos {car_position} Servo Angle {sensor_measurement}"
\ No newline at end of file
+        assert (x, y) == target_pos.xy_tuple(), f"Entry: {i} Target: {projected_obstacle_position} != Actual: {target_pos} -> Car Pos {car_position} Servo Angle {sensor_measurement}"
+
+def test_map_batch():
+    mapp = Mapp(11, 11, 10)
+    car_position = Position(5, 5, 0)
+    readings = np.array([
+        (0, 30), 
+        (SERVO_LOOK_LEFT, 30), 
+        (SERVO_LOOK_LEFT, 30), # duplicate reading
+        (SERVO_LOOK_RIGHT, 30), 
+        (SERVO_LOOK_RIGHT, Mapp.OBSTACLE_NOTFOUND), 
+        (0, 300), # out of bounds
+        (45, 25)
+    ], dtype=np.float64)
+    expected = [
+        mapp.get_obstacle_idx(car_position, tuple(reading)).xy_tuple() 
+        for reading in readings if reading[1] != Mapp.OBSTACLE_NOTFOUND
+    ]
+    assert [tuple(xy) for xy in mapp.get_obstacle_idxs(car_position, readings).tolist()] == expected
+
+    found_new_obstacle, changed = mapp.add_obstacles_array(car_position, readings)
+    assert found_new_obstacle
+    assert sorted(map(tuple, changed.tolist())) == [(5, 2), (5, 8), (7, 3), (8, 5)]
+    assert not mapp.is_open(7, 3) and not mapp.is_open(8, 5)
+    # the same scan again adds nothing new
+    found_new_obstacle, changed = mapp.add_obstacles_array(car_position, readings)
+    assert not found_new_obstacle and len(changed) == 0
+
+
+
+def test_change_log():
+    mapp = Mapp(11, 11, 10)
+    mapp.MAX_CHANGE_LOG = 4
+    mapp.add_obstacles_xy([(1, 1), (2, 2), (3, 3)])
+    cells, change_idx = mapp.get_changes_since(0)
+    assert cells == [(1, 1), (2, 2), (3, 3)] and change_idx == 3
+    # past the cap the oldest changes are dropped and only the newest half is kept
+    mapp.add_obstacles_xy([(4, 4), (5, 5)])
+    assert len(mapp.changed_cells_) == 2
+    assert not mapp.can_replay_changes_since(0) and mapp.can_replay_changes_since(change_idx)
+    assert mapp.get_changes_since(change_idx) == ([(4, 4), (5, 5)], 5)
+    assert mapp.get_change_idx() == 5
+
+
+
+def test_occupancy_map():
+    mapp = OccupancyMapp(11, 11, 10)
+    car_position = Position(5, 5, 0)
+    # a spurious echo 3 cells in front of the car
+    found_new_obstacle, changed = mapp.add_obstacles_array(car_position, np.array([(0, 30)]))
+    assert found_new_obstacle and changed.tolist() == [[8, 5]]
+    assert not mapp.is_open(8, 5)
+    # the cells the beam passed through are more likely to be free
+    assert (mapp.log_odds_[5, 5:8] < 0).all()
+    # later readings that pass through the cell clear it again
+    for _ in range(3):
+        mapp.add_obstacles_array(car_position, np.array([(0, 50), (SERVO_LOOK_LEFT, 20)]))
+    assert mapp.is_open(8, 5)
+    assert not mapp.is_open(10, 5) and not mapp.is_open(5, 3)
+    assert (8, 5) not in mapp.get_obstacles()
+
+
+
+def test_inflated_map():
+    mapp = OccupancyMapp(11, 11, 10, inflation_radius_in_cm=20)
+    assert mapp.inflation_radius == 2
+    mapp.add_obstacles_xy([(5, 5)])
+    clearance = mapp.get_clearance_grid()
+    assert clearance[5, 5] == 0 and clearance[5, 6] == 1 and clearance[5, 7] == 2
+    assert clearance[5, 8] == 3 and clearance[7, 7] == 3 # farther than the radius
+    assert mapp.get_inflated_blocked_grid().sum() == 13
+    assert mapp.get_inflation_cost_grid(cost_per_cell=1)[5, 6] == 2
+    # clearing the obstacle clears the inflation around it
+    for _ in range(10):
+        mapp.add_obstacles_array(Position(2, 5, 0), np.array([(0, 60)]))
+    assert mapp.is_open(5, 5)
+    assert not mapp.get_inflated_blocked_grid()[:, :6].any()
+
+    # scans with hits scattered around the car give the same clearance as computing it
+    # over the whole map
+    mapp = Mapp(101, 101, 10, inflation_radius_in_cm=20)
+    rng = np.random.default_rng(0)
+    for _ in range(5):
+        readings = np.stack([rng.uniform(-180, 180, 20), rng.uniform(10, 500, 20)], axis=1)
+        mapp.add_obstacles_array(Position(50, 50, 0), readings)
+    expected = Mapp(101, 101, 10, inflation_radius_in_cm=20)
+    expected._map[:] = mapp._map
+    every_x, every_y = np.meshgrid(np.arange(101), np.arange(101))
+    expected.update_clearance_(every_x.ravel(), every_y.ravel())
+    assert np.array_equal(mapp.get_clearance_grid(), expected.get_clearance_grid())
+    assert mapp.get_inflated_blocked_grid().any()
+
+
+
+def test_tiled_map():
+    mapp = TiledMapp(10_000, 10_000, 10, tile_size=16)
+    assert mapp.get_allocated_bytes() == 0 and mapp.is_open(5_000, 5_000)
+    found_new_obstacle, changed = mapp.add_obstacles_array(Position(5_000, 5_000, 0), np.array([(0, 30), (0, 30)]))
+    assert found_new_obstacle and changed.tolist() == [[5_003, 5_000]]
+    assert not mapp.is_open(5_003, 5_000)
+    assert mapp.get_obstacles() == [(5_003, 5_000)]
+    # only the tile holding the obstacle was allocated
+    assert mapp.get_allocated_bytes() == 16 * 16
+    window = mapp.get_blocked_window(5_002, 4_999, 5_004, 5_001)
+    assert window.sum() == 1 and window[1, 1]
+
+    # a wall across a tile splits it into two regions that only connect to the tile on their side
+    mapp = TiledMapp(64, 64, 10, tile_size=8)
+    mapp.add_obstacles_xy([(x, 11) for x in range(8, 16)])
+    labels = mapp.get_tile_labels(1, 1)
+    assert labels[0, 0] != labels[7, 7] and (labels[3] == -1).all()
+    assert mapp.get_tile_connections((1, 1), (1, 0)) == [(labels[0, 0], 0)]
+    assert mapp.get_tile_connections((1, 1), (1, 2)) == [(labels[7, 7], 0)]
@@ -1,5 +1,11 @@
-from Herbie.CarNav.Pathfinder import Pathfinder
-from Herbie.CarNav.Mapp import Mapp
+import time
+
+import numpy as np
+
+from Herbie.CarNav.Pathfinder import Pathfinder, HEADING_OFFSETS, OFFSET_BINS, STEP_COSTS, TURN_COSTS, heading_to_bin
+from Herbie.CarNav.DStarLite import DStarLite
+from Herbie.CarNav.AnytimePlanner import AnytimePlanner
+from Herbie.CarNav.Mapp import Mapp, TiledMapp
 from Herbie.CMath.Api import Math, Position
 from Tests.utils import *
 
@@ -15,4 +21,215 @@ def test_pathfinding():
         Position(5, 5), Position(6, 6), Position(7, 6), Position(8, 6), Position(9, 6), Position(10, 5)
         ]
     assert path == expected_path, f"Path: {path} != Expected Path: {expected_path}"
-    print("All predicted paths matched their corresponding expected paths")
\ No newline at end of file
+    print("All predicted paths matched their corresponding expected paths")
+
+def path_cost(path, heading):
+    cost = 0
+    for a, b in zip(path, path[1:]):
+        new_heading = OFFSET_BINS[(b.x - a.x, b.y - a.y)]
+        cost += STEP_COSTS[new_heading] + TURN_COSTS[heading][new_heading]
+        heading = new_heading
+    return cost
+
+def test_array_pathfinding():
+    # a_star_array is its own search over (x, y, heading) states, not a copy of a_star,
+    # so over a seeded corpus it has to find a path whenever there is one and cost no
+    # more than a_star in total
+    rng = np.random.default_rng(0)
+    array_cost = legacy_cost = 0
+    for _ in range(60):
+        size = int(rng.integers(11, 32))
+        blocked = rng.random((size, size)) < 0.2
+        starting = Position(int(rng.integers(size)), int(rng.integers(size)), int(rng.integers(8)) * 45)
+        target = Position(int(rng.integers(size)), int(rng.integers(size)))
+        blocked[starting.y, starting.x] = blocked[target.y, target.x] = False
+        mapp = Mapp(size, size, 10)
+        ys, xs = np.nonzero(blocked)
+        mapp.add_obstacles_xy(list(zip(xs.tolist(), ys.tolist())))
+        optimal = AnytimePlanner(mapp.get_blocked_grid(), starting, target, initial_epsilon=1.0).plan(60.0)
+        path = Pathfinder.a_star_array(mapp, starting, target, max_steps=1_000_000)
+        assert bool(path) == bool(len(optimal.path))
+        if not path:
+            continue
+        assert path[0] == Position(starting.x, starting.y) and path[-1] == target
+        assert all(mapp.is_open(x, y) for x, y, _ in path)
+        assert all((b.x - a.x, b.y - a.y) in HEADING_OFFSETS for a, b in zip(path, path[1:]))
+        cost = path_cost(path, heading_to_bin(starting.angle))
+        assert cost >= optimal.cost
+        legacy_path = Pathfinder.a_star(mapp, starting, target, max_steps=1_000_000)
+        if legacy_path:
+            array_cost += cost
+            legacy_cost += path_cost(legacy_path, heading_to_bin(starting.angle))
+    assert array_cost <= legacy_cost
+
+    mapp = Mapp(11, 11, 10)
+    mapp.add_obstacles_xy([(1, 1), (6, 5), (7, 5)])
+    current_position = Position(mapp.num_columns // 2, mapp.num_rows // 2, 0)
+    target_position = Position(current_position.x + 5, current_position.y)
+    # wall off the target so no path exists
+    mapp.add_obstacles_xy([(9, 4), (9, 5), (9, 6), (10, 4), (10, 6)])
+    assert Pathfinder.a_star_array(mapp, current_position, target_position) == []
+    # targets the search can never enter are rejected before searching
+    mapp = Mapp(11, 11, 10)
+    mapp.add_obstacles_xy([(8, 5)])
+    for target in [Position(8, 5), Position(11, 5), Position(-2, 5)]:
+        Pathfinder.nodes_expanded = 0
+        for search in [Pathfinder.a_star, Pathfinder.a_star_array, Pathfinder.jump_point_search, Pathfinder.bidirectional_a_star]:
+            assert search(mapp, Position(5, 5), target) == []
+        assert Pathfinder.nodes_expanded == 0
+
+
+
+def test_incremental_pathfinding():
+    mapp = Mapp(11, 11, 10)
+    current_position = Position(mapp.num_columns // 2, mapp.num_rows // 2, 0)
+    target_position = Position(current_position.x + 5, current_position.y)
+    pathfinder = DStarLite(mapp, target_position)
+    path = pathfinder.plan(current_position)
+    expected_path = [Position(x, 5) for x in range(5, 11)]
+    assert path == expected_path, f"Path: {path} != Expected Path: {expected_path}"
+
+    # an obstacle away from the path should not cause any search
+    mapp.add_obstacles_xy([(1, 1)])
+    nodes_expanded = pathfinder.nodes_expanded
+    pathfinder.update_cells([(1, 1)])
+    assert pathfinder.plan(current_position) == expected_path
+    assert pathfinder.nodes_expanded == nodes_expanded
+
+    # blocking the path gives the same path as planning from scratch
+    mapp.add_obstacles_xy([(6, 5), (7, 5)])
+    pathfinder.update_cells([(6, 5), (7, 5)])
+    path = pathfinder.plan(current_position)
+    expected_path = DStarLite(mapp, target_position).plan(current_position)
+    assert path == expected_path, f"Path: {path} != Expected Path: {expected_path}"
+    assert all(mapp.is_open(x, y) for x, y, _ in path)
+
+    # the controller repairs with the first scan before it ever plans
+    mapp = Mapp(11, 11, 10)
+    pathfinder = DStarLite(mapp, Position(3, 3))
+    mapp.add_obstacles_xy([(3, 3), (6, 5)])
+    pathfinder.update_cells([(3, 3), (6, 5)])
+    assert pathfinder.plan(current_position) == []
+    mapp = Mapp(11, 11, 10)
+    pathfinder = DStarLite(mapp, target_position)
+    mapp.add_obstacles_xy([(6, 5), (7, 5)])
+    pathfinder.update_cells([(6, 5), (7, 5)])
+    assert pathfinder.plan(current_position) == expected_path
+
+
+
+def test_inflated_pathfinding():
+    mapp = Mapp(11, 11, 10, inflation_radius_in_cm=10)
+    mapp.add_obstacles_xy([(5, 4), (5, 5), (5, 6)])
+    current_position = Position(2, 5, 0)
+    target_position = Position(8, 5)
+    inflation_costs = mapp.get_inflation_cost_grid()
+    total_costs = []
+    for inflation in [Pathfinder.INFLATION_NONE, Pathfinder.INFLATION_COST, Pathfinder.INFLATION_HARD]:
+        path = Pathfinder.a_star_array(mapp, current_position, target_position, inflation=inflation)
+        assert path[0] == Position(2, 5) and path[-1] == Position(8, 5), f"Path: {path}"
+        total_costs.append(sum(inflation_costs[y, x] for x, y, _ in path))
+    # grazing the wall costs less the more the planner respects the inflation
+    none_cost, soft_cost, hard_cost = total_costs
+    assert none_cost > soft_cost > hard_cost == 0, f"Costs: {total_costs}"
+
+
+
+def test_hierarchical_pathfinding():
+    mapp = TiledMapp(128, 128, 10, tile_size=16)
+    # a wall across the map with a single gap at the far right
+    mapp.add_obstacles_xy([(x, 64) for x in range(0, 120)])
+    current_position = Position(10, 10, 0)
+    target_position = Position(10, 120)
+    path = Pathfinder.hierarchical_a_star(mapp, current_position, target_position)
+    assert path[0] == Position(10, 10) and path[-1] == Position(10, 120)
+    assert all(mapp.is_open(x, y) for x, y, _ in path)
+    assert all((b.x - a.x, b.y - a.y) in HEADING_OFFSETS for a, b in zip(path, path[1:]))
+    assert any(x >= 120 for x, y, _ in path if y == 64)
+    # refining only the tiles near the car gives the start of a path
+    partial_path = Pathfinder.hierarchical_a_star(mapp, current_position, target_position, refine_tiles=2)
+    assert partial_path[0] == Position(10, 10) and 1 < len(partial_path) < len(path)
+    assert all(mapp.is_open(x, y) for x, y, _ in partial_path)
+    assert all((b.x - a.x, b.y - a.y) in HEADING_OFFSETS for a, b in zip(partial_path, partial_path[1:]))
+    # nothing is inflated on a tiled map
+    assert not mapp.get_inflated_blocked_grid().any() and not mapp.get_inflation_cost_grid().any()
+    # a target walled off from the car has no path
+    mapp.add_obstacles_xy([(x, 64) for x in range(120, 128)])
+    assert Pathfinder.hierarchical_a_star(mapp, current_position, target_position) == []
+
+
+def test_anytime_pathfinding():
+    rng = np.random.default_rng(4)
+    blocked = rng.random((61, 61)) < 0.25
+    starting, target = Position(1, 1, LOOKING_FULL_RIGHT), Position(59, 59)
+    blocked[1, 1] = blocked[59, 59] = False
+    optimal = AnytimePlanner(blocked, starting, target, initial_epsilon=1.0).plan(60.0)
+    assert optimal.is_optimal and optimal.path[0].xy_tuple() == (1, 1) and optimal.path[-1].xy_tuple() == (59, 59)
+
+    planner = AnytimePlanner(blocked, starting, target, initial_epsilon=3.0, epsilon_step=0.5)
+    # no time at all still returns, without a path
+    first = planner.plan(0.0)
+    assert first.cost == float("inf") and not len(first.path)
+    costs = []
+    while not planner.is_finished():
+        plan = planner.plan(0.005)
+        if len(plan.path):
+            # the bound always holds for the path that comes with it
+            assert plan.cost <= plan.bound * optimal.cost
+            costs.append(plan.cost)
+    assert costs == sorted(costs, reverse=True)
+    assert planner.best().is_optimal and planner.best().cost == optimal.cost
+
+    # the background search improves the path and stops when asked
+    planner = AnytimePlanner(blocked, starting, target)
+    planner.plan(0.0)
+    planner.improve_in_background(60.0)
+    while not planner.is_finished():
+        time.sleep(0.001)
+    planner.stop()
+    assert planner.best().cost == optimal.cost
+
+    # a wall between the start and the target
+    blocked[:, 30] = True
+    plan = AnytimePlanner(blocked, starting, target).plan(60.0)
+    assert not len(plan.path) and plan.bound == float("inf")
+
+
+def test_jump_point_and_bidirectional_pathfinding():
+    rng = np.random.default_rng(4)
+    mapp = Mapp(61, 61, 10)
+    blocked = rng.random((61, 61)) < 0.25
+    blocked[1, 1] = blocked[59, 59] = False
+    ys, xs = np.nonzero(blocked)
+    mapp.add_obstacles_xy(list(zip(xs.tolist(), ys.tolist())))
+    starting, target = Position(1, 1, LOOKING_FULL_RIGHT), Position(59, 59)
+    optimal = AnytimePlanner(mapp.get_blocked_grid(), starting, target, initial_epsilon=1.0).plan(60.0)
+    for method in ["jump_point_search", "bidirectional_a_star"]:
+        path = Pathfinder.find_path(mapp, starting, target, method, max_steps=1_000_000)
+        assert path[0] == Position(1, 1) and path[-1] == Position(59, 59)
+        assert all(mapp.is_open(x, y) for x, y, _ in path)
+        assert all((b.x - a.x, b.y - a.y) in HEADING_OFFSETS for a, b in zip(path, path[1:]))
+        cost = path_cost(path, heading_to_bin(starting.angle))
+        if method == "bidirectional_a_star":
+            assert cost == optimal.cost
+        else:
+            # jumps can turn a little more than needed
+            assert optimal.cost <= cost <= 1.5 * optimal.cost
+
+    # on open ground jump point search only expands the cells where the path turns
+    mapp = Mapp(201, 201, 10)
+    mapp.add_obstacles_xy([(x, 100) for x in range(60, 140)])
+    starting, target = Position(5, 5, LOOKING_FULL_RIGHT), Position(195, 195)
+    optimal = AnytimePlanner(mapp.get_blocked_grid(), starting, target, initial_epsilon=1.0).plan(60.0)
+    Pathfinder.nodes_expanded = 0
+    path = Pathfinder.find_path(mapp, starting, target, "jump_point_search", max_steps=1_000_000)
+    assert path[-1] == Position(195, 195) and Pathfinder.nodes_expanded * 100 < optimal.nodes_expanded
+    Pathfinder.nodes_expanded = 0
+    path = Pathfinder.find_path(mapp, starting, target, "bidirectional_a_star", max_steps=1_000_000)
+    assert path_cost(path, heading_to_bin(starting.angle)) == optimal.cost
+    assert Pathfinder.nodes_expanded < optimal.nodes_expanded
+
+    # a wall between the start and the target
+    mapp.add_obstacles_xy([(x, 100) for x in [*range(0, 60), *range(140, 201)]])
+    for method in ["jump_point_search", "bidirectional_a_star"]:
+        assert Pathfinder.find_path(mapp, starting, target, method, max_steps=1_000_000) == []
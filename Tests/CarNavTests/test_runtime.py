@@ -0,0 +1,68 @@
+import json
+import threading
+import time
+
+from Herbie.CarNav.Api import AutonomousController, ConcurrentController, LatestValue, StageMetrics
+from Herbie.CarNav.Base import BaseDetector, DetectionResult, DetectedObject
+from Herbie.Hardware.DriveTrain import MockDriveTrain
+from Herbie.CMath.Api import Position
+from Tests.CarNavTests.test_car import FixedSensor
+from Tests.utils import *
+
+
+class SlowDetector(BaseDetector):
+    def detect(self) -> DetectionResult:
+        time.sleep(0.5)
+        return DetectionResult(True, [DetectedObject(0.9, "stop sign")])
+
+
+def test_latest_value():
+    channel: LatestValue[int] = LatestValue()
+    channel.put(1)
+    channel.put(2)
+    # only the newest value is kept
+    assert channel.get() == (2, 2)
+    assert channel.wait_newer(2, timeout=0.01) == (2, 2)
+    threading.Timer(0.01, lambda : channel.put(3)).start()
+    assert channel.wait_newer(2, timeout=1.0) == (3, 3)
+
+    metrics = StageMetrics()
+    assert metrics.summary() == {"count": 0}
+    for latency in [0.001, 0.002, 0.003]:
+        metrics.record(latency, input_age=0.001)
+    summary = metrics.summary()
+    assert summary["count"] == 3 and summary["max_ms"] == 3 and summary["input_age_ms"] == 1
+
+
+def test_concurrent_controller():
+    target = Position(9, 7)
+    controller = AutonomousController(11, 10, target, MockDriveTrain(), FixedSensor(-1), detector=SlowDetector())
+    runtime = ConcurrentController(controller, report_interval=0.01)
+    for i, _ in enumerate(runtime.drive()):
+        assert i < 500, "Car did not reach the target"
+    assert controller.car_position.xy_compare(target)
+    # the car drove the whole way while the detector was still busy with its first frame
+    assert not controller.seen_objects_["stop sign"]
+    log_data = runtime.get_log_data()
+    assert log_data["stage_latency"]["actuation"]["count"] >= 4
+    assert log_data["stage_latency"]["planning"]["count"] >= 1
+    json.dumps(log_data)
+
+
+def test_concurrent_controller_adopts_late_plans():
+    controller = AutonomousController(11, 10, Position(9, 5), MockDriveTrain(), FixedSensor(-1))
+    runtime = ConcurrentController(controller)
+    controller.current_path_.extend([Position(6, 5), Position(7, 5)])
+    plan = [Position(x, 6) for x in range(4, 10)]
+    # the car moved past the start of the plan while it was made
+    controller.car_position = Position(6, 5, 0)
+    runtime.adopt_plan_(plan)
+    assert list(controller.current_path_) == plan[3:]
+    controller.car_position = Position(5, 6, 0)
+    runtime.adopt_plan_(plan)
+    assert list(controller.current_path_) == plan[2:]
+    # too far from the plan to join it, the old path is dropped and the car plans again
+    runtime.plan_requested_.clear()
+    controller.car_position = Position(5, 2, 0)
+    runtime.adopt_plan_(plan)
+    assert not controller.current_path_ and runtime.plan_requested_.is_set()
@@ -0,0 +1,77 @@
+import time
+
+import numpy as np
+
+from Herbie.Hardware.Camera import ThreadedCamera
+from Tests.utils import *
+
+class FakeVideoCapture:
+    # BGR frames where every pixel of frame i is blue (i, 0, 0), fails every fail_every reads
+    def __init__(self, width=32, height=24, fail_every=0, frame_time=0.001):
+        self.width_ = width
+        self.height_ = height
+        self.fail_every_ = fail_every
+        self.frame_time_ = frame_time
+        self.reads = 0
+        self.frames = 0
+        self.allocations = 0
+        self.released = False
+
+    def isOpened(self):
+        return not self.released
+
+    def read(self, image=None):
+        time.sleep(self.frame_time_)
+        self.reads += 1
+        if self.fail_every_ and self.reads % self.fail_every_ == 0:
+            return False, None
+        if image is None:
+            self.allocations += 1
+            image = np.empty((self.height_, self.width_, 3), dtype=np.uint8)
+        self.frames += 1
+        image[:] = (self.frames % 256, 0, 0)
+        return True, image
+
+    def release(self):
+        self.released = True
+
+
+def test_threaded_camera():
+    capture = FakeVideoCapture(fail_every=5)
+    camera = ThreadedCamera(num_buffers=3, capture=capture)
+    frame = camera.wait_newer(0, timeout=5.0)
+    assert frame is not None and frame.sequence >= 1
+    buffers = set()
+    sequence, timestamp = 0, 0.0
+    while sequence < 50:
+        frame = camera.wait_newer(sequence, timeout=5.0)
+        assert frame.sequence > sequence and frame.timestamp > timestamp
+        sequence, timestamp = frame.sequence, frame.timestamp
+        buffers.add(id(frame.image))
+        # converted to RGB and sized like the capture
+        assert frame.image.shape == (24, 32, 3)
+    # every frame lands in one of the preallocated buffers
+    assert len(buffers) <= 3 and capture.allocations == 1
+    assert camera.failed_reads > 0
+    # see hands out the latest buffer without copying it
+    status, image = camera.see()
+    assert status and any(image is buffer for buffer in camera.buffers_)
+    camera.shutdown()
+    assert capture.released and not camera.thread_.is_alive()
+
+
+def test_threaded_camera_colors():
+    capture = FakeVideoCapture(frame_time=0.005)
+    camera = ThreadedCamera(num_buffers=3, capture=capture)
+    sequence = 0
+    for _ in range(10):
+        frame = camera.wait_newer(sequence, timeout=5.0)
+        sequence = frame.sequence
+        # RGB and the whole frame is the one its sequence says, not half of the next one
+        assert np.all(frame.image == (0, 0, frame.sequence % 256))
+    camera.shutdown()
+    # before the first frame see says so instead of blocking
+    camera = ThreadedCamera(capture=FakeVideoCapture(fail_every=1))
+    status, image = camera.see()
+    assert not status and image.shape == (320, 320, 3)
+    camera.shutdown()
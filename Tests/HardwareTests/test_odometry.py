@@ -0,0 +1,93 @@
+import math
+
+from Herbie.Hardware.Odometry import Odometry
+from Tests.utils import *
+
+
+class SimulatedWheels:
+    """
+        Wheels that instantly reach the commanded speed, read through a clock that
+        only moves when the odometry sleeps.
+    """
+
+    def __init__(self):
+        self.now = 0.0
+        self.left = 0.0
+        self.right = 0.0
+
+    def clock(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+    def drive(self, odometry: Odometry, left: float, right: float) -> None:
+        # centimeters per second, negative is backward
+        odometry.set_direction((left > 0) - (left < 0), (right > 0) - (right < 0))
+        self.left = left
+        self.right = right
+
+
+def make_odometry(wheels: SimulatedWheels) -> Odometry:
+    # the speed sensors only report how fast the wheels turn, not which way
+    return Odometry(
+        lambda : abs(wheels.left), 
+        lambda : abs(wheels.right), 
+        track_width_in_cm=20.0, 
+        clock=wheels.clock, 
+        sleep=wheels.sleep
+        )
+
+
+def test_odometry_straight():
+    wheels = SimulatedWheels()
+    odometry = make_odometry(wheels)
+    wheels.drive(odometry, 20, 20)
+    assert odometry.wait_for_distance(50, timeout=10)
+    # stops on the first sample past the distance
+    assert abs(wheels.now - 2.5) < 0.02
+    x, y, heading = odometry.get_pose()
+    assert abs(x - 50) < 0.5 and abs(y) < 1e-9 and heading == 0
+    wheels.drive(odometry, -20, -20)
+    assert odometry.wait_for_distance(20, timeout=10)
+    assert abs(odometry.get_pose().x - 30) < 0.5
+    assert abs(odometry.get_distance_travelled() - 70) < 0.5
+    # stalled wheels time out instead of blocking forever
+    wheels.drive(odometry, 0, 0)
+    assert not odometry.wait_for_distance(10, timeout=1)
+
+
+def test_odometry_rotation():
+    wheels = SimulatedWheels()
+    odometry = make_odometry(wheels)
+    # spinning left in place at 10 cm/s turns 1 radian a second
+    wheels.drive(odometry, -10, 10)
+    assert odometry.wait_for_rotation(TURN_FULL_LEFT, timeout=10)
+    assert abs(wheels.now - math.pi / 2) < 0.02
+    x, y, heading = odometry.get_pose()
+    assert abs(heading - LOOKING_FULL_UP) < 1 and abs(x) < 1e-9 and abs(y) < 1e-9
+    # driving forward now moves along y
+    wheels.drive(odometry, 20, 20)
+    assert odometry.wait_for_distance(40, timeout=10)
+    x, y, _ = odometry.get_pose()
+    assert abs(x) < 1 and abs(y - 40) < 1
+    # an arc turns and moves at the same time
+    wheels.drive(odometry, 10, 20)
+    assert odometry.wait_for_rotation(TURN_HALF_LEFT, timeout=10)
+    assert abs(odometry.get_pose().angle - (LOOKING_FULL_UP + TURN_HALF_LEFT)) < 1
+
+
+def test_odometry_run_target():
+    wheels = SimulatedWheels()
+    odometry = make_odometry(wheels)
+    wheels.drive(odometry, 20, 20)
+    assert odometry.wait_for_distance_travelled(10, timeout=10)
+    # the car keeps rolling while the caller scans, the next cell of the run is
+    # measured from where the run started so that distance is not driven twice
+    wheels.sleep(1.0)
+    odometry.update()
+    now = wheels.now
+    assert odometry.wait_for_distance_travelled(20, timeout=10)
+    assert wheels.now == now
+    assert odometry.wait_for_distance_travelled(40, timeout=10)
+    assert abs(odometry.get_distance_travelled() - 40) < 0.5
@@ -0,0 +1,153 @@
+from typing import List, Tuple
+import time
+
+from Herbie.Hardware.Base import BasePin, BaseSensor
+from Herbie.Hardware.Pins import MockPin, ReplayEchoPin
+from Herbie.Hardware.UltraSonic import UltraSonic
+from Tests.utils import *
+
+
+class RecordingSensor(BaseSensor):
+    # distance depends only on the angle, -1 (nothing seen) for angles past 60 degrees
+    def __init__(self):
+        self.moves: List[float] = []
+        self.settle_times: List[float] = []
+
+    def get_distance(self) -> float:
+        angle = self.moves[-1]
+        return -1 if abs(angle) > 60 else 100 + angle
+
+    def move_sensor_to(self, angle: float) -> bool:
+        self.settle_times.append(self.track_sensor_move_(angle))
+        self.moves.append(angle)
+        return True
+
+    def shutdown(self) -> None:
+        pass
+
+
+def serial_scan(sensor: BaseSensor, num_steps: int, samples_per_step: int) -> List[Tuple[float, float]]:
+    # the scan before it streamed results, one angle and its samples at a time
+    measurements = []
+    for angle in BaseSensor.scan_angles_(SERVO_LOOK_RIGHT, SERVO_LOOK_LEFT, num_steps):
+        sample_size = 20 // samples_per_step
+        samples = [sensor.get_distance_at(angle)[1]]
+        for i in range(1, (samples_per_step // 2) + 1):
+            samples.append(sensor.get_distance_at(angle - sample_size * i)[1])
+        for i in range(1, (samples_per_step // 2) + 1):
+            samples.append(sensor.get_distance_at(angle + sample_size * i)[1])
+        if samples.count(-1) > len(samples) // 2:
+            continue
+        filtered_samples = list(filter(lambda dist : dist != -1, samples))
+        measurements.append((angle, sum(filtered_samples) / len(filtered_samples)))
+    return measurements
+
+
+def test_scan():
+    for samples_per_step in [1, 2, 4]:
+        serial_sensor = RecordingSensor()
+        expected = serial_scan(serial_sensor, 19, samples_per_step)
+        sensor = RecordingSensor()
+        assert sensor.scan(SERVO_LOOK_RIGHT, SERVO_LOOK_LEFT, 19, samples_per_step) == expected
+        # one sweep in a single direction reading each angle once
+        assert sensor.moves == sorted(set(sensor.moves))
+        assert len(sensor.moves) <= len(serial_sensor.moves)
+        if samples_per_step > 1:
+            assert sum(sensor.settle_times) < sum(serial_sensor.settle_times)
+
+
+def test_scan_iter():
+    sensor = RecordingSensor()
+    sensor.move_sensor_to(80)
+    results = sensor.scan_iter(SERVO_LOOK_RIGHT, SERVO_LOOK_LEFT, 19)
+    # results stream in before the sweep is done, starting from the closer end
+    angle, distance = next(results)
+    assert angle == 60 and distance == 155
+    assert len(sensor.moves) < 10 and sensor.moves[1] > sensor.moves[-1]
+    assert [angle for angle, _ in results] == list(range(50, -70, -10))
+    # a small move settles faster than a large one
+    sensor.move_sensor_to(-60)
+    sensor.move_sensor_to(60)
+    assert sensor.settle_times[-2] < sensor.settle_times[-1]
+
+
+class MockServo:
+    def set_angle(self, angle: float) -> None:
+        pass
+
+
+class StepClock:
+    # moves forward a fixed step every time it is read, however long the test really takes
+    def __init__(self, step: float = 0.00001):
+        self.now_ = 0.0
+        self.step_ = step
+
+    def __call__(self) -> float:
+        self.now_ += self.step_
+        return self.now_
+
+
+def make_ultrasonic(pulse_durations, edge_timing: bool, pings_per_reading: int) -> UltraSonic:
+    clock = StepClock()
+    echo = ReplayEchoPin(pulse_durations, clock=clock)
+    return UltraSonic(
+        0, 
+        edge_timing=edge_timing, 
+        pings_per_reading=pings_per_reading, 
+        trig=MockPin(on_falling=echo.trigger), 
+        echo=echo, 
+        servo=MockServo(),
+        clock=clock
+        )
+
+
+def test_ultrasonic():
+    # 0.005 seconds there and back = 85 centimeters
+    pulse_durations = [0.005, 0.0059, None, 0.005, 0.004]
+    sensor = make_ultrasonic(pulse_durations, edge_timing=True, pings_per_reading=5)
+    assert sensor.get_distance() == 85
+    # busy waiting on the pin measures the same pulses to within a few clock steps
+    sensor = make_ultrasonic(pulse_durations, edge_timing=False, pings_per_reading=5)
+    assert abs(sensor.get_distance() - 85) < 1
+    # one good ping out of three is not enough
+    sensor = make_ultrasonic([None, 0.005, None], edge_timing=True, pings_per_reading=3)
+    assert sensor.get_distance() == -1
+    sensor = make_ultrasonic([0.005], edge_timing=True, pings_per_reading=1)
+    assert sensor.get_distance() == 85 and sensor.get_distance() == -1
+
+
+class PolledPin(BasePin):
+    # a pin without interrupts so on_edge falls back to polling
+    def __init__(self):
+        self.value_ = 0
+
+    def high(self) -> None:
+        self.value_ = 1
+
+    def low(self) -> None:
+        self.value_ = 0
+
+    def value(self) -> int:
+        return self.value_
+
+
+def wait_for_edges(edges, count: int, timeout: float = 2.0) -> None:
+    deadline = time.perf_counter() + timeout
+    while len(edges) < count:
+        assert time.perf_counter() < deadline, "The poll thread missed an edge"
+        time.sleep(0.001)
+
+
+def test_pin_polling():
+    pin = PolledPin()
+    edges = []
+    pin.on_edge(lambda value, timestamp_ns : edges.append((value, timestamp_ns)))
+    pin.high()
+    wait_for_edges(edges, 1)
+    between_ns = time.perf_counter_ns()
+    pin.low()
+    wait_for_edges(edges, 2)
+    pin.shutdown()
+    assert [value for value, _ in edges] == [1, 0]
+    # each edge is stamped once the pin has changed
+    assert edges[0][1] <= between_ns <= edges[1][1]
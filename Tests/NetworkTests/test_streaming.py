@@ -0,0 +1,136 @@
+import asyncio
+import time
+
+import numpy as np
+
+from Herbie.Network.Server import WebSocketServer
+from Herbie.Network.Streaming import ClientStream, Frame
+from Herbie.Network.Telemetry import Telemetry
+from Tests.utils import *
+
+class FakeWebSocket:
+    def __init__(self, send_time: float = 0.0):
+        self.send_time_ = send_time
+        self.sent = []
+
+    async def send(self, data):
+        await asyncio.sleep(self.send_time_)
+        self.sent.append(data)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        # a viewer that never sends anything
+        await asyncio.sleep(3600)
+
+
+def make_frame(sequence: int) -> Frame:
+    image = np.full((64, 64, 3), sequence, dtype=np.uint8)
+    return Frame(image, sequence, "jpeg", 80, time.time())
+
+
+def test_drop_oldest():
+    async def run():
+        ws = FakeWebSocket()
+        stream = ClientStream(ws, max_frames=2)
+        for sequence in range(5):
+            stream.offer_frame(make_frame(sequence))
+        stream.offer_message("{}")
+        assert stream.frames_dropped == 3
+        sender = asyncio.create_task(stream.run())
+        while stream.frames_sent < 2:
+            await asyncio.sleep(0.001)
+        sender.cancel()
+        # scalars first, then only the two newest frames
+        assert ws.sent[0] == "{}"
+        assert [Telemetry.decode_frame(data)[0].sequence for data in ws.sent[1:]] == [3, 4]
+    asyncio.run(run())
+
+
+def test_adaptive_quality():
+    async def stream_frames(send_time: float) -> ClientStream:
+        stream = ClientStream(FakeWebSocket(send_time))
+        sender = asyncio.create_task(stream.run())
+        for sequence in range(60):
+            stream.offer_frame(make_frame(sequence))
+            await asyncio.sleep(0.01)
+        sender.cancel()
+        return stream
+
+    async def run():
+        fast = await stream_frames(0.0)
+        assert fast.level == 0 and fast.frames_dropped == 0
+        # a client that takes three frame times per frame gets worse frames and skips some
+        slow = await stream_frames(0.03)
+        assert slow.level > 0 and slow.frames_dropped > 0
+        assert 0 < slow.throughput < fast.throughput
+    asyncio.run(run())
+
+
+def test_slow_viewer_does_not_block():
+    async def run():
+        server = WebSocketServer("localhost", 0)
+        slow_ws, fast_ws = FakeWebSocket(0.5), FakeWebSocket()
+        handlers = [asyncio.create_task(server.handle(ws)) for ws in [slow_ws, fast_ws]]
+        await asyncio.sleep(0.01)
+        start = time.perf_counter()
+        for sequence in range(20):
+            await server.send({"frame": sequence})
+            server.send_frame(np.zeros((64, 64, 3), dtype=np.uint8), sequence)
+        # queuing for both viewers takes no time at all
+        assert time.perf_counter() - start < 0.05
+        await asyncio.sleep(0.1)
+        assert len(fast_ws.sent) > len(slow_ws.sent)
+        for handler in handlers:
+            handler.cancel()
+        await asyncio.gather(*handlers, return_exceptions=True)
+        assert not server.connections_
+    asyncio.run(run())
+
+
+def test_acknowledged_frames():
+    async def run():
+        ws = FakeWebSocket()
+        stream = ClientStream(ws, max_in_flight=2)
+        sender = asyncio.create_task(stream.run())
+        stream.acknowledge(-1)
+        for sequence in range(60):
+            stream.offer_frame(make_frame(sequence))
+            await asyncio.sleep(0.01)
+            # never more frames on the way than allowed
+            assert len(stream.in_flight_) <= 2
+            # a browser that draws a frame every 50 ms
+            if sequence % 5 == 4:
+                stream.acknowledge(Telemetry.decode_frame(ws.sent[-1])[0].sequence)
+        sender.cancel()
+        assert stream.level > 0 and stream.frames_sent < 30
+    asyncio.run(run())
+
+
+def test_broadcast():
+    async def run():
+        server = WebSocketServer("localhost", 0, send_timeout=0.2)
+        viewers = [FakeWebSocket() for _ in range(20)]
+        # a viewer whose connection hangs
+        dead_ws = FakeWebSocket(3600)
+        handlers = [asyncio.create_task(server.handle(ws)) for ws in viewers + [dead_ws]]
+        await asyncio.sleep(0.01)
+        assert len(server.connections_) == 21
+        server.send_frame(np.zeros((64, 64, 3), dtype=np.uint8), 1)
+        frame = server.connections_[viewers[0]].frames_[0]
+        await asyncio.sleep(0.1)
+        # encoded once and every viewer sent the same bytes
+        assert len(frame.encoded_) == 1
+        assert all(ws.sent == [viewers[0].sent[0]] for ws in viewers)
+        assert all(ws.sent[0] is viewers[0].sent[0] for ws in viewers)
+        # the hanging viewer is dropped once its send times out
+        await asyncio.sleep(0.3)
+        assert handlers[-1].done() and dead_ws not in server.connections_
+        await server.send({"frame": 1})
+        await asyncio.sleep(0.01)
+        assert all(len(ws.sent) == 2 for ws in viewers)
+        for handler in handlers:
+            handler.cancel()
+        await asyncio.gather(*handlers, return_exceptions=True)
+    asyncio.run(run())
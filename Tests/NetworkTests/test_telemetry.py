@@ -0,0 +1,101 @@
+import asyncio
+import json
+
+import numpy as np
+
+from Herbie.Network.Telemetry import Telemetry
+from Herbie.CarNav.Controllers import WebController
+from Herbie.Hardware.Base import BaseCamera
+from Herbie.Hardware.DriveTrain import MockDriveTrain
+from Tests.utils import *
+
+class FakeCamera(BaseCamera):
+    def __init__(self, image: np.ndarray, available: bool = True):
+        self.image_ = image
+        self.available_ = available
+
+    def is_camera_available(self) -> bool:
+        return self.available_
+
+    def see(self):
+        return True, self.image_
+
+    def shutdown(self) -> None:
+        pass
+
+
+def make_image(width=320, height=240):
+    # smooth gradients compress about as well as a camera image does
+    xs, ys = np.meshgrid(np.arange(width), np.arange(height))
+    return np.dstack([xs * 255 // width, ys * 255 // height, np.full_like(xs, 100)]).astype(np.uint8)
+
+
+def test_frame_encoding():
+    image = make_image()
+    data = Telemetry.encode_frame(image, "raw", sequence=7, timestamp=12.5)
+    assert len(data) == Telemetry.HEADER.size + image.nbytes
+    header, decoded = Telemetry.decode_frame(data)
+    assert (header.encoding, header.width, header.height, header.sequence, header.timestamp) == (
+        Telemetry.RAW_RGB, 320, 240, 7, 12.5
+        )
+    assert np.array_equal(decoded, image)
+    header, decoded = Telemetry.decode_frame(Telemetry.encode_frame(image, "raw", scale=0.5))
+    assert (header.width, header.height) == (160, 120) and decoded.shape == (120, 160, 3)
+    for encoding in ["jpeg", "webp"]:
+        data = Telemetry.encode_frame(image, encoding, quality=90, sequence=8)
+        # compressed frames are a small part of a raw one
+        assert len(data) < image.nbytes // 10
+        header, decoded = Telemetry.decode_frame(data)
+        assert header.encoding == Telemetry.ENCODINGS[encoding] and header.sequence == 8
+        # the colors come back in RGB order
+        assert decoded.shape == image.shape
+        assert np.abs(decoded.astype(int) - image.astype(int)).mean() < 3
+
+
+def test_web_controller_telemetry():
+    image = make_image()
+    controller = WebController(MockDriveTrain(), None, camera=FakeCamera(image), frame_encoding="raw")
+    # only scalars go out as JSON
+    assert json.loads(json.dumps(controller.get_log_data())) == {
+        "speed": 10, "obstacle": [-1, -1], "frame": 0, "snapshot": False
+        }
+    for _ in range(2):
+        assert np.array_equal(controller.capture_frame(), image)
+    assert controller.get_log_data()["frame"] == 2
+    controller = WebController(MockDriveTrain(), None, camera=FakeCamera(image, available=False))
+    assert controller.capture_frame() is None
+
+
+class FakeServer:
+    def __init__(self):
+        self.num_connections = 1
+        self.messages = []
+
+    def get_message(self):
+        return {}
+
+    async def send(self, message):
+        self.messages.append(message)
+
+    def send_frame(self, image, sequence, encoding="jpeg", quality=80):
+        pass
+
+
+def test_web_controller_snapshot_on_connect():
+    server = FakeServer()
+    controller = WebController(MockDriveTrain(), server, sleep_per_step=0.001, frame_quality=60)
+    controller.go_["forward"] = True
+    log_data = controller.get_log_data(snapshot=True)
+    assert log_data["snapshot"] and log_data["controls"]["forward"] and log_data["frame_quality"] == 60
+    assert "controls" not in controller.get_log_data()
+
+    async def run():
+        driving = asyncio.create_task(controller.drive_())
+        await asyncio.sleep(0.02)
+        # a second viewer connected
+        server.num_connections += 1
+        await asyncio.sleep(0.02)
+        driving.cancel()
+    asyncio.run(run())
+    snapshots = [message["snapshot"] for message in server.messages]
+    assert snapshots[0] and snapshots.count(True) == 2 and len(snapshots) > 2
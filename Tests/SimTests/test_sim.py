@@ -0,0 +1,150 @@
+import time
+
+import numpy as np
+
+from Herbie.Sim.Api import *
+from Herbie.CarNav.Controllers import AutonomousController
+from Herbie.CarNav.Pathfinder import Pathfinder
+from Herbie.CMath.Api import Position
+from Tests.utils import *
+
+
+def test_world():
+    world = World(10, 10, 10)
+    world.add_obstacles_xy([(8, 5), (5, 1)])
+    assert world.is_blocked(80, 50) and world.is_blocked(84, 46)
+    assert not world.is_blocked(74, 50)
+    # outside the world is a wall
+    assert world.is_blocked_cell(-1, 5) and world.is_blocked_cell(5, 10)
+    # distances are to the center of the cell that was hit
+    assert world.cast_ray(50, 50, LOOKING_FULL_RIGHT, 100) == 30
+    assert world.cast_ray(50, 50, LOOKING_FULL_UP, 100) == 40
+    assert world.cast_ray(50, 50, LOOKING_FULL_UP, 35) is None
+    assert world.cast_ray(50, 50, LOOKING_FULL_LEFT, 100) == 60
+
+    keep_clear = [Position(5, 5, 0)]
+    world = World.random(10, 10, 10, obstacle_ratio=1.0, seed=0, keep_clear=keep_clear)
+    assert not world.blocked_[4:7, 4:7].any() and world.blocked_.sum() == 100 - 9
+
+
+def test_devices():
+    world = World(10, 10, 10)
+    world.add_obstacles_xy([(8, 5)])
+    clock = SimClock()
+    drive_train = SimDriveTrain(world, Position(50, 50, LOOKING_FULL_RIGHT), clock)
+    sensor = SimUltraSonic(world, drive_train, clock)
+    assert sensor.get_distance_at(0) == (0, 30)
+    assert sensor.get_distance_at(SERVO_LOOK_LEFT) == (SERVO_LOOK_LEFT, 60)
+
+    drive_train.forward_for(50, 10)
+    assert drive_train.position == Position(60, 50, LOOKING_FULL_RIGHT)
+    assert drive_train.collisions == 0 and drive_train.speed == 0
+    # the car stops before the blocked cell
+    drive_train.forward_for(50, 30)
+    assert 70 <= drive_train.position.x < 75 and drive_train.collisions == 1
+    drive_train.rotate(TURN_FULL_LEFT)
+    assert drive_train.position.angle == LOOKING_FULL_UP
+    assert drive_train.distance_travelled == drive_train.position.x - 50
+    # time passes without sleeping
+    assert clock.time() > 1
+
+    camera = SimCamera(world, drive_train)
+    detector = SimDetector(camera)
+    assert detector.detect().get_object_score("stop sign") == 0
+    world.stop_signs.append((70, 0))
+    assert detector.detect().get_object_score("stop sign") > 0.5
+    # behind the car
+    world.stop_signs[0] = (70, 100)
+    assert detector.detect().get_object_score("stop sign") == 0
+
+
+def test_episode():
+    target = Position(18, 2, 0)
+    world = World.random(21, 21, 10, obstacle_ratio=0.1, seed=3, keep_clear=[Position(10, 10, 0), target])
+    start = time.perf_counter()
+    result = Episode.run(world, target, max_steps=500)
+    assert result.reached_target
+    assert result.collisions == 0
+    assert result.distance_travelled >= 8 * 14
+    # the simulated drive takes much longer than running it
+    assert result.sim_time > 10 * (time.perf_counter() - start)
+    # straight runs are driven without stopping and still end on the cells they plan for
+    for seed in range(5):
+        continuous_target = Position(18, 2 + seed, 0)
+        continuous_world = World.random(
+            21, 21, 10, obstacle_ratio=0.1, seed=seed, keep_clear=[Position(10, 10, 0), continuous_target]
+            )
+        continuous = Episode.run(continuous_world, continuous_target, max_steps=500, continuous_motion=True)
+        assert continuous.reached_target and continuous.collisions == 0
+    # sensor noise reaches the sensor and the car still finds its way
+    controller, _, _ = Episode.make_controller(world, target, sensor_noise=5.0)
+    assert controller.obstacle_sensor_.noise == 5.0 # type: ignore
+    noisy = Episode.run(world, target, max_steps=500, seed=1, sensor_noise=5.0)
+    assert noisy.reached_target and noisy.collisions == 0
+    # the anytime planner gets a time budget instead of a step limit
+    anytime = Episode.run(world, target, max_steps=500, planning_time_budget=0.05)
+    assert anytime.reached_target and anytime.collisions == 0
+
+    world.stop_signs.append((110, 80))
+    controller, _, clock = Episode.make_controller(world, target)
+    for _ in controller.drive():
+        pass
+    assert controller.seen_objects_["stop sign"]
+    assert clock.time() > AutonomousController.STOP_SIGN_WAIT
+
+
+def test_batch_runner(tmp_path):
+    specs = BatchRunner.random_specs(6, 21, 10, obstacle_ratio=0.1, seed=1, max_steps=200)
+    assert specs == BatchRunner.random_specs(6, 21, 10, obstacle_ratio=0.1, seed=1, max_steps=200)
+    for spec in specs:
+        assert max(abs(spec.start[0] - spec.target[0]), abs(spec.start[1] - spec.target[1])) >= 5
+    # batches with neighboring seeds do not share worlds, whatever their size
+    longer = BatchRunner.random_specs(20, 21, 10, seed=0)
+    assert not {spec.seed for spec in longer} & {spec.seed for spec in specs}
+    # planner settings reach the controller so batches can compare them
+    tuned = BatchRunner.random_specs(
+        2, 21, 10, seed=1, max_steps=200, car_radius_in_cm=10, inflation_cost_per_cell=1
+        )
+    assert BatchRunner.run(tuned, processes=1)["reached_target"].all()
+
+    columns = BatchRunner.run(specs, processes=1)
+    assert columns["start"].shape == (6, 2)
+    assert columns["reached_target"].dtype == bool and columns["reached_target"].all()
+    assert (columns["planning_time"] > 0).all()
+    assert (columns["replans"] >= 0).all()
+    # the same episodes give the same results in worker processes
+    parallel = BatchRunner.run(specs, processes=2, chunksize=1)
+    for name in ["reached_target", "steps", "collisions", "distance_travelled", "replans", "sim_time"]:
+        assert np.array_equal(columns[name], parallel[name])
+
+    path = str(tmp_path / "episodes.npz")
+    BatchRunner.save(path, columns)
+    loaded = BatchRunner.load(path)
+    assert loaded.keys() == columns.keys()
+    assert np.array_equal(loaded["distance_travelled"], columns["distance_travelled"])
+    assert BatchRunner.summary(loaded)["success_rate"] == 1.0
+
+
+def test_map_corpus():
+    for kind in MapCorpus.KINDS:
+        corpus_map = MapCorpus.make(kind, 31, seed=2)
+        assert corpus_map.blocked.shape == (31, 31)
+        assert np.array_equal(corpus_map.blocked, MapCorpus.make(kind, 31, seed=2).blocked)
+        assert not corpus_map.blocked[1, 1] and not corpus_map.blocked[29, 29]
+        mapp = corpus_map.to_mapp()
+        assert np.array_equal(mapp.get_blocked_grid(), corpus_map.blocked)
+        # every kind except clutter is built so the corners are connected
+        Pathfinder.nodes_expanded = 0
+        path = Pathfinder.a_star_array(mapp, corpus_map.start, corpus_map.target, max_steps=100_000)
+        if kind != "clutter":
+            assert path and path[-1].xy_compare(corpus_map.target)
+        assert Pathfinder.nodes_expanded >= len(path) - 1
+    # the corners stay connected on other seeds and sizes too, buildings that would
+    # cut them apart are drawn somewhere else
+    for corpus_map in MapCorpus.generate(["maze", "corridors", "open_field"], [11, 21, 31], seeds=range(100)):
+        mapp = corpus_map.to_mapp()
+        path = Pathfinder.a_star_array(mapp, corpus_map.start, corpus_map.target, max_steps=100_000)
+        assert path and path[-1].xy_compare(corpus_map.target), corpus_map.name
+    assert MapCorpus.make("open_field", 31, seed=80).blocked.any()
+    assert not np.array_equal(MapCorpus.make("maze", 31, seed=1).blocked, MapCorpus.make("maze", 31, seed=2).blocked)
+    assert len(MapCorpus.generate(["maze", "corridors"], [11, 21], seeds=[0, 1])) == 8
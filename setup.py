@@ -13,7 +13,8 @@ setup(
         "Herbie.CarNav",
         "Herbie.Hardware",
         "Herbie.Network",
-        "Herbie.CMath"
+        "Herbie.CMath",
+        "Herbie.Sim"
         ],
     install_requires=[
         "numpy>=1.2.1",